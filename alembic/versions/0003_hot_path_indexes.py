@@ -0,0 +1,31 @@
+"""add secondary indexes for hot query paths"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_topics_prompt"
+branch_labels = None
+depends_on = None
+
+_INDEXES = [
+    ("ix_messages_session_ts", "messages", ["session_id", "ts"]),
+    ("ix_error_spans_message_id", "error_spans", ["message_id"]),
+    ("ix_flashcards_due_at", "flashcards", ["due_at"]),
+    ("ix_flashcards_source_error_id", "flashcards", ["source_error_id"]),
+    ("ix_quizzes_session_created", "quizzes", ["session_id", "created_at"]),
+    ("ix_quiz_attempts_quiz_created", "quiz_attempts", ["quiz_id", "created_at"]),
+    ("ix_metric_snapshots_session_id", "metric_snapshots", ["session_id"]),
+    ("ix_metric_snapshots_created_at", "metric_snapshots", ["created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,114 @@
+"""add incrementally maintained dashboard aggregates"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0004_user_aggregates"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+_users = sa.table("users", sa.column("id", sa.String))
+_sessions = sa.table(
+    "sessions",
+    sa.column("id", sa.String),
+    sa.column("user_id", sa.String),
+    sa.column("status", sa.String),
+    sa.column("started_at", sa.DateTime),
+    sa.column("ended_at", sa.DateTime),
+)
+_messages = sa.table("messages", sa.column("id", sa.String), sa.column("session_id", sa.String))
+_error_spans = sa.table(
+    "error_spans", sa.column("message_id", sa.String), sa.column("user_text", sa.Text)
+)
+_snapshots = sa.table(
+    "metric_snapshots",
+    sa.column("user_id", sa.String),
+    sa.column("cefr_estimate", sa.String),
+    sa.column("created_at", sa.DateTime),
+)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def upgrade() -> None:
+    cefr_enum = sa.Enum("A2", "B1", "B2", "C1", name="cefrlevel")
+    cefr_enum.create(op.get_bind(), checkfirst=True)
+
+    aggregates = op.create_table(
+        "user_aggregates",
+        sa.Column("user_id", sa.String(length=36), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("study_seconds", sa.Float(), nullable=False),
+        sa.Column("conversations", sa.Integer(), nullable=False),
+        sa.Column("words_learned", sa.Integer(), nullable=False),
+        sa.Column("cards_reviewed", sa.Integer(), nullable=False),
+        sa.Column("latest_cefr", cefr_enum),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    learned = op.create_table(
+        "user_learned_words",
+        sa.Column("user_id", sa.String(length=36), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("text", sa.Text(), primary_key=True),
+    )
+
+    connection = op.get_bind()
+    now = datetime.now(tz=UTC)
+    rows = []
+    words = []
+    for (user_id,) in connection.execute(sa.select(_users.c.id)):
+        study_seconds = 0.0
+        conversations = 0
+        finished = connection.execute(
+            sa.select(_sessions.c.status, _sessions.c.started_at, _sessions.c.ended_at).where(
+                _sessions.c.user_id == user_id
+            )
+        )
+        for status, started_at, ended_at in finished:
+            if status in ("FINISHED", "finished"):
+                conversations += 1
+            if ended_at is not None:
+                delta = (_as_utc(ended_at) - _as_utc(started_at)).total_seconds()
+                study_seconds += max(0.0, delta)
+        texts = sorted(
+            connection.execute(
+                sa.select(_error_spans.c.user_text)
+                .distinct()
+                .join(_messages, _messages.c.id == _error_spans.c.message_id)
+                .join(_sessions, _sessions.c.id == _messages.c.session_id)
+                .where(_sessions.c.user_id == user_id)
+            ).scalars()
+        )
+        latest_cefr = connection.execute(
+            sa.select(_snapshots.c.cefr_estimate)
+            .where(_snapshots.c.user_id == user_id)
+            .order_by(_snapshots.c.created_at.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        words.extend({"user_id": user_id, "text": text} for text in texts)
+        rows.append(
+            {
+                "user_id": user_id,
+                "study_seconds": study_seconds,
+                "conversations": conversations,
+                "words_learned": len(texts),
+                "cards_reviewed": 0,
+                "latest_cefr": latest_cefr,
+                "updated_at": now,
+            }
+        )
+    if rows:
+        op.bulk_insert(aggregates, rows)
+    if words:
+        op.bulk_insert(learned, words)
+
+
+def downgrade() -> None:
+    op.drop_table("user_learned_words")
+    op.drop_table("user_aggregates")
@@ -0,0 +1,30 @@
+"""store materialized session reports"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0005_session_reports"
+down_revision = "0004_user_aggregates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No backfill: reports for already finished sessions are built on their first read.
+    op.create_table(
+        "session_reports",
+        sa.Column(
+            "session_id", sa.String(length=36), sa.ForeignKey("sessions.id"), primary_key=True
+        ),
+        sa.Column("builder_version", sa.Integer(), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("etag", sa.String(length=64), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("session_reports")
@@ -0,0 +1,20 @@
+"""index the due queue on (due_at, id) for keyset pagination"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007_flashcard_due_keyset"
+down_revision = "0006_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_flashcards_due_at_id", "flashcards", ["due_at", "id"])
+    op.drop_index("ix_flashcards_due_at", table_name="flashcards")
+
+
+def downgrade() -> None:
+    op.create_index("ix_flashcards_due_at", "flashcards", ["due_at"])
+    op.drop_index("ix_flashcards_due_at_id", table_name="flashcards")
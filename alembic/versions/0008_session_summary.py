@@ -0,0 +1,38 @@
+"""rolling conversation summary and prompt-size counters on sessions"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0008_session_summary"
+down_revision = "0007_flashcard_due_keyset"
+branch_labels = None
+depends_on = None
+
+_COUNTERS = (
+    "summary_turn",
+    "turn_count",
+    "history_tokens",
+    "prompt_tokens_sent",
+    "prompt_tokens_full",
+)
+
+
+def upgrade() -> None:
+    # Existing sessions start with zeroed counters; their first refresh summarizes
+    # everything said so far.
+    with op.batch_alter_table("sessions", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("summary", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("summary_until", sa.DateTime(timezone=True), nullable=True))
+        for name in _COUNTERS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sessions", schema=None) as batch_op:
+        for name in reversed(_COUNTERS):
+            batch_op.drop_column(name)
+        batch_op.drop_column("summary_until")
+        batch_op.drop_column("summary")
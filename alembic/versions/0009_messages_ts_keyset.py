@@ -0,0 +1,18 @@
+"""index messages on (ts, id) for the rescore keyset cursor"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0009_messages_ts_keyset"
+down_revision = "0008_session_summary"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_messages_ts_id", "messages", ["ts", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_ts_id", table_name="messages")
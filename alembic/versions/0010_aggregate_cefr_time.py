@@ -0,0 +1,29 @@
+"""when each user's latest CEFR estimate was measured"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0010_aggregate_cefr_time"
+down_revision = "0009_messages_ts_keyset"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("user_aggregates", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("cefr_updated_at", sa.DateTime(timezone=True), nullable=True))
+    # The newest snapshot is the one latest_cefr was copied from.
+    op.execute(
+        "UPDATE user_aggregates SET cefr_updated_at = ("
+        "SELECT MAX(created_at) FROM metric_snapshots"
+        " WHERE metric_snapshots.user_id = user_aggregates.user_id"
+        ") WHERE latest_cefr IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_aggregates", schema=None) as batch_op:
+        batch_op.drop_column("cefr_updated_at")
@@ -0,0 +1,33 @@
+"""``english-ia`` command line: one-shot maintenance tasks run outside the web workers.
+
+Usage: ``english-ia migrate`` (or ``python -m app.cli migrate``) before starting the
+server with ``DB_STARTUP_MODE=check``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+
+def _migrate(_: argparse.Namespace) -> int:
+    from app.repo.bootstrap import migrate
+    from app.repo.db import current_revision
+
+    before = current_revision()
+    after = migrate()
+    print(f"Database migrated: {before or 'empty'} -> {after}; defaults seeded.")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="english-ia", description="English IA maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="apply migrations and seed default data")
+    migrate.set_defaults(handler=_migrate)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
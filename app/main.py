@@ -5,32 +5,42 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.repo.db import init_db, session_scope, upgrade_db
-from app.repo.seed import seed_defaults
+from app.repo.bootstrap import prepare_database
+from app.repo.db import SessionLocal, dispose_async_engines
 from app.routers import (
+    admin,
     chat,
     dashboard,
     flashcards,
     health,
+    jobs,
     practice,
     quiz,
     reports,
     sessions,
     settings as settings_router,
 )
+from app.services.jobs import start_job_worker, stop_job_worker
+from app.services.llm.balancer import close_balancers
+from app.services.llm.pool import close_http_pool, configure_http_pool
 from app.utils.config import get_settings
-from app.ws import call as call_ws
+from app.ws import call as call_ws, review as review_ws
 
 app_settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    upgrade_db()
-    init_db()
-    with session_scope() as db:
-        seed_defaults(db)
-    yield
+    prepare_database(app_settings.db_startup_mode)
+    configure_http_pool(app_settings)
+    start_job_worker(SessionLocal, app_settings)
+    try:
+        yield
+    finally:
+        stop_job_worker()
+        await close_balancers()
+        await close_http_pool()
+        await dispose_async_engines()
 
 
 def create_app() -> FastAPI:
@@ -45,13 +55,16 @@ def create_app() -> FastAPI:
     app.include_router(health.router)
     app.include_router(practice.router)
     app.include_router(sessions.router)
+    app.include_router(jobs.router)
     app.include_router(chat.router)
     app.include_router(quiz.router)
     app.include_router(reports.router)
     app.include_router(flashcards.router)
     app.include_router(dashboard.router)
     app.include_router(settings_router.router)
+    app.include_router(admin.router)
     app.include_router(call_ws.router)
+    app.include_router(review_ws.router)
     return app
 
 
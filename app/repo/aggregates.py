@@ -0,0 +1,198 @@
+"""Per-user dashboard aggregates, kept current by the DAO write paths.
+
+Each ``record_*`` helper runs inside the caller's transaction, so the counters commit
+or roll back together with the event they describe. ``rebuild_aggregates`` recomputes
+everything from the source tables; run ``python -m app.repo.aggregates`` to verify
+(and repair) the stored values.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.repo import models
+
+
+@dataclass(frozen=True, slots=True)
+class AggregateValues:
+    study_seconds: float
+    conversations: int
+    words_learned: int
+    cards_reviewed: int
+    latest_cefr: models.CEFRLevel | None
+    # Not compared: SQLite drops the timezone, so stored and recomputed values differ.
+    cefr_updated_at: datetime | None = field(default=None, compare=False)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes even for timezone-aware columns.
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def session_seconds(session: models.Session) -> float:
+    if not session.ended_at:
+        return 0.0
+    return max(0.0, (_as_utc(session.ended_at) - _as_utc(session.started_at)).total_seconds())
+
+
+def _update_row(db: Session, user_id: str, values: dict) -> None:
+    """UPDATE the user's row, creating it only when the statement matched nothing."""
+    table = models.UserAggregate
+    values["updated_at"] = datetime.now(tz=UTC)
+    statement = update(table).where(table.user_id == user_id).values(**values)
+    if db.execute(statement).rowcount:
+        return
+    db.add(models.UserAggregate(user_id=user_id))
+    db.flush()
+    db.execute(statement)
+
+
+def _bump(db: Session, user_id: str, **deltas: float) -> None:
+    """Apply ``column = column + delta`` in SQL so concurrent writers do not lose updates."""
+    table = models.UserAggregate
+    _update_row(db, user_id, {name: getattr(table, name) + delta for name, delta in deltas.items()})
+
+
+def record_session_finished(db: Session, session: models.Session) -> None:
+    _bump(db, session.user_id, study_seconds=session_seconds(session), conversations=1)
+
+
+def record_error_texts(db: Session, user_id: str, texts: Iterable[str]) -> None:
+    candidates = set(texts)
+    if not candidates:
+        return
+    known = set(
+        db.scalars(
+            select(models.UserLearnedWord.text).where(
+                models.UserLearnedWord.user_id == user_id,
+                models.UserLearnedWord.text.in_(candidates),
+            )
+        )
+    )
+    new_texts = candidates - known
+    if not new_texts:
+        return
+    db.add_all(models.UserLearnedWord(user_id=user_id, text=text) for text in new_texts)
+    db.flush()
+    _bump(db, user_id, words_learned=len(new_texts))
+
+
+def record_card_review(db: Session, user_id: str, count: int = 1) -> None:
+    _bump(db, user_id, cards_reviewed=count)
+
+
+def record_cefr(db: Session, user_id: str, cefr: models.CEFRLevel, measured_at: datetime) -> None:
+    _update_row(db, user_id, {"latest_cefr": cefr, "cefr_updated_at": measured_at})
+
+
+def get_aggregates(db: Session, user_id: str) -> models.UserAggregate | None:
+    return db.get(models.UserAggregate, user_id)
+
+
+def compute_aggregates(db: Session, user_id: str) -> AggregateValues:
+    """Recompute a user's aggregates from the source tables (slow path)."""
+    finished = db.scalars(
+        select(models.Session).where(
+            models.Session.user_id == user_id, models.Session.ended_at.is_not(None)
+        )
+    )
+    study_seconds = sum(session_seconds(session) for session in finished)
+    conversations = (
+        db.scalar(
+            select(func.count(models.Session.id)).where(
+                models.Session.user_id == user_id,
+                models.Session.status == models.SessionStatus.FINISHED,
+            )
+        )
+        or 0
+    )
+    words_learned = (
+        db.scalar(
+            select(func.count(func.distinct(models.ErrorSpan.user_text)))
+            .join(models.Message, models.Message.id == models.ErrorSpan.message_id)
+            .join(models.Session, models.Session.id == models.Message.session_id)
+            .where(models.Session.user_id == user_id)
+        )
+        or 0
+    )
+    stored = get_aggregates(db, user_id)
+    latest = db.execute(
+        select(models.MetricSnapshot.cefr_estimate, models.MetricSnapshot.created_at)
+        .where(models.MetricSnapshot.user_id == user_id)
+        .order_by(models.MetricSnapshot.created_at.desc())
+        .limit(1)
+    ).one_or_none()
+    return AggregateValues(
+        study_seconds=study_seconds,
+        conversations=conversations,
+        words_learned=words_learned,
+        # Reviews leave no history of their own, so the running counter is authoritative.
+        cards_reviewed=stored.cards_reviewed if stored else 0,
+        latest_cefr=latest.cefr_estimate if latest else None,
+        cefr_updated_at=latest.created_at if latest else None,
+    )
+
+
+def rebuild_aggregates(db: Session) -> dict[str, tuple[AggregateValues | None, AggregateValues]]:
+    """Recompute every user's aggregates; returns ``{user_id: (before, after)}``."""
+    changes: dict[str, tuple[AggregateValues | None, AggregateValues]] = {}
+    for user_id in list(db.scalars(select(models.User.id))):
+        stored = get_aggregates(db, user_id)
+        before = (
+            AggregateValues(
+                study_seconds=stored.study_seconds,
+                conversations=stored.conversations,
+                words_learned=stored.words_learned,
+                cards_reviewed=stored.cards_reviewed,
+                latest_cefr=stored.latest_cefr,
+                cefr_updated_at=stored.cefr_updated_at,
+            )
+            if stored
+            else None
+        )
+        after = compute_aggregates(db, user_id)
+        db.execute(delete(models.UserLearnedWord).where(models.UserLearnedWord.user_id == user_id))
+        words = db.scalars(
+            select(models.ErrorSpan.user_text)
+            .distinct()
+            .join(models.Message, models.Message.id == models.ErrorSpan.message_id)
+            .join(models.Session, models.Session.id == models.Message.session_id)
+            .where(models.Session.user_id == user_id)
+        )
+        db.add_all(models.UserLearnedWord(user_id=user_id, text=text) for text in words)
+        if stored is None:
+            stored = models.UserAggregate(user_id=user_id)
+            db.add(stored)
+        stored.study_seconds = after.study_seconds
+        stored.conversations = after.conversations
+        stored.words_learned = after.words_learned
+        stored.cards_reviewed = after.cards_reviewed
+        stored.latest_cefr = after.latest_cefr
+        stored.cefr_updated_at = after.cefr_updated_at
+        stored.updated_at = datetime.now(tz=UTC)
+        db.flush()
+        changes[user_id] = (before, after)
+    return changes
+
+
+def main() -> int:  # pragma: no cover - manual utility
+    from app.repo.db import session_scope
+
+    with session_scope() as db:
+        results = rebuild_aggregates(db)
+    drifted = 0
+    for user_id, (before, after) in results.items():
+        if before != after:
+            drifted += 1
+            print(f"user {user_id}: stored={before} recomputed={after}")
+    print(f"Rebuilt aggregates for {len(results)} users ({drifted} drifted).")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual utility
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+"""Async versions of the ``dao`` functions for ``AsyncSession``.
+
+Each wrapper runs the sync implementation through ``AsyncSession.run_sync``, so the
+queries and the aggregate bookkeeping live in one place and relationship lazy loads
+keep working, while the I/O itself goes through the async driver.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from typing import Concatenate, ParamSpec, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.repo import dao, jobs
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _bridge(
+    func: Callable[Concatenate[Session, P], R],
+) -> Callable[Concatenate[AsyncSession, P], Awaitable[R]]:
+    @wraps(func)
+    async def wrapper(db: AsyncSession, *args: P.args, **kwargs: P.kwargs) -> R:
+        return await db.run_sync(func, *args, **kwargs)
+
+    return wrapper
+
+
+ensure_default_user = _bridge(dao.ensure_default_user)
+get_settings = _bridge(dao.get_settings)
+update_settings = _bridge(dao.update_settings)
+get_cached_settings = _bridge(dao.get_cached_settings)
+list_practice_topics = _bridge(dao.list_practice_topics)
+get_practice_topic_by_code = _bridge(dao.get_practice_topic_by_code)
+get_random_practice_topic = _bridge(dao.get_random_practice_topic)
+create_session = _bridge(dao.create_session)
+get_session = _bridge(dao.get_session)
+mark_session_finished = _bridge(dao.mark_session_finished)
+append_message = _bridge(dao.append_message)
+save_error_spans = _bridge(dao.save_error_spans)
+list_session_messages = _bridge(dao.list_session_messages)
+list_recent_messages = _bridge(dao.list_recent_messages)
+list_session_errors = _bridge(dao.list_session_errors)
+create_quizzes = _bridge(dao.create_quizzes)
+list_quizzes_by_session = _bridge(dao.list_quizzes_by_session)
+get_quiz = _bridge(dao.get_quiz)
+list_quiz_attempts_by_session = _bridge(dao.list_quiz_attempts_by_session)
+record_quiz_attempt = _bridge(dao.record_quiz_attempt)
+ensure_flashcard_from_error = _bridge(dao.ensure_flashcard_from_error)
+ensure_flashcards_from_errors = _bridge(dao.ensure_flashcards_from_errors)
+list_flashcards_due = _bridge(dao.list_flashcards_due)
+update_flashcard_state = _bridge(dao.update_flashcard_state)
+get_flashcards = _bridge(dao.get_flashcards)
+update_flashcard_states = _bridge(dao.update_flashcard_states)
+record_metric_snapshot = _bridge(dao.record_metric_snapshot)
+session_has_metrics = _bridge(dao.session_has_metrics)
+get_quiz_progress = _bridge(dao.get_quiz_progress)
+quizzes_completed = _bridge(dao.quizzes_completed)
+build_session_report = _bridge(dao.build_session_report)
+get_session_report = _bridge(dao.get_session_report)
+save_session_report = _bridge(dao.save_session_report)
+get_dashboard_summary = _bridge(dao.get_dashboard_summary)
+create_manual_flashcard = _bridge(dao.create_manual_flashcard)
+get_job = _bridge(jobs.get_job)
@@ -0,0 +1,53 @@
+"""Database bootstrap shared by app startup and the ``english-ia migrate`` command.
+
+Booting a worker used to run the Alembic upgrade, ``create_all`` and the seed on every
+start. Now a worker only reads ``alembic_version``: when it already holds
+``SCHEMA_REVISION`` nothing else runs. Otherwise ``DB_STARTUP_MODE`` decides: ``auto``
+migrates and seeds in-process (single-process dev servers), ``check`` refuses to start
+so that several workers never race each other through the migration.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Literal
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.repo import db as db_module
+from app.repo.seed import seed_defaults
+
+logger = logging.getLogger(__name__)
+
+StartupMode = Literal["auto", "check"]
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at ``SCHEMA_REVISION`` and startup may not migrate it."""
+
+
+def migrate(bind: Engine | None = None) -> str | None:
+    """Upgrade to head, create any missing tables and seed defaults; returns the revision."""
+    bind = bind or db_module.engine
+    db_module.upgrade_db(bind)
+    db_module.init_db(bind)
+    with Session(bind=bind, expire_on_commit=False) as session:
+        seed_defaults(session)
+        session.commit()
+    return db_module.current_revision(bind)
+
+
+def prepare_database(mode: StartupMode = "auto", bind: Engine | None = None) -> bool:
+    """Make sure the schema is current before serving; ``True`` if it had to migrate."""
+    revision = db_module.current_revision(bind)
+    if revision == db_module.SCHEMA_REVISION:
+        return False
+    if mode == "check":
+        raise SchemaOutOfDate(
+            f"database is at revision {revision or 'none'}, expected "
+            f"{db_module.SCHEMA_REVISION}; run `english-ia migrate` first"
+        )
+    logger.info("Migrating database from %s to %s", revision, db_module.SCHEMA_REVISION)
+    migrate(bind)
+    return True
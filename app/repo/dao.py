@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import Sequence
+from typing import TYPE_CHECKING, Iterable, Sequence
 
-from sqlalchemy import Select, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, event, exists, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
 
-from app.repo import models
-from app.services.evaluation.errors import DetectedError
-from app.services.evaluation.quizgen import QuizPayload
+from app.repo import aggregates, models
 from app.utils.config import get_settings as get_runtime_settings
 
+if TYPE_CHECKING:
+    from app.services.evaluation.errors import DetectedError
+    from app.services.evaluation.quizgen import QuizPayload
+
 DEFAULT_USER_NICKNAME = "Local Learner"
 runtime_settings = get_runtime_settings()
 
@@ -47,9 +54,56 @@ def update_settings(db: Session, provider: models.LLMProvider, llm_model: str) -
     settings.updated_at = datetime.now(tz=UTC)
     db.add(settings)
     db.flush()
+    # Only readers that start after the commit should see the new row.
+    event.listen(db, "after_commit", lambda _: invalidate_settings_cache(), once=True)
     return settings
 
 
+@dataclass(frozen=True, slots=True)
+class SettingsSnapshot:
+    """Detached copy of the settings row, safe to share across requests."""
+
+    llm_provider: models.LLMProvider
+    llm_model: str
+    version: int
+
+
+_settings_lock = threading.Lock()
+_settings_version = 0
+_settings_cache: tuple[SettingsSnapshot, float] | None = None
+
+
+def invalidate_settings_cache() -> None:
+    global _settings_version, _settings_cache
+    with _settings_lock:
+        _settings_version += 1
+        _settings_cache = None
+
+
+def get_cached_settings(db: Session) -> SettingsSnapshot:
+    """Return the settings row from the in-process cache, querying only after invalidation.
+
+    ``SETTINGS_CACHE_TTL`` bounds how long a change made by another worker process can
+    go unnoticed.
+    """
+    global _settings_cache
+    cached = _settings_cache
+    if cached is not None:
+        snapshot, loaded_at = cached
+        fresh = time.monotonic() - loaded_at < runtime_settings.settings_cache_ttl
+        if snapshot.version == _settings_version and fresh:
+            return snapshot
+    version = _settings_version
+    row = get_settings(db)
+    snapshot = SettingsSnapshot(
+        llm_provider=row.llm_provider, llm_model=row.llm_model, version=version
+    )
+    with _settings_lock:
+        if version == _settings_version:
+            _settings_cache = (snapshot, time.monotonic())
+    return snapshot
+
+
 def list_practice_topics(db: Session) -> list[models.PracticeTopic]:
     stmt = select(models.PracticeTopic).order_by(models.PracticeTopic.label.asc())
     return list(db.scalars(stmt))
@@ -76,14 +130,23 @@ def create_session(
     return session
 
 
-def get_session(db: Session, session_id: str) -> models.Session | None:
-    return db.get(models.Session, session_id)
+def get_session(
+    db: Session, session_id: str, with_related: bool = False
+) -> models.Session | None:
+    """``with_related`` joins ``topic`` and ``user`` into the same query."""
+    if not with_related:
+        return db.get(models.Session, session_id)
+    options = [joinedload(models.Session.topic), joinedload(models.Session.user)]
+    return db.get(models.Session, session_id, options=options)
 
 
 def mark_session_finished(db: Session, session: models.Session) -> None:
+    if session.status == models.SessionStatus.FINISHED:
+        return
     session.status = models.SessionStatus.FINISHED
     session.ended_at = datetime.now(tz=UTC)
     db.add(session)
+    aggregates.record_session_finished(db, session)
 
 
 def append_message(db: Session, session: models.Session, role: models.MessageRole, text: str) -> models.Message:
@@ -108,6 +171,7 @@ def save_error_spans(db: Session, message: models.Message, errors: Sequence[Dete
         db.add(span)
         spans.append(span)
     db.flush()
+    aggregates.record_error_texts(db, message.session.user_id, (span.user_text for span in spans))
     return spans
 
 
@@ -118,6 +182,29 @@ def list_session_messages(db: Session, session_id: str) -> list[models.Message]:
     return list(db.scalars(stmt))
 
 
+def list_recent_messages(db: Session, session_id: str, limit: int) -> list[models.Message]:
+    """Last ``limit`` messages of a session, oldest first (walks the index backwards)."""
+    stmt: Select[tuple[models.Message]] = (
+        select(models.Message)
+        .where(models.Message.session_id == session_id)
+        .order_by(models.Message.ts.desc())
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))[::-1]
+
+
+def list_messages_after(
+    db: Session, session_id: str, after: datetime | None
+) -> list[models.Message]:
+    """Messages newer than ``after`` (all of them when ``None``), oldest first."""
+    stmt: Select[tuple[models.Message]] = select(models.Message).where(
+        models.Message.session_id == session_id
+    )
+    if after is not None:
+        stmt = stmt.where(models.Message.ts > after)
+    return list(db.scalars(stmt.order_by(models.Message.ts.asc())))
+
+
 def list_session_errors(db: Session, session_id: str) -> list[models.ErrorSpan]:
     stmt: Select[tuple[models.ErrorSpan]] = (
         select(models.ErrorSpan)
@@ -150,8 +237,13 @@ def list_quizzes_by_session(db: Session, session_id: str) -> list[models.Quiz]:
     return list(db.scalars(stmt))
 
 
-def get_quiz(db: Session, quiz_id: str) -> models.Quiz | None:
-    return db.get(models.Quiz, quiz_id)
+def get_quiz(db: Session, quiz_id: str, with_session: bool = False) -> models.Quiz | None:
+    """``with_session`` joins the quiz's session with its topic and user."""
+    if not with_session:
+        return db.get(models.Quiz, quiz_id)
+    session = joinedload(models.Quiz.session)
+    options = [session.joinedload(models.Session.topic), session.joinedload(models.Session.user)]
+    return db.get(models.Quiz, quiz_id, options=options)
 
 
 def list_quiz_attempts_by_session(db: Session, session_id: str) -> list[models.QuizAttempt]:
@@ -184,13 +276,42 @@ def ensure_flashcard_from_error(
     return card, True
 
 
-def list_flashcards_due(db: Session, limit: int = 20) -> list[models.Flashcard]:
-    stmt = (
-        select(models.Flashcard)
-        .where(models.Flashcard.due_at <= datetime.now(tz=UTC))
-        .order_by(models.Flashcard.due_at.asc())
-        .limit(limit)
+def ensure_flashcards_from_errors(db: Session, errors: Sequence[models.ErrorSpan]) -> int:
+    """Create the missing flashcards for ``errors`` with one lookup and one bulk insert."""
+    if not errors:
+        return 0
+    error_ids = [error.id for error in errors]
+    existing = set(
+        db.scalars(
+            select(models.Flashcard.source_error_id).where(
+                models.Flashcard.source_error_id.in_(error_ids)
+            )
+        )
     )
+    rows = []
+    for error in errors:
+        if error.id in existing:
+            continue
+        existing.add(error.id)
+        rows.append(
+            {"front": error.user_text, "back": error.corrected_text, "source_error_id": error.id}
+        )
+    if rows:
+        db.execute(insert(models.Flashcard), rows)
+    return len(rows)
+
+
+def list_flashcards_due(
+    db: Session,
+    limit: int = 20,
+    after: tuple[datetime, str] | None = None,
+    now: datetime | None = None,
+) -> list[models.Flashcard]:
+    """Due cards in (due_at, id) order; ``after`` is the keyset of the last card already seen."""
+    stmt = select(models.Flashcard).where(models.Flashcard.due_at <= (now or datetime.now(tz=UTC)))
+    if after is not None:
+        stmt = stmt.where(tuple_(models.Flashcard.due_at, models.Flashcard.id) > tuple_(*after))
+    stmt = stmt.order_by(models.Flashcard.due_at.asc(), models.Flashcard.id.asc()).limit(limit)
     return list(db.scalars(stmt))
 
 
@@ -203,9 +324,73 @@ def update_flashcard_state(
     card.due_at = due_at
     db.add(card)
     db.flush()
+    aggregates.record_card_review(db, _flashcard_owner_id(db, card))
     return card
 
 
+def get_flashcards(db: Session, card_ids: Iterable[str]) -> dict[str, models.Flashcard]:
+    stmt = select(models.Flashcard).where(models.Flashcard.id.in_(set(card_ids)))
+    return {card.id: card for card in db.scalars(stmt)}
+
+
+def update_flashcard_states(
+    db: Session,
+    cards: Sequence[models.Flashcard],
+    states: dict[str, tuple[int, int, float, datetime]],
+    reviews: Counter[str],
+) -> None:
+    """Write many scheduled states in one executemany UPDATE.
+
+    ``states`` maps card id to (reps, interval, ease, due_at); ``reviews`` counts the
+    grades per card so the owners' ``cards_reviewed`` aggregates stay exact.
+    """
+    rows = [
+        {"id": card_id, "reps": reps, "interval": interval, "ease": ease, "due_at": due_at}
+        for card_id, (reps, interval, ease, due_at) in states.items()
+    ]
+    if not rows:
+        return
+    db.execute(update(models.Flashcard).execution_options(synchronize_session=False), rows)
+    per_owner: Counter[str] = Counter()
+    owners = _flashcard_owner_ids(db, cards)
+    for card in cards:
+        per_owner[owners[card.id]] += reviews[card.id]
+    for user_id, count in per_owner.items():
+        aggregates.record_card_review(db, user_id, count)
+
+
+def _flashcard_owner_ids(db: Session, cards: Sequence[models.Flashcard]) -> dict[str, str]:
+    error_ids = {card.source_error_id for card in cards if card.source_error_id is not None}
+    by_error: dict[str, str] = {}
+    if error_ids:
+        rows = db.execute(
+            select(models.ErrorSpan.id, models.Session.user_id)
+            .join(models.Message, models.Message.id == models.ErrorSpan.message_id)
+            .join(models.Session, models.Session.id == models.Message.session_id)
+            .where(models.ErrorSpan.id.in_(error_ids))
+        )
+        by_error = dict(rows.tuples())
+    owners = {card.id: by_error.get(card.source_error_id) for card in cards}
+    if any(owner is None for owner in owners.values()):
+        default_id = ensure_default_user(db).id
+        owners = {card_id: owner or default_id for card_id, owner in owners.items()}
+    return owners
+
+
+def _flashcard_owner_id(db: Session, card: models.Flashcard) -> str:
+    # Manual cards have no source error; they belong to the local learner.
+    if card.source_error_id is not None:
+        owner = db.scalar(
+            select(models.Session.user_id)
+            .join(models.Message, models.Message.session_id == models.Session.id)
+            .join(models.ErrorSpan, models.ErrorSpan.message_id == models.Message.id)
+            .where(models.ErrorSpan.id == card.source_error_id)
+        )
+        if owner is not None:
+            return owner
+    return ensure_default_user(db).id
+
+
 def record_metric_snapshot(
     db: Session,
     user: models.User,
@@ -225,6 +410,7 @@ def record_metric_snapshot(
     )
     db.add(snapshot)
     db.flush()
+    aggregates.record_cefr(db, user.id, cefr, snapshot.created_at)
     return snapshot
 
 
@@ -235,50 +421,106 @@ def session_has_metrics(db: Session, session: models.Session) -> bool:
     return bool(count)
 
 
-def quizzes_completed(db: Session, session: models.Session) -> bool:
-    total_quizzes = db.scalar(select(func.count(models.Quiz.id)).where(models.Quiz.session_id == session.id)) or 0
-    if total_quizzes == 0:
-        return False
-    distinct_attempts = (
-        db.scalar(
-            select(func.count(func.distinct(models.QuizAttempt.quiz_id)))
-            .join(models.Quiz, models.Quiz.id == models.QuizAttempt.quiz_id)
-            .where(models.Quiz.session_id == session.id)
-        )
-        or 0
+@dataclass(frozen=True, slots=True)
+class QuizProgress:
+    total: int
+    answered: int
+    has_metrics: bool
+
+    @property
+    def completed(self) -> bool:
+        return self.total > 0 and self.answered >= self.total
+
+
+def get_quiz_progress(db: Session, session_id: str) -> QuizProgress:
+    """Quiz count, answered quiz count and snapshot presence in a single round trip."""
+    total = (
+        select(func.count(models.Quiz.id))
+        .where(models.Quiz.session_id == session_id)
+        .scalar_subquery()
+    )
+    answered = (
+        select(func.count(func.distinct(models.QuizAttempt.quiz_id)))
+        .join(models.Quiz, models.Quiz.id == models.QuizAttempt.quiz_id)
+        .where(models.Quiz.session_id == session_id)
+        .scalar_subquery()
     )
-    return distinct_attempts >= total_quizzes
+    has_metrics = exists().where(models.MetricSnapshot.session_id == session_id)
+    row = db.execute(select(total, answered, has_metrics)).one()
+    return QuizProgress(total=row[0] or 0, answered=row[1] or 0, has_metrics=bool(row[2]))
+
+
+def quizzes_completed(db: Session, session: models.Session) -> bool:
+    return get_quiz_progress(db, session.id).completed
+
+
+def build_session_report(db: Session, session: models.Session) -> dict:
+    messages = list_session_messages(db, session.id)
+    errors = list_session_errors(db, session.id)
+    attempts = list_quiz_attempts_by_session(db, session.id)
+    topic_label = session.topic.label if session.topic else session.topic_code
+    from app.services.evaluation import report as report_service
+
+    return report_service.build_report(topic_label, messages, errors, attempts)
+
+
+def get_session_report(db: Session, session_id: str) -> models.SessionReport | None:
+    return db.get(models.SessionReport, session_id)
+
+
+def save_session_report(
+    db: Session, session_id: str, data: dict, builder_version: int | None = None
+) -> models.SessionReport:
+    if builder_version is None:
+        from app.services.evaluation import report as report_service
+
+        builder_version = report_service.BUILDER_VERSION
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    etag = hashlib.sha256(f"{builder_version}:{payload}".encode()).hexdigest()[:32]
+    row = get_session_report(db, session_id)
+    if row is None:
+        row = models.SessionReport(session_id=session_id)
+        db.add(row)
+    row.builder_version = builder_version
+    row.payload_json = payload
+    row.etag = etag
+    row.updated_at = datetime.now(tz=UTC)
+    db.flush()
+    return row
 
 
 def get_dashboard_summary(db: Session) -> dict:
-    finished_stmt = select(models.Session).where(models.Session.ended_at.is_not(None))
-    finished_sessions = list(db.scalars(finished_stmt))
-    study_seconds = 0.0
-    for session in finished_sessions:
-        if session.ended_at:
-            study_seconds += max(0.0, (session.ended_at - session.started_at).total_seconds())
+    """Read the precomputed per-user aggregates instead of scanning the history tables.
+
+    Only ``due_flashcards`` is computed on read: it depends on the clock, and the
+    ``due_at`` index keeps it a range count. ``words_learned`` counts distinct texts
+    across all users, like before the aggregates existed, from ``user_learned_words``
+    rather than the error spans.
+    """
+    table = models.UserAggregate
+    distinct_words = select(func.count(func.distinct(models.UserLearnedWord.text)))
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(table.study_seconds), 0.0),
+            distinct_words.scalar_subquery(),
+            func.coalesce(func.sum(table.conversations), 0),
+            func.coalesce(func.sum(table.cards_reviewed), 0),
+        )
+    ).one()
+    study_seconds, words_learned, conversations, cards_reviewed = totals
+    latest_cefr = db.scalar(
+        select(table.latest_cefr)
+        .where(table.latest_cefr.is_not(None))
+        .order_by(table.cefr_updated_at.desc())
+        .limit(1)
+    )
 
     due_flashcards = (
         db.scalar(select(func.count(models.Flashcard.id)).where(models.Flashcard.due_at <= datetime.now(tz=UTC)))
         or 0
     )
-    words_learned = (
-        db.scalar(select(func.count(func.distinct(models.ErrorSpan.user_text)))) or 0
-    )
-    conversations = (
-        db.scalar(
-            select(func.count(models.Session.id)).where(
-                models.Session.status == models.SessionStatus.FINISHED
-            )
-        )
-        or 0
-    )
 
-    latest_snapshot = (
-        db.execute(select(models.MetricSnapshot).order_by(models.MetricSnapshot.created_at.desc()).limit(1))
-        .scalar_one_or_none()
-    )
-    cefr = latest_snapshot.cefr_estimate.value if latest_snapshot else None
+    cefr = latest_cefr.value if latest_cefr else None
     if cefr in {"A1", "A2"}:
         fluency_level = "Beginner"
     elif cefr in {"B1", "B2"}:
@@ -289,11 +531,12 @@ def get_dashboard_summary(db: Session) -> dict:
         fluency_level = "Beginner"
 
     return {
-        "study_time_hours": round(study_seconds / 3600, 2),
-        "words_learned": words_learned,
-        "conversations": conversations,
+        "study_time_hours": round(float(study_seconds) / 3600, 2),
+        "words_learned": int(words_learned),
+        "conversations": int(conversations),
         "fluency_level": fluency_level,
         "due_flashcards": due_flashcards,
+        "cards_reviewed": int(cards_reviewed),
     }
 
 
@@ -3,42 +3,158 @@ from __future__ import annotations
 from contextlib import contextmanager
 from pathlib import Path
 
-from alembic import command
-from alembic.config import Config
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from app.utils.config import get_settings
+from app.utils.config import Settings, get_settings
 
 settings = get_settings()
 
+ROOT = Path(__file__).resolve().parents[2]
+
+# Latest migration in ``alembic/versions``; startup compares the database against it
+# without loading Alembic. Bump it together with every new migration (a test checks).
+SCHEMA_REVISION = "0010_aggregate_cefr_time"
+
 
 class Base(DeclarativeBase):
     """Base declarative class for all ORM models."""
 
 
-def _build_engine():
+def _is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(cfg: Settings, read_only: bool = False) -> list[str]:
+    """PRAGMA statements run on every new connection for the configured profile."""
+    pragmas = [f"PRAGMA busy_timeout = {cfg.sqlite_busy_timeout_ms}"]
+    if cfg.sqlite_profile == "performance":
+        pragmas += [
+            # WAL lets readers keep going while a writer commits; NORMAL only syncs at
+            # checkpoints, which is durable across app crashes (not power loss).
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA mmap_size = {cfg.sqlite_mmap_size}",
+            f"PRAGMA cache_size = -{cfg.sqlite_cache_size_kib}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, cfg: Settings, read_only: bool = False) -> None:
+    pragmas = sqlite_pragmas(cfg, read_only)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _build_engine(cfg: Settings = settings, read_only: bool = False) -> Engine:
+    url = cfg.database_url
     connect_args = {}
-    if settings.database_url.startswith("sqlite"):
+    kwargs = {}
+    if url.startswith("sqlite"):
         connect_args["check_same_thread"] = False
-    return create_engine(settings.database_url, echo=False, future=True, connect_args=connect_args)
+        if read_only and _is_file_sqlite(url):
+            kwargs["pool_size"] = cfg.db_read_pool_size
+    engine = create_engine(url, echo=False, future=True, connect_args=connect_args, **kwargs)
+    if url.startswith("sqlite"):
+        apply_sqlite_profile(engine, cfg, read_only=read_only)
+    return engine
 
 
 engine = _build_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
 
-
-def init_db() -> None:
+# GET endpoints read through their own pool so they never queue behind writers for a
+# connection; on SQLite the connections are also marked ``query_only``. In-memory
+# databases cannot be shared across engines, so they reuse the primary engine.
+read_engine = _build_engine(read_only=True) if _is_file_sqlite(settings.database_url) else engine
+ReadSessionLocal = sessionmaker(
+    bind=read_engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True
+)
+
+
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(cfg: Settings = settings) -> str:
+    """``ASYNC_DATABASE_URL`` or ``DATABASE_URL`` with its driver swapped for the async one."""
+    if cfg.async_database_url:
+        return cfg.async_database_url
+    url = make_url(cfg.database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(
+            f"No async driver known for {url.get_backend_name()!r}; set ASYNC_DATABASE_URL"
+        )
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def _build_async_engine(cfg: Settings = settings, read_only: bool = False) -> AsyncEngine:
+    url = async_database_url(cfg)
+    kwargs = {}
+    if read_only and _is_file_sqlite(url):
+        kwargs["pool_size"] = cfg.db_read_pool_size
+    engine = create_async_engine(url, echo=False, **kwargs)
+    if url.startswith("sqlite"):
+        apply_sqlite_profile(engine.sync_engine, cfg, read_only=read_only)
+    return engine
+
+
+# Async counterparts used by the ``async def`` routers. They talk to the same database
+# file as ``engine``; an in-memory ``DATABASE_URL`` is private to each engine, so the
+# async routers need a file-backed database.
+async_engine = _build_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+async_read_engine = (
+    _build_async_engine(read_only=True) if _is_file_sqlite(settings.database_url) else async_engine
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def init_db(bind: Engine | None = None) -> None:
     """Ensure metadata exists (Alembic should still manage migrations)."""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=bind or engine)
 
 
-def upgrade_db() -> None:
-    """Apply Alembic migrations programmatically on startup."""
-    config = Config(str(Path(__file__).resolve().parents[2] / "alembic.ini"))
-    config.set_main_option("script_location", str(Path(__file__).resolve().parents[2] / "alembic"))
-    config.set_main_option("sqlalchemy.url", settings.database_url)
-    command.upgrade(config, "head")
+def current_revision(bind: Engine | None = None) -> str | None:
+    """Revision stamped in ``alembic_version``; ``None`` when the database is not migrated.
+
+    A single query, so workers can check the schema on boot without importing Alembic.
+    """
+    try:
+        with (bind or engine).connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        return None
+
+
+def upgrade_db(bind: Engine | None = None) -> None:
+    """Apply Alembic migrations up to head."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    with (bind or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
 
 
 def get_db():
@@ -49,6 +165,31 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency for read-only endpoints; any write raises ``OperationalError``."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
 @contextmanager
 def session_scope():
     session = SessionLocal()
@@ -0,0 +1,159 @@
+"""Persistence for background jobs: enqueue, claim with a lease, finish or retry.
+
+Claims are a conditional ``UPDATE`` on the row's status, so several worker threads
+(or processes sharing the database) never run the same attempt twice. The attempt
+number doubles as a fencing token: a worker whose lease expired cannot record a
+result over a newer attempt.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.repo import models
+
+Job = models.Job
+JobStatus = models.JobStatus
+
+
+def _now() -> datetime:
+    return datetime.now(tz=UTC)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict | None = None,
+    idempotency_key: str | None = None,
+    max_attempts: int = 3,
+) -> tuple[models.Job, bool]:
+    """Add a job, or return the existing one for ``idempotency_key``; second item is "created"."""
+    job = models.Job(
+        kind=kind,
+        payload_json=json.dumps(payload or {}),
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts,
+    )
+    if not idempotency_key:
+        db.add(job)
+        db.flush()
+        return job, True
+    try:
+        with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        # Already enqueued, possibly by a concurrent request with the same key.
+        return get_job_by_key(db, idempotency_key), False
+    return job, True
+
+
+def get_job(db: Session, job_id: str) -> models.Job | None:
+    return db.get(models.Job, job_id, populate_existing=True)
+
+
+def get_job_by_key(db: Session, idempotency_key: str) -> models.Job | None:
+    stmt = select(models.Job).where(models.Job.idempotency_key == idempotency_key).limit(1)
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def claim_next(db: Session, lease_seconds: float) -> models.Job | None:
+    """Move the oldest runnable job to RUNNING and return it (caller commits)."""
+    now = _now()
+    while True:
+        candidate = db.scalar(
+            select(models.Job.id)
+            .where(models.Job.status == JobStatus.QUEUED, models.Job.run_after <= now)
+            .order_by(models.Job.run_after.asc())
+            .limit(1)
+        )
+        if candidate is None:
+            return None
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == candidate, models.Job.status == JobStatus.QUEUED)
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=models.Job.attempts + 1,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount:
+            job = db.get(models.Job, candidate, populate_existing=True)
+            return job
+        # Another worker took it between the SELECT and the UPDATE; try the next one.
+
+
+def mark_succeeded(db: Session, job_id: str, attempt: int, result: dict | None) -> bool:
+    """Record the result if this attempt still owns the job; ``False`` means it lost the lease."""
+    finished = db.execute(
+        update(models.Job)
+        .where(
+            models.Job.id == job_id,
+            models.Job.status == JobStatus.RUNNING,
+            models.Job.attempts == attempt,
+        )
+        .values(
+            status=JobStatus.SUCCEEDED,
+            result_json=json.dumps(result or {}),
+            last_error=None,
+            locked_until=None,
+            updated_at=_now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return bool(finished.rowcount)
+
+
+def mark_failed(db: Session, job_id: str, attempt: int, error: str, retry_in: float) -> None:
+    """Requeue the job after ``retry_in`` seconds, or fail it once attempts are used up."""
+    job = db.get(models.Job, job_id, populate_existing=True)
+    if job is None or job.status != JobStatus.RUNNING or job.attempts != attempt:
+        return
+    now = _now()
+    job.last_error = error
+    job.locked_until = None
+    job.updated_at = now
+    if job.attempts >= job.max_attempts:
+        job.status = JobStatus.FAILED
+    else:
+        job.status = JobStatus.QUEUED
+        job.run_after = now + timedelta(seconds=retry_in)
+    db.flush()
+
+
+def requeue_expired(db: Session) -> int:
+    """Return RUNNING jobs whose lease ran out (crashed or stuck worker) to the queue.
+
+    Called on every worker poll, so it first looks for an expired lease with a plain
+    SELECT: an UPDATE takes SQLite's write lock even when it matches no row.
+    """
+    now = _now()
+    has_expired = db.scalar(
+        select(models.Job.id)
+        .where(models.Job.status == JobStatus.RUNNING, models.Job.locked_until < now)
+        .limit(1)
+    )
+    if has_expired is None:
+        return 0
+    expired = db.execute(
+        update(models.Job)
+        .where(models.Job.status == JobStatus.RUNNING, models.Job.locked_until < now)
+        .values(
+            status=case(
+                (models.Job.attempts >= models.Job.max_attempts, JobStatus.FAILED.name),
+                else_=JobStatus.QUEUED.name,
+            ),
+            locked_until=None,
+            last_error="lease expired",
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return expired.rowcount
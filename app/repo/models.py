@@ -4,7 +4,17 @@ from datetime import UTC, datetime
 from enum import Enum
 from typing import List, Optional
 
-from sqlalchemy import DateTime, Enum as SQLEnum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import (
+    DateTime,
+    Enum as SQLEnum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.repo.db import Base
@@ -42,6 +52,13 @@ class QuizType(str, Enum):
     CLOZE = "cloze"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class CEFRLevel(str, Enum):
     A2 = "A2"
     B1 = "B1"
@@ -97,6 +114,23 @@ class Session(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now, nullable=False)
     ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     system_prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    # Rolling summary of the conversation up to ``summary_until`` (see services.summary)
+    # and estimated prompt sizes: what was sent vs. what the full history would cost.
+    summary: Mapped[str | None] = mapped_column(Text)
+    summary_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    summary_turn: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    turn_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    history_tokens: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    prompt_tokens_sent: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    prompt_tokens_full: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
 
     user: Mapped["User"] = relationship(back_populates="sessions")
     topic: Mapped["PracticeTopic"] = relationship(back_populates="sessions")
@@ -111,6 +145,10 @@ class Session(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_session_ts", "session_id", "ts"),
+        Index("ix_messages_ts_id", "ts", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id"), nullable=False)
@@ -126,6 +164,7 @@ class Message(Base):
 
 class ErrorSpan(Base):
     __tablename__ = "error_spans"
+    __table_args__ = (Index("ix_error_spans_message_id", "message_id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     message_id: Mapped[str] = mapped_column(ForeignKey("messages.id"), nullable=False)
@@ -142,6 +181,7 @@ class ErrorSpan(Base):
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    __table_args__ = (Index("ix_quizzes_session_created", "session_id", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id"), nullable=False)
@@ -159,6 +199,7 @@ class Quiz(Base):
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
+    __table_args__ = (Index("ix_quiz_attempts_quiz_created", "quiz_id", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     quiz_id: Mapped[str] = mapped_column(ForeignKey("quizzes.id"), nullable=False)
@@ -173,6 +214,10 @@ class QuizAttempt(Base):
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
+    __table_args__ = (
+        Index("ix_flashcards_due_at_id", "due_at", "id"),
+        Index("ix_flashcards_source_error_id", "source_error_id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     front: Mapped[str] = mapped_column(Text, nullable=False)
@@ -189,6 +234,10 @@ class Flashcard(Base):
 
 class MetricSnapshot(Base):
     __tablename__ = "metric_snapshots"
+    __table_args__ = (
+        Index("ix_metric_snapshots_session_id", "session_id"),
+        Index("ix_metric_snapshots_created_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -201,3 +250,73 @@ class MetricSnapshot(Base):
 
     session: Mapped["Session"] = relationship(back_populates="metric_snapshots")
     user: Mapped["User"] = relationship()
+
+
+class UserAggregate(Base):
+    """Dashboard counters maintained in the same transaction as the events they count."""
+
+    __tablename__ = "user_aggregates"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    study_seconds: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    conversations: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    words_learned: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cards_reviewed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    latest_cefr: Mapped[CEFRLevel | None] = mapped_column(SQLEnum(CEFRLevel))
+    # When ``latest_cefr`` was measured; ``updated_at`` moves with every counter.
+    cefr_updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_now, nullable=False
+    )
+
+
+class UserLearnedWord(Base):
+    """Distinct error texts per user, so ``words_learned`` can be counted incrementally."""
+
+    __tablename__ = "user_learned_words"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    text: Mapped[str] = mapped_column(Text, primary_key=True)
+
+
+class SessionReport(Base):
+    """Materialized ``build_report`` output, keyed by session and builder version."""
+
+    __tablename__ = "session_reports"
+
+    session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id"), primary_key=True)
+    builder_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload_json: Mapped[str] = mapped_column(Text, nullable=False)
+    etag: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_now, nullable=False
+    )
+
+
+class Job(Base):
+    """Background job persisted in the database; see ``app.services.jobs``."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    idempotency_key: Mapped[str | None] = mapped_column(String(128), unique=True)
+    payload_json: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    status: Mapped[JobStatus] = mapped_column(
+        SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_now, nullable=False
+    )
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    result_json: Mapped[str | None] = mapped_column(Text)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_now, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_now, nullable=False
+    )
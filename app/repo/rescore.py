@@ -0,0 +1,231 @@
+"""Re-run error detection over stored user messages and rebuild their error spans.
+
+Usage: ``python -m app.repo.rescore [--chunk-size 500] [--workers 4] [--checkpoint PATH]``
+
+Messages are streamed in keyset-paginated chunks on ``(ts, id)`` (index
+``ix_messages_ts_id``), scored on a process pool and written back one chunk per
+transaction. Message ids are random UUIDs, so paging on ``ts`` first means messages
+written while a run is in progress land after the cursor instead of being skipped.
+After each commit the cursor is written to the checkpoint file, so an interrupted run
+resumes where it stopped; a run that completes deletes the checkpoint, so the next
+one starts from the beginning. Re-applying a chunk is idempotent: spans that still
+match are kept, stale ones are deleted and only new ones are inserted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.repo import models
+from app.repo.aggregates import rebuild_aggregates
+from app.services.evaluation.errors import DetectedError, detect_errors_batch
+from app.services.evaluation.rules import get_catalog
+
+SpanKey = tuple[int, int, models.ErrorCategory, str]
+ChunkResult = list[tuple[str, list[DetectedError]]]
+Cursor = tuple[datetime, str]  # (ts, id) of the last message of a chunk
+
+
+@dataclass(slots=True)
+class RescoreStats:
+    messages: int = 0
+    spans_inserted: int = 0
+    spans_deleted: int = 0
+    resumed_from: str | None = None
+
+
+def _span_key(span: DetectedError | models.ErrorSpan) -> SpanKey:
+    return span.start, span.end, span.category, span.corrected_text
+
+
+def _score_chunk(rows: Sequence[tuple[str, str]]) -> ChunkResult:
+    detected = detect_errors_batch(text for _, text in rows)
+    return [(message_id, errors) for (message_id, _), errors in zip(rows, detected, strict=True)]
+
+
+def iter_user_message_chunks(
+    db: Session, chunk_size: int, after: Cursor | None = None
+) -> Iterator[tuple[Cursor, list[tuple[str, str]]]]:
+    """Yield ``(cursor, [(id, text), ...])`` chunks of user messages ordered by
+    ``(ts, id)`` (keyset pagination); ``cursor`` is the chunk's last message."""
+    cursor = after
+    while True:
+        stmt = (
+            select(models.Message.id, models.Message.text, models.Message.ts)
+            .where(models.Message.role == models.MessageRole.USER)
+            .order_by(models.Message.ts.asc(), models.Message.id.asc())
+            .limit(chunk_size)
+        )
+        if cursor is not None:
+            stmt = stmt.where(tuple_(models.Message.ts, models.Message.id) > tuple_(*cursor))
+        rows = db.execute(stmt).all()
+        if not rows:
+            return
+        cursor = (rows[-1].ts, rows[-1].id)
+        yield cursor, [(row.id, row.text) for row in rows]
+
+
+def apply_chunk(db: Session, results: ChunkResult) -> tuple[int, int]:
+    """Diff freshly detected spans against stored ones and write the difference in bulk."""
+    message_ids = [message_id for message_id, _ in results]
+    existing = db.execute(
+        select(
+            models.ErrorSpan.id,
+            models.ErrorSpan.message_id,
+            models.ErrorSpan.start,
+            models.ErrorSpan.end,
+            models.ErrorSpan.category,
+            models.ErrorSpan.corrected_text,
+        ).where(models.ErrorSpan.message_id.in_(message_ids))
+    ).all()
+    referenced = set(
+        db.scalars(
+            select(models.Flashcard.source_error_id).where(
+                models.Flashcard.source_error_id.in_([row.id for row in existing])
+            )
+        )
+    )
+
+    kept: dict[str, set[SpanKey]] = {}
+    stale_ids: list[str] = []
+    wanted = {message_id: {_span_key(error) for error in errors} for message_id, errors in results}
+    for row in existing:
+        key = _span_key(row)
+        if key in wanted[row.message_id] or row.id in referenced:
+            # Spans backing a flashcard are kept even if the rule no longer fires.
+            kept.setdefault(row.message_id, set()).add(key)
+        else:
+            stale_ids.append(row.id)
+
+    new_rows = [
+        {
+            "message_id": message_id,
+            "start": error.start,
+            "end": error.end,
+            "category": error.category,
+            "user_text": error.user_text,
+            "corrected_text": error.corrected_text,
+            "note": error.note,
+        }
+        for message_id, errors in results
+        for error in errors
+        if _span_key(error) not in kept.get(message_id, set())
+    ]
+    if stale_ids:
+        db.execute(delete(models.ErrorSpan).where(models.ErrorSpan.id.in_(stale_ids)))
+    if new_rows:
+        db.execute(insert(models.ErrorSpan), new_rows)
+    return len(new_rows), len(stale_ids)
+
+
+def _read_checkpoint(path: Path | None, digest: str) -> Cursor | None:
+    if not path or not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    # Checkpoints from another catalog, or from before the (ts, id) cursor, start over.
+    if data.get("catalog_digest") != digest or "last_ts" not in data:
+        return None
+    return datetime.fromisoformat(data["last_ts"]), data["last_message_id"]
+
+
+def _write_checkpoint(path: Path, cursor: Cursor, digest: str, stats: RescoreStats) -> None:
+    payload = {
+        "last_ts": cursor[0].isoformat(),
+        "last_message_id": cursor[1],
+        "catalog_digest": digest,
+        "messages": stats.messages,
+    }
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    os.replace(tmp_name, path)
+
+
+def rescore_messages(
+    session_factory: Callable[[], Session],
+    chunk_size: int = 500,
+    workers: int = 0,
+    checkpoint_path: Path | None = None,
+) -> RescoreStats:
+    """Rebuild error spans for every user message; ``workers=0`` scores inline."""
+    digest = get_catalog().snapshot().digest
+    resume = _read_checkpoint(checkpoint_path, digest)
+    stats = RescoreStats(resumed_from=resume[1] if resume else None)
+    executor: Executor | None = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    max_in_flight = max(1, workers * 2)
+    pending: deque[tuple[Cursor, Future[ChunkResult] | ChunkResult]] = deque()
+
+    def _drain(db: Session, limit: int) -> None:
+        while len(pending) > limit:
+            cursor, job = pending.popleft()
+            results = job.result() if isinstance(job, Future) else job
+            inserted, deleted = apply_chunk(db, results)
+            db.commit()
+            stats.messages += len(results)
+            stats.spans_inserted += inserted
+            stats.spans_deleted += deleted
+            if checkpoint_path:
+                _write_checkpoint(checkpoint_path, cursor, digest, stats)
+
+    db = session_factory()
+    try:
+        for cursor, rows in iter_user_message_chunks(db, chunk_size, resume):
+            if executor is not None:
+                pending.append((cursor, executor.submit(_score_chunk, rows)))
+            else:
+                pending.append((cursor, _score_chunk(rows)))
+            _drain(db, max_in_flight - 1)
+        _drain(db, 0)
+        # words_learned and the stored reports are derived from the spans that were just
+        # rewritten; reports are rebuilt on their next read.
+        rebuild_aggregates(db)
+        db.execute(delete(models.SessionReport))
+        db.commit()
+        if checkpoint_path:
+            checkpoint_path.unlink(missing_ok=True)  # done: the next run starts over
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        db.close()
+    return stats
+
+
+def main(argv: Sequence[str] | None = None) -> int:  # pragma: no cover - manual utility
+    from app.repo.db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild error spans for stored messages.")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", type=Path, default=Path(".rescore_checkpoint.json"))
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+    if args.restart and args.checkpoint.exists():
+        args.checkpoint.unlink()
+
+    stats = rescore_messages(SessionLocal, args.chunk_size, args.workers, args.checkpoint)
+    if stats.resumed_from:
+        print(f"Resumed after message {stats.resumed_from}.")
+    print(
+        f"Rescored {stats.messages} messages: "
+        f"{stats.spans_inserted} spans inserted, {stats.spans_deleted} removed."
+    )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual utility
+    raise SystemExit(main())
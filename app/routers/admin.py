@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.schemas.admin import (
+    BalancerStats,
+    CallMetrics,
+    ProviderHealth,
+    ReplyCacheStats,
+    SingleFlightStats,
+)
+from app.services.llm.balancer import balancer_snapshots
+from app.services.llm.cache import get_reply_cache
+from app.services.llm.resilience import guard_snapshots
+from app.services.llm.singleflight import get_single_flight
+from app.services.voice.pipeline import call_metrics
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/llm-cache", response_model=ReplyCacheStats)
+def llm_cache_stats():
+    cache = get_reply_cache()
+    if cache is None:
+        return ReplyCacheStats(enabled=False)
+    return ReplyCacheStats(enabled=True, **cache.snapshot())
+
+
+@router.delete("/llm-cache", response_model=ReplyCacheStats)
+def clear_llm_cache():
+    cache = get_reply_cache()
+    if cache is None:
+        return ReplyCacheStats(enabled=False)
+    cache.clear()
+    return ReplyCacheStats(enabled=True, **cache.snapshot())
+
+
+@router.get("/llm-single-flight", response_model=SingleFlightStats)
+def llm_single_flight_stats():
+    """Upstream calls started vs. callers that joined one already in flight."""
+    flights = get_single_flight()
+    if flights is None:
+        return SingleFlightStats(enabled=False)
+    return SingleFlightStats(enabled=True, **flights.snapshot())
+
+
+@router.get("/llm-providers", response_model=list[ProviderHealth])
+def llm_provider_health():
+    """Circuit state, concurrency, current timeouts and latencies per provider endpoint."""
+    return [ProviderHealth(**snapshot) for snapshot in guard_snapshots()]
+
+
+@router.get("/llm-endpoints", response_model=list[BalancerStats])
+def llm_endpoint_stats():
+    """Per-endpoint load, EWMA latency and ejections when Ollama has several URLs."""
+    return [BalancerStats(**snapshot) for snapshot in balancer_snapshots()]
+
+
+@router.get("/call-metrics", response_model=CallMetrics)
+def call_metrics_snapshot():
+    """Per-stage latency histograms and queue drop/block counters across voice calls."""
+    return CallMetrics(**call_metrics.snapshot())
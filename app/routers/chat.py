@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 from functools import lru_cache
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.orm import Session
 
 from app.repo import dao, models
-from app.repo.db import get_db
+from app.repo.db import get_async_db
 from app.schemas.chat import ChatMessageRequest, ChatMessageResponse, DetectedErrorSchema
+from app.services import history as history_service, summary as summary_service
 from app.services.evaluation import errors as error_service
+from app.services.jobs import notify_job_worker
 from app.services.llm import registry
+from app.services.llm.balancer import sticky
+from app.services.llm.base import LLMClient
+from app.services.llm.resilience import ProviderUnavailable
+from app.services.llm.singleflight import SingleFlight
 from app.utils.config import get_settings
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
@@ -39,8 +50,13 @@ def _serialize_errors(detected: list[error_service.DetectedError]) -> list[Detec
     ]
 
 
-@router.post("/{session_id}/message", response_model=ChatMessageResponse)
-def send_message(session_id: str, payload: ChatMessageRequest, db: Session = Depends(get_db)):
+def _start_turn(
+    db: Session, session_id: str, payload: ChatMessageRequest
+) -> tuple[models.Session, list[error_service.DetectedError], list[dict[str, str]], LLMClient]:
+    """Validate the session, store the user message and its errors, build the LLM history.
+
+    Runs through ``AsyncSession.run_sync`` so the whole step is one greenlet hop.
+    """
     if not payload.text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
     session = dao.get_session(db, session_id)
@@ -53,16 +69,126 @@ def send_message(session_id: str, payload: ChatMessageRequest, db: Session = Dep
     detected_errors = error_service.detect_errors(payload.text)
     dao.save_error_spans(db, user_message, detected_errors)
 
-    messages = dao.list_session_messages(db, session_id)
     system_prompt = session.system_prompt or _fallback_prompt()
-    history = [{"role": "system", "content": system_prompt}]
-    for msg in messages[-6:]:
-        history.append({"role": msg.role.value, "content": msg.text})
+    history = history_service.assemble(
+        db, session, system_prompt, user_message, config=runtime_config
+    )
+    summary_service.record_prompt(session, history)
 
-    settings_row = dao.get_settings(db)
+    settings_row = dao.get_cached_settings(db)
     llm_client = registry.get_llm(settings_row, config=runtime_config)
-    reply = llm_client.reply(history)
+    return session, detected_errors, history, llm_client
+
+
+def _store_reply(db: Session, session_id: str, reply: str) -> tuple[bool, bool]:
+    """Store the tutor's reply; returns (stored, summary refresh queued)."""
+    session = dao.get_session(db, session_id)
+    if not session:
+        return False, False
+    # Count first so the session's counters are written in the same flush as the reply.
+    queued = summary_service.record_reply(db, session, reply, runtime_config)
     dao.append_message(db, session, models.MessageRole.ASSISTANT, reply)
-    db.commit()
+    return True, queued
+
+
+async def _finish_turn(db: AsyncSession, session_id: str, reply: str) -> None:
+    stored, queued = await db.run_sync(_store_reply, session_id, reply)
+    if not stored:
+        return
+    await db.commit()
+    history_service.record(session_id, models.MessageRole.ASSISTANT, reply)
+    if queued:
+        notify_job_worker()
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event) + "\n"
+
+
+def _turn_key(session_id: str, text: str) -> str:
+    return session_id + "\x00" + " ".join(text.split())
+
+
+# A double submit (or a client retrying while the first request is still running) must
+# not store the user's message twice: identical turns on a session join the one already
+# in flight, from before anything is persisted until the reply has been stored.
+_turns = SingleFlight()
 
+
+async def _run_turn(
+    bind: AsyncEngine, session_id: str, payload: ChatMessageRequest
+) -> ChatMessageResponse:
+    # Its own session: the turn may outlive the request that started it.
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        _, detected_errors, history, llm_client = await db.run_sync(
+            _start_turn, session_id, payload
+        )
+        # Release the SQLite writer before waiting on the LLM; the reply gets its own
+        # short transaction in _finish_turn.
+        await db.commit()
+        history_service.record(session_id, models.MessageRole.USER, payload.text.strip())
+        with sticky(session_id):
+            reply = await llm_client.areply(history)
+        await _finish_turn(db, session_id, reply)
     return ChatMessageResponse(reply=reply, detected_errors=_serialize_errors(detected_errors))
+
+
+async def _turn_events(
+    bind: AsyncEngine, session_id: str, payload: ChatMessageRequest
+) -> AsyncIterator[str]:
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        _, detected_errors, history, llm_client = await db.run_sync(
+            _start_turn, session_id, payload
+        )
+        await db.commit()
+    history_service.record(session_id, models.MessageRole.USER, payload.text.strip())
+    serialized_errors = [err.model_dump() for err in _serialize_errors(detected_errors)]
+    yield _ndjson({"event": "errors", "detected_errors": serialized_errors})
+    parts: list[str] = []
+    try:
+        with sticky(session_id):
+            async for chunk in llm_client.stream_reply(history):
+                parts.append(chunk)
+                yield _ndjson({"event": "token", "text": chunk})
+    except ProviderUnavailable as exc:
+        # The reply broke off after some tokens went out; don't store half of it.
+        yield _ndjson({"event": "error", "detail": f"reply interrupted ({exc.reason})"})
+        return
+    reply = "".join(parts)
+    async with AsyncSession(bind=bind, expire_on_commit=False) as store:
+        await _finish_turn(store, session_id, reply)
+    yield _ndjson({"event": "done", "reply": reply})
+
+
+@router.post("/{session_id}/message", response_model=ChatMessageResponse)
+async def send_message(
+    session_id: str, payload: ChatMessageRequest, db: AsyncSession = Depends(get_async_db)
+):
+    bind = db.bind
+    key = "reply:" + _turn_key(session_id, payload.text)
+    return await _turns.run(key, lambda: _run_turn(bind, session_id, payload))
+
+
+@router.post("/{session_id}/message/stream")
+async def stream_message(
+    session_id: str, payload: ChatMessageRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Same turn as ``send_message`` but streams the reply as NDJSON events.
+
+    Events: ``errors`` (detected spans), one ``token`` per chunk, then ``done`` with the
+    full reply once it has been stored, or ``error`` if the provider failed mid-reply.
+    """
+    bind = db.bind
+    key = "stream:" + _turn_key(session_id, payload.text)
+    events = _turns.stream(key, lambda: _turn_events(bind, session_id, payload))
+    # Pull the ``errors`` event before answering, so a missing or finished session is
+    # still a 404/400 rather than a broken stream.
+    first = await anext(events)
+
+    async def _body():
+        async with aclosing(events):
+            yield first
+            async for event in events:
+                yield event
+
+    return StreamingResponse(_body(), media_type="application/x-ndjson")
@@ -4,13 +4,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.repo import dao
-from app.repo.db import get_db
+from app.repo.db import get_read_db
 from app.schemas.dashboard import DashboardSummary
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
 @router.get("/summary", response_model=DashboardSummary)
-def summary(db: Session = Depends(get_db)):
+def summary(db: Session = Depends(get_read_db)):
     data = dao.get_dashboard_summary(db)
     return DashboardSummary(**data)
@@ -1,24 +1,28 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repo import dao, models
-from app.repo.db import get_db
+from app.repo import async_dao, models
+from app.repo.db import get_async_db, get_async_read_db
 from app.schemas.flashcard import (
+    FlashcardBulkReviewRequest,
+    FlashcardBulkReviewResponse,
     FlashcardManualCreateRequest,
     FlashcardReviewRequest,
     FlashcardReviewResponse,
     FlashcardSchema,
 )
+from app.services import review_session
 from app.services.evaluation import srs
 
 router = APIRouter(prefix="/api/flashcards", tags=["flashcards"])
 
 
 @router.get("/due", response_model=list[FlashcardSchema])
-def due_flashcards(db: Session = Depends(get_db)):
-    cards = dao.list_flashcards_due(db)
+async def due_flashcards(db: AsyncSession = Depends(get_async_read_db)):
+    cards = await async_dao.list_flashcards_due(db)
     return [
         FlashcardSchema(
             id=card.id,
@@ -34,25 +38,56 @@ def due_flashcards(db: Session = Depends(get_db)):
 
 
 @router.post("/{card_id}/review", response_model=FlashcardReviewResponse)
-def review_flashcard(card_id: str, payload: FlashcardReviewRequest, db: Session = Depends(get_db)):
-    card = db.get(models.Flashcard, card_id)
+async def review_flashcard(
+    card_id: str, payload: FlashcardReviewRequest, db: AsyncSession = Depends(get_async_db)
+):
+    card = await db.get(models.Flashcard, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     current_state = srs.CardState(reps=card.reps, interval=card.interval, ease=float(card.ease), due_at=card.due_at)
     next_state = srs.next_review(current_state, payload.quality)
-    dao.update_flashcard_state(db, card, next_state.reps, next_state.interval, next_state.ease, next_state.due_at)
-    db.commit()
+    await async_dao.update_flashcard_state(
+        db, card, next_state.reps, next_state.interval, next_state.ease, next_state.due_at
+    )
+    await db.commit()
     return FlashcardReviewResponse(id=card.id, due_at=card.due_at)
 
 
+def _review_bulk(db: Session, payload: FlashcardBulkReviewRequest) -> FlashcardBulkReviewResponse:
+    grades = [(item.card_id, item.quality) for item in payload.reviews]
+    try:
+        states = review_session.apply_reviews(db, grades)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=f"Flashcards not found: {exc}") from exc
+    return FlashcardBulkReviewResponse(
+        reviewed=len(grades),
+        items=[
+            FlashcardReviewResponse(id=card_id, due_at=due_at)
+            for card_id, (_, _, _, due_at) in states.items()
+        ],
+    )
+
+
+@router.post("/review", response_model=FlashcardBulkReviewResponse)
+async def review_flashcards_bulk(
+    payload: FlashcardBulkReviewRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Apply a whole study session's grades in one transaction (all or nothing)."""
+    response = await db.run_sync(_review_bulk, payload)
+    await db.commit()
+    return response
+
+
 @router.post("/manual", response_model=FlashcardSchema, status_code=201)
-def create_manual_flashcard(payload: FlashcardManualCreateRequest, db: Session = Depends(get_db)):
+async def create_manual_flashcard(
+    payload: FlashcardManualCreateRequest, db: AsyncSession = Depends(get_async_db)
+):
     front = payload.front.strip()
     back = payload.back.strip()
     if not front or not back:
         raise HTTPException(status_code=400, detail="front and back are required")
-    card = dao.create_manual_flashcard(db, front, back)
-    db.commit()
+    card = await async_dao.create_manual_flashcard(db, front, back)
+    await db.commit()
     return FlashcardSchema(
         id=card.id,
         front=card.front,
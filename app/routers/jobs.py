@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repo import async_dao, models
+from app.repo.db import get_async_read_db
+from app.schemas.job import JobStatusResponse
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+_TERMINAL = {models.JobStatus.SUCCEEDED, models.JobStatus.FAILED}
+_POLL_INTERVAL = 0.1
+
+
+def _to_response(job: models.Job) -> JobStatusResponse:
+    return JobStatusResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.value,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        result=json.loads(job.result_json) if job.result_json else None,
+        error=job.last_error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: str,
+    wait: float = Query(
+        default=0.0, ge=0.0, le=30.0, description="Long-poll seconds until the job finishes."
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    deadline = time.monotonic() + wait
+    while True:
+        job = await async_dao.get_job(db, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status in _TERMINAL or time.monotonic() >= deadline:
+            return _to_response(job)
+        # End the read transaction so the next poll sees the worker's commit.
+        await db.rollback()
+        await asyncio.sleep(_POLL_INTERVAL)
@@ -3,12 +3,12 @@ from __future__ import annotations
 import json
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repo import dao, models
-from app.repo.db import get_db
+from app.repo import async_dao, dao, models
+from app.repo.db import get_async_db, get_async_read_db
 from app.schemas.quiz import QuizAnswerRequest, QuizAnswerResponse, QuizItemSchema, QuizListResponse
-from app.services.evaluation import report as report_service
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 
@@ -21,15 +21,15 @@ def _decode_choices(quiz: models.Quiz) -> tuple[list[str], str | None]:
 
 
 def _finalize_report_if_ready(db: Session, session: models.Session) -> bool:
-    if not dao.quizzes_completed(db, session):
+    progress = dao.get_quiz_progress(db, session.id)
+    if not progress.completed:
         return False
-    if dao.session_has_metrics(db, session):
+    # Re-answers after completion change the quiz summary, so the stored report is
+    # refreshed on every answer; the metric snapshot is still recorded only once.
+    report_data = dao.build_session_report(db, session)
+    dao.save_session_report(db, session.id, report_data)
+    if progress.has_metrics:
         return True
-    messages = dao.list_session_messages(db, session.id)
-    errors = dao.list_session_errors(db, session.id)
-    attempts = dao.list_quiz_attempts_by_session(db, session.id)
-    topic_label = session.topic.label if session.topic else session.topic_code
-    report_data = report_service.build_report(topic_label, messages, errors, attempts)
     dao.record_metric_snapshot(
         db,
         session.user,
@@ -43,11 +43,11 @@ def _finalize_report_if_ready(db: Session, session: models.Session) -> bool:
 
 
 @router.get("/by-session/{session_id}", response_model=QuizListResponse)
-def quiz_by_session(session_id: str, db: Session = Depends(get_db)):
-    session = dao.get_session(db, session_id)
+async def quiz_by_session(session_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    session = await async_dao.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    quizzes = dao.list_quizzes_by_session(db, session_id)
+    quizzes = await async_dao.list_quizzes_by_session(db, session_id)
     items: list[QuizItemSchema] = []
     for quiz in quizzes:
         choices, _ = _decode_choices(quiz)
@@ -62,12 +62,12 @@ def quiz_by_session(session_id: str, db: Session = Depends(get_db)):
     return QuizListResponse(items=items)
 
 
-@router.post("/{quiz_id}/answer", response_model=QuizAnswerResponse)
-def answer_quiz(quiz_id: str, payload: QuizAnswerRequest, db: Session = Depends(get_db)):
-    quiz = dao.get_quiz(db, quiz_id)
+def _answer(db: Session, quiz_id: str, payload: QuizAnswerRequest) -> QuizAnswerResponse:
+    quiz = dao.get_quiz(db, quiz_id, with_session=True)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    user = dao.ensure_default_user(db)
+    session = quiz.session
+    user = session.user if session else dao.ensure_default_user(db)
     choice = payload.choice.strip()
     if not choice:
         raise HTTPException(status_code=400, detail="choice is required")
@@ -84,15 +84,22 @@ def answer_quiz(quiz_id: str, payload: QuizAnswerRequest, db: Session = Depends(
                     db, error, error.user_text, error.corrected_text
                 )
 
-    session = dao.get_session(db, quiz.session_id)
     report_ready = False
     if session:
         report_ready = _finalize_report_if_ready(db, session)
 
-    db.commit()
     return QuizAnswerResponse(
         quiz_id=quiz.id,
         is_correct=is_correct,
         flashcard_created=flashcard_created,
         report_ready=report_ready,
     )
+
+
+@router.post("/{quiz_id}/answer", response_model=QuizAnswerResponse)
+async def answer_quiz(
+    quiz_id: str, payload: QuizAnswerRequest, db: AsyncSession = Depends(get_async_db)
+):
+    response = await db.run_sync(_answer, quiz_id, payload)
+    await db.commit()
+    return response
@@ -1,26 +1,55 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.repo import dao
-from app.repo.db import get_db
+from app.repo import dao, models
+from app.repo.db import get_db, get_read_db
 from app.schemas.report import ReportResponse
 from app.services.evaluation import report as report_service
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
-@router.get("/{session_id}", response_model=ReportResponse)
-def get_report(session_id: str, db: Session = Depends(get_db)):
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or f'"{etag}"' in candidates
+
+
+def _materialize(db: Session, session_id: str) -> models.SessionReport:
+    """Build and store the report for sessions that have none or an outdated version."""
     session = dao.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     if not dao.quizzes_completed(db, session):
-        raise HTTPException(status_code=400, detail="Complete all quizzes before viewing the report.")
-    messages = dao.list_session_messages(db, session_id)
-    errors = dao.list_session_errors(db, session_id)
-    attempts = dao.list_quiz_attempts_by_session(db, session_id)
-    topic_label = session.topic.label if session.topic else session.topic_code
-    data = report_service.build_report(topic_label, messages, errors, attempts)
-    return ReportResponse(**data)
+        raise HTTPException(
+            status_code=400, detail="Complete all quizzes before viewing the report."
+        )
+    data = dao.build_session_report(db, session)
+    try:
+        stored = dao.save_session_report(db, session_id, data)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request materialized it first; serve that copy.
+        db.rollback()
+        stored = dao.get_session_report(db, session_id)
+    return stored
+
+
+@router.get("/{session_id}", response_model=ReportResponse)
+def get_report(
+    session_id: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    write_db: Session = Depends(get_db),
+):
+    stored = dao.get_session_report(db, session_id)
+    if stored is None or stored.builder_version != report_service.BUILDER_VERSION:
+        stored = _materialize(write_db, session_id)
+    headers = {"ETag": f'"{stored.etag}"', "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), stored.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=stored.payload_json, media_type="application/json", headers=headers)
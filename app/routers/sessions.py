@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import json
 from functools import lru_cache
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repo import dao, models
-from app.repo.db import get_db
-from app.schemas.session import SessionCreateRequest, SessionFinishResponse, SessionResponse
-from app.services.evaluation import quizgen
+from app.repo import async_dao, dao, jobs as job_repo, models
+from app.repo.db import get_async_db
+from app.schemas.session import (
+    SessionContextResponse,
+    SessionCreateRequest,
+    SessionFinishResponse,
+    SessionResponse,
+)
+from app.services import postsession
+from app.services.jobs import notify_job_worker
+from app.utils.config import get_settings
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
@@ -46,51 +55,82 @@ def _to_response(session: models.Session, topic: models.PracticeTopic) -> Sessio
 
 
 @router.post("", response_model=SessionResponse)
-def create_session(payload: SessionCreateRequest, db: Session = Depends(get_db)):
-    user = dao.ensure_default_user(db)
+async def create_session(payload: SessionCreateRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await async_dao.ensure_default_user(db)
     topic = None
     if payload.topic_code:
         requested_code = payload.topic_code.strip().lower()
-        topic = dao.get_practice_topic_by_code(db, requested_code)
+        topic = await async_dao.get_practice_topic_by_code(db, requested_code)
         if not topic:
             raise HTTPException(status_code=404, detail="Topic not found")
     if not topic:
-        topic = dao.get_random_practice_topic(db)
+        topic = await async_dao.get_random_practice_topic(db)
     if not topic:
         raise HTTPException(status_code=500, detail="No practice topics configured")
     system_prompt = _build_prompt(topic)
-    session = dao.create_session(db, user, topic, system_prompt)
-    db.commit()
-    db.refresh(session)
+    session = await async_dao.create_session(db, user, topic, system_prompt)
+    await db.commit()
+    await db.refresh(session)
     return _to_response(session, topic)
 
 
-@router.post("/{session_id}/finish", response_model=SessionFinishResponse)
-def finish_session(session_id: str, db: Session = Depends(get_db)):
+def _finish_response(job: models.Job | None) -> SessionFinishResponse:
+    if job is None:
+        # Finished before post-session work moved to the job queue.
+        return SessionFinishResponse(quizzes_created=0, flashcards_created=0, report_ready=True)
+    result = json.loads(job.result_json or "{}")
+    return SessionFinishResponse(
+        quizzes_created=result.get("quizzes_created", 0),
+        flashcards_created=result.get("flashcards_created", 0),
+        report_ready=False,
+        job_id=job.id,
+        job_status=job.status.value,
+    )
+
+
+def _finish(db: Session, session_id: str) -> SessionFinishResponse:
     session = dao.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    key = postsession.finish_job_key(session_id)
     if session.status == models.SessionStatus.FINISHED:
-        return SessionFinishResponse(quizzes_created=0, flashcards_created=0, report_ready=True)
-
-    messages = dao.list_session_messages(db, session_id)
-    errors = dao.list_session_errors(db, session_id)
-
-    topic_label = session.topic.label if session.topic else session.topic_code
-    quiz_items = quizgen.generate_quiz(topic_label, errors, messages)
-    dao.create_quizzes(db, session, quiz_items)
-
-    flashcards_created = 0
-    for error in errors:
-        _, created = dao.ensure_flashcard_from_error(db, error, error.user_text, error.corrected_text)
-        if created:
-            flashcards_created += 1
+        return _finish_response(job_repo.get_job_by_key(db, key))
 
     dao.mark_session_finished(db, session)
-    db.commit()
+    job, _ = job_repo.enqueue(
+        db,
+        postsession.FINISH_SESSION,
+        {"session_id": session_id},
+        idempotency_key=key,
+        max_attempts=get_settings().job_max_attempts,
+    )
+    return _finish_response(job)
 
-    return SessionFinishResponse(
-        quizzes_created=len(quiz_items),
-        flashcards_created=flashcards_created,
-        report_ready=False,
+
+@router.post("/{session_id}/finish", response_model=SessionFinishResponse)
+async def finish_session(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Close the session and queue quiz/flashcard generation; poll ``/api/jobs/{job_id}``."""
+    response = await db.run_sync(_finish, session_id)
+    await db.commit()
+    notify_job_worker()
+    return response
+
+
+@router.get("/{session_id}/context", response_model=SessionContextResponse)
+async def session_context(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Current rolling summary and how much prompt the summary + window saved so far."""
+    session = await async_dao.get_session(db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    sent, full = session.prompt_tokens_sent, session.prompt_tokens_full
+    saved = max(full - sent, 0)
+    return SessionContextResponse(
+        session_id=session.id,
+        turns=session.turn_count,
+        summary=session.summary,
+        summary_turn=session.summary_turn,
+        prompt_tokens_sent=sent,
+        prompt_tokens_full=full,
+        tokens_saved=saved,
+        savings_pct=round(100.0 * saved / full, 1) if full else 0.0,
     )
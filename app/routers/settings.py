@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.repo import dao, models
 from app.repo.db import get_db
 from app.schemas.settings import SettingsResponse, SettingsUpdateRequest
+from app.services.llm import registry
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
@@ -27,4 +28,5 @@ def update_settings(payload: SettingsUpdateRequest, db: Session = Depends(get_db
         raise HTTPException(status_code=400, detail="llm_model is required")
     settings = dao.update_settings(db, provider, model_name)
     db.commit()
+    registry.clear_client_cache()
     return SettingsResponse(llm_provider=settings.llm_provider.value, llm_model=settings.llm_model)
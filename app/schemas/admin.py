@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class ReplyCacheStats(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    persistent_hits: int = 0
+    memory_entries: int = 0
+    persistent_entries: int | None = None
+
+
+class SingleFlightStats(BaseModel):
+    enabled: bool
+    leaders: int = 0
+    joined: int = 0
+    cancelled: int = 0
+    abandoned: int = 0
+    failures: int = 0
+    in_flight: int = 0
+
+
+class ProviderHealth(BaseModel):
+    name: str
+    state: str
+    consecutive_failures: int
+    circuit_opened: int
+    in_flight: int
+    queued: int
+    timeout_seconds: dict[str, float]
+    histograms: dict[str, dict[str, Any]]
+    counters: dict[str, int]
+
+
+class EndpointStats(BaseModel):
+    url: str
+    healthy: bool
+    outstanding: int
+    ewma_ms: float | None = None
+    requests: int
+    errors: int
+    ejections: int
+
+
+class BalancerStats(BaseModel):
+    strategy: str
+    sticky_sessions: bool
+    endpoints: list[EndpointStats]
+
+
+class CallMetrics(BaseModel):
+    histograms: dict[str, dict[str, Any]]
+    counters: dict[str, int]
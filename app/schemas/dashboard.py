@@ -9,3 +9,4 @@ class DashboardSummary(BaseModel):
     conversations: int
     fluency_level: str
     due_flashcards: int
+    cards_reviewed: int = 0
@@ -24,6 +24,24 @@ class FlashcardReviewResponse(BaseModel):
     due_at: datetime
 
 
+class FlashcardReviewItem(BaseModel):
+    card_id: str
+    quality: int = Field(ge=0, le=5)
+
+
+class FlashcardBulkReviewRequest(BaseModel):
+    reviews: list[FlashcardReviewItem] = Field(
+        min_length=1,
+        max_length=10_000,
+        description="Grades in the order they were given; a card may appear more than once.",
+    )
+
+
+class FlashcardBulkReviewResponse(BaseModel):
+    reviewed: int
+    items: list[FlashcardReviewResponse]
+
+
 class FlashcardManualCreateRequest(BaseModel):
     front: str = Field(min_length=1)
     back: str = Field(min_length=1)
@@ -27,3 +27,18 @@ class SessionFinishResponse(BaseModel):
     quizzes_created: int
     flashcards_created: int
     report_ready: bool = False
+    job_id: str | None = None
+    job_status: str | None = None
+
+
+class SessionContextResponse(BaseModel):
+    """Rolling summary and estimated prompt sizes (tokens) for a session's chat turns."""
+
+    session_id: str
+    turns: int
+    summary: str | None = None
+    summary_turn: int = 0
+    prompt_tokens_sent: int = 0
+    prompt_tokens_full: int = 0
+    tokens_saved: int = 0
+    savings_pct: float = 0.0
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable
 from dataclasses import dataclass
-from typing import List
 
 from app.repo.models import ErrorCategory
+from app.services.evaluation.matcher import MatchCursor
+from app.services.evaluation.rules import RuleSnapshot, get_catalog
+
+_SENTENCE_END = re.compile(r"[.!?]")
+
+# Regex rules are re-checked at a trigger until the text extends this many characters
+# past it; after that the outcome is final. Catalog regexes must fit in this window.
+REGEX_HORIZON = 64
 
 
 @dataclass(slots=True)
@@ -17,74 +25,282 @@ class DetectedError:
     note: str
 
 
-_PATTERNS = [
-    ("i am agree", "I agree", ErrorCategory.GRAMMAR, "Use 'agree' without the auxiliary verb."),
-    ("peoples", "people", ErrorCategory.VOCAB, "The plural of person is 'people'."),
-    ("more better", "better", ErrorCategory.GRAMMAR, "Comparatives do not take 'more'."),
-]
-
+def _find_pattern_errors(text: str, snapshot: RuleSnapshot | None = None) -> list[DetectedError]:
+    """Scan ``text`` once against every catalog rule.
 
-def _find_pattern_errors(text: str) -> List[DetectedError]:
+    Literal rules keep the historical order (rule by rule, left to right, no overlaps
+    within a rule); regex rules contribute their first match after the literals.
+    """
+    snapshot = snapshot or get_catalog().snapshot()
+    rules = snapshot.rules
     lowered = text.lower()
-    errors: List[DetectedError] = []
-    for pattern, correction, category, note in _PATTERNS:
-        start = 0
-        while True:
-            idx = lowered.find(pattern, start)
-            if idx == -1:
-                break
-            end = idx + len(pattern)
-            errors.append(
-                DetectedError(
-                    start=idx,
-                    end=end,
-                    category=category,
-                    user_text=text[idx:end],
-                    corrected_text=correction,
-                    note=note,
-                )
+    hits: list[tuple[int, int]] = []
+    regex_matches: dict[int, re.Match[str]] = {}
+    for idx, index in snapshot.matcher.finditer(lowered):
+        regex = rules[index].regex
+        if regex is None:
+            hits.append((index, idx))
+        elif index not in regex_matches:
+            match = regex.match(lowered, idx)
+            if match:
+                regex_matches[index] = match
+    hits.sort()
+
+    errors: list[DetectedError] = []
+    last_index, last_end = -1, 0
+    for index, idx in hits:
+        if index == last_index and idx < last_end:
+            continue
+        rule = rules[index]
+        end = idx + len(rule.pattern)
+        errors.append(
+            DetectedError(
+                start=idx,
+                end=end,
+                category=rule.category,
+                user_text=text[idx:end],
+                corrected_text=rule.correction,
+                note=rule.note,
             )
-            start = end
-    year_match = re.search(r"\bi have (\d{1,2}) years\b", lowered)
-    if year_match:
-        idx = year_match.start()
-        age = year_match.group(1)
-        end = year_match.end()
+        )
+        last_index, last_end = index, end
+    for index in sorted(regex_matches):
+        rule = rules[index]
+        match = regex_matches[index]
+        idx, end = match.start(), match.end()
         errors.append(
             DetectedError(
                 start=idx,
                 end=end,
-                category=ErrorCategory.GRAMMAR,
+                category=rule.category,
                 user_text=text[idx:end],
-                corrected_text=f"I am {age} years old",
-                note="Use the verb 'to be' to express age.",
+                corrected_text=rule.correction.format(*match.groups()),
+                note=rule.note,
             )
         )
     return errors
 
 
-def _detect_fluency(text: str) -> List[DetectedError]:
+def _fluency_error(start: int, fragment: str) -> DetectedError:
+    return DetectedError(
+        start=start,
+        end=start + len(fragment),
+        category=ErrorCategory.FLUENCY,
+        user_text=fragment,
+        corrected_text="Combine short sentences for smoother speech.",
+        note="Multiple short utterances detected; try linking ideas.",
+    )
+
+
+def _detect_fluency(text: str) -> list[DetectedError]:
     sentences = [fragment.strip() for fragment in re.split(r"[.!?]", text) if fragment.strip()]
     short_sentences = [s for s in sentences if len(s.split()) <= 3]
     if len(short_sentences) < 2:
         return []
     fragment = short_sentences[0]
-    start = text.find(fragment)
-    end = start + len(fragment)
-    return [
-        DetectedError(
-            start=start,
-            end=end,
-            category=ErrorCategory.FLUENCY,
-            user_text=fragment,
-            corrected_text="Combine short sentences for smoother speech.",
-            note="Multiple short utterances detected; try linking ideas.",
-        )
-    ]
+    return [_fluency_error(text.find(fragment), fragment)]
 
 
-def detect_errors(text: str) -> List[DetectedError]:
+def detect_errors(text: str) -> list[DetectedError]:
     """Return heuristic error spans for the provided sentence."""
     errors = _find_pattern_errors(text)
     errors.extend(_detect_fluency(text))
     return errors
+
+
+def detect_errors_batch(texts: Iterable[str]) -> list[list[DetectedError]]:
+    """Run ``detect_errors`` over many texts against a single catalog snapshot."""
+    snapshot = get_catalog().snapshot()
+    results: list[list[DetectedError]] = []
+    for text in texts:
+        errors = _find_pattern_errors(text, snapshot)
+        errors.extend(_detect_fluency(text))
+        results.append(errors)
+    return results
+
+
+@dataclass(slots=True)
+class ErrorUpdate:
+    """What changed after ``IncrementalDetector.feed``; a changed span is removed + added."""
+
+    added: list[DetectedError]
+    removed: list[DetectedError]
+
+
+def _span_key(error: DetectedError) -> tuple:
+    return (error.start, error.end, error.category, error.corrected_text)
+
+
+class IncrementalDetector:
+    """``detect_errors`` for text that arrives as appended chunks (live transcripts).
+
+    After every ``feed`` the ``errors`` property equals ``detect_errors`` on the text
+    so far, but each call only scans the new chunk: the Aho-Corasick state, the
+    per-rule overlap bookkeeping and the open sentence are carried across chunks, and
+    only a bounded tail of the text is kept for slicing spans and re-checking regex
+    rules. Total work is linear in the input length.
+    """
+
+    def __init__(self, snapshot: RuleSnapshot | None = None, regex_horizon: int = REGEX_HORIZON):
+        self.snapshot = snapshot or get_catalog().snapshot()
+        self.regex_horizon = regex_horizon
+        self._cursor = MatchCursor(self.snapshot.matcher)
+        longest = max((len(rule.pattern) for rule in self.snapshot.rules), default=0)
+        self._keep = max(longest, regex_horizon + 1)
+        self._chunks: list[str] = []
+        self._length = 0
+        self._tail = ""
+        self._tail_lower = ""
+        self._tail_start = 0
+        self._literal: list[tuple[int, int, DetectedError]] = []
+        self._literal_end: dict[int, int] = {}
+        self._regex_pending: dict[int, list[int]] = {}
+        self._regex_current: dict[int, DetectedError] = {}
+        self._regex_settled: set[int] = set()
+        self._open_sentence = ""
+        self._open_is_long = False
+        self._short_sentences = 0
+        self._fluency: DetectedError | None = None
+        self._fluency_active = False
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    @property
+    def length(self) -> int:
+        """Number of characters fed so far."""
+        return self._length
+
+    def continues(self, text: str, full: bool = False) -> bool:
+        """Whether ``text`` starts with the text fed so far.
+
+        Only the retained tail is compared unless ``full`` is set, so the check costs
+        O(tail) rather than O(text) for a live transcript that keeps growing.
+        """
+        if len(text) < self._length:
+            return False
+        if full:
+            return text.startswith(self.text)
+        return text[self._tail_start : self._length] == self._tail
+
+    @property
+    def errors(self) -> list[DetectedError]:
+        """All current spans, in the same order ``detect_errors`` returns them."""
+        errors = [error for _, _, error in sorted(self._literal, key=lambda item: item[:2])]
+        errors.extend(self._regex_current[index] for index in sorted(self._regex_current))
+        if self._fluency_active and self._fluency is not None:
+            errors.append(self._fluency)
+        return errors
+
+    def feed(self, chunk: str) -> ErrorUpdate:
+        update = ErrorUpdate(added=[], removed=[])
+        if not chunk:
+            return update
+        self._chunks.append(chunk)
+        chunk_lower = chunk.lower()
+        buffer = self._tail + chunk
+        buffer_lower = self._tail_lower + chunk_lower
+        self._length += len(chunk)
+
+        rules = self.snapshot.rules
+        for start, index in self._cursor.feed(chunk_lower):
+            rule = rules[index]
+            if rule.regex is not None:
+                if index not in self._regex_settled:
+                    self._regex_pending.setdefault(index, []).append(start)
+                continue
+            if start < self._literal_end.get(index, 0):
+                continue
+            end = start + len(rule.pattern)
+            error = DetectedError(
+                start=start,
+                end=end,
+                category=rule.category,
+                user_text=buffer[start - self._tail_start : end - self._tail_start],
+                corrected_text=rule.correction,
+                note=rule.note,
+            )
+            self._literal_end[index] = end
+            self._literal.append((index, start, error))
+            update.added.append(error)
+
+        for index in list(self._regex_pending):
+            self._recheck_regex(index, buffer, buffer_lower, update)
+        self._track_sentences(chunk, update)
+
+        self._tail = buffer[-self._keep :]
+        self._tail_lower = buffer_lower[-self._keep :]
+        self._tail_start = self._length - len(self._tail)
+        return update
+
+    def _recheck_regex(
+        self, index: int, buffer: str, buffer_lower: str, update: ErrorUpdate
+    ) -> None:
+        rule = self.snapshot.rules[index]
+        pending = self._regex_pending[index]
+        chosen: DetectedError | None = None
+        settled_failures = 0
+        for position in pending:
+            match = rule.regex.match(buffer_lower, position - self._tail_start)
+            settled = position + self.regex_horizon <= self._length
+            if match:
+                start, end = match.start() + self._tail_start, match.end() + self._tail_start
+                chosen = DetectedError(
+                    start=start,
+                    end=end,
+                    category=rule.category,
+                    user_text=buffer[match.start() : match.end()],
+                    corrected_text=rule.correction.format(*match.groups()),
+                    note=rule.note,
+                )
+                if settled:
+                    self._regex_settled.add(index)
+                break
+            if settled:
+                # Settled triggers form a prefix of ``pending`` (positions only grow).
+                settled_failures += 1
+        if index in self._regex_settled:
+            del self._regex_pending[index]
+        else:
+            del pending[:settled_failures]
+            if not pending:
+                del self._regex_pending[index]
+
+        previous = self._regex_current.get(index)
+        if previous is not None and chosen is not None and _span_key(previous) == _span_key(chosen):
+            return
+        if previous is not None:
+            update.removed.append(previous)
+            del self._regex_current[index]
+        if chosen is not None:
+            self._regex_current[index] = chosen
+            update.added.append(chosen)
+
+    def _track_sentences(self, chunk: str, update: ErrorUpdate) -> None:
+        pieces = _SENTENCE_END.split(chunk)
+        for closed, piece in enumerate(pieces):
+            if closed:
+                self._close_sentence()
+            if not self._open_is_long:
+                self._open_sentence += piece
+                if len(self._open_sentence.split()) > 3:
+                    self._open_is_long, self._open_sentence = True, ""
+
+        open_short = not self._open_is_long and bool(self._open_sentence.strip())
+        active = self._short_sentences + open_short >= 2
+        if active != self._fluency_active and self._fluency is not None:
+            (update.added if active else update.removed).append(self._fluency)
+        self._fluency_active = active
+
+    def _close_sentence(self) -> None:
+        fragment = self._open_sentence.strip()
+        if fragment and not self._open_is_long:
+            self._short_sentences += 1
+            if self._fluency is None:
+                # The first short sentence's first occurrence can only be at or before
+                # the sentence itself, so it is fixed from now on.
+                self._fluency = _fluency_error(self.text.find(fragment), fragment)
+        self._open_sentence, self._open_is_long = "", False
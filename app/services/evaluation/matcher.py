@@ -0,0 +1,112 @@
+"""Multi-pattern literal matcher (Aho-Corasick) used by the error heuristics."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator, Sequence
+
+
+class PatternMatcher:
+    """Find every occurrence of a fixed set of literal patterns in a single scan.
+
+    The automaton is built once from the pattern list; ``finditer`` then walks the
+    text one character at a time, so the cost is linear in the text length plus the
+    number of matches, independent of how many patterns were compiled.
+    """
+
+    __slots__ = ("patterns", "_goto", "_fail", "_out")
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns: tuple[str, ...] = tuple(patterns)
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("patterns must be non-empty strings")
+            node = 0
+            for char in pattern:
+                nxt = goto[node].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][char] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = out[node] + (index,)
+
+        fail = [0] * len(goto)
+        queue: deque[int] = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield ``(start, pattern_index)`` for every (possibly overlapping) match.
+
+        Matches are produced in order of their end offset.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        patterns = self.patterns
+        root = goto[0]
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0) if node else root.get(char, 0)
+            if out[node]:
+                end = pos + 1
+                for index in out[node]:
+                    yield end - len(patterns[index]), index
+
+
+class MatchCursor:
+    """Resumable ``finditer``: feed text in pieces and keep the automaton state between them.
+
+    Matches that straddle a chunk boundary are reported when their last character
+    arrives, with ``start`` as an absolute offset into the concatenated input.
+    """
+
+    __slots__ = ("matcher", "node", "offset")
+
+    def __init__(self, matcher: PatternMatcher):
+        self.matcher = matcher
+        self.node = 0
+        self.offset = 0
+
+    def feed(self, chunk: str) -> list[tuple[int, int]]:
+        """Return ``(start, pattern_index)`` for matches ending inside ``chunk``."""
+        goto = self.matcher._goto
+        fail = self.matcher._fail
+        out = self.matcher._out
+        patterns = self.matcher.patterns
+        root = goto[0]
+        node = self.node
+        found: list[tuple[int, int]] = []
+        for pos, char in enumerate(chunk, start=self.offset):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0) if node else root.get(char, 0)
+            if out[node]:
+                end = pos + 1
+                for index in out[node]:
+                    found.append((end - len(patterns[index]), index))
+        self.node = node
+        self.offset += len(chunk)
+        return found
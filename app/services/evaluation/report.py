@@ -5,6 +5,10 @@ from typing import Sequence
 
 from app.repo.models import CEFRLevel, ErrorSpan, Message, MessageRole, QuizAttempt
 
+# Bump whenever ``build_report`` output changes; stored reports from older versions are
+# rebuilt on their next read.
+BUILDER_VERSION = 1
+
 
 def _is_user_message(message: Message) -> bool:
     if isinstance(message.role, MessageRole):
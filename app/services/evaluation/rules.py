@@ -0,0 +1,150 @@
+"""On-disk error-rule catalog compiled into immutable, hot-swappable matcher snapshots."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from app.repo.models import ErrorCategory
+from app.services.evaluation.matcher import PatternMatcher
+from app.utils.config import get_settings
+from app.utils.logger import get_logger
+
+ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_CATALOG_PATH = ROOT / "rules" / "error_rules.json"
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """A literal rule, or a regex rule anchored at a literal ``pattern`` trigger.
+
+    Regex rules report only their first match and format ``correction`` with the
+    match groups (``"I am {0} years old"``).
+    """
+
+    pattern: str
+    correction: str
+    category: ErrorCategory
+    note: str
+    regex: re.Pattern[str] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RuleSnapshot:
+    version: int
+    digest: str
+    rules: tuple[Rule, ...]
+    matcher: PatternMatcher
+
+
+def _parse_rules(data: dict) -> tuple[int, tuple[Rule, ...]]:
+    version = int(data.get("version", 0))
+    rules: list[Rule] = []
+    for entry in data.get("rules", []):
+        rules.append(
+            Rule(
+                pattern=entry["pattern"].lower(),
+                correction=entry["correction"],
+                category=ErrorCategory(entry["category"]),
+                note=entry["note"],
+            )
+        )
+    for entry in data.get("regex_rules", []):
+        rules.append(
+            Rule(
+                pattern=entry["trigger"].lower(),
+                correction=entry["correction"],
+                category=ErrorCategory(entry["category"]),
+                note=entry["note"],
+                regex=re.compile(entry["regex"]),
+            )
+        )
+    return version, tuple(rules)
+
+
+def compile_rules(rules: Sequence[Rule], version: int = 0, digest: str = "") -> RuleSnapshot:
+    matcher = PatternMatcher([rule.pattern for rule in rules])
+    return RuleSnapshot(version=version, digest=digest, rules=tuple(rules), matcher=matcher)
+
+
+def load_snapshot(path: Path) -> RuleSnapshot:
+    """Parse and compile a catalog file; ``digest`` identifies its content."""
+    raw = path.read_bytes()
+    version, rules = _parse_rules(json.loads(raw))
+    return compile_rules(rules, version=version, digest=hashlib.sha256(raw).hexdigest())
+
+
+class RuleCatalog:
+    """Holds the current snapshot and swaps in a recompiled one when the file changes.
+
+    Readers grab ``snapshot()`` once and keep using it, so a reload never blocks or
+    mutates a scan in progress; recompilation runs on a background thread.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._snapshot = load_snapshot(self.path)
+        self._next_check = time.monotonic() + poll_interval
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self) -> RuleSnapshot:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.poll_interval
+            stamp = self._file_stamp()
+            changed = stamp is not None and stamp != self._stamp
+            if changed and self._reload_lock.acquire(blocking=False):
+                threading.Thread(target=self._reload_locked, args=(stamp,), daemon=True).start()
+        return self._snapshot
+
+    def reload(self) -> RuleSnapshot:
+        """Recompile synchronously (used by tests and admin tooling)."""
+        with self._reload_lock:
+            self._swap(self._file_stamp())
+        return self._snapshot
+
+    def _reload_locked(self, stamp: tuple[int, int] | None) -> None:
+        try:
+            self._swap(stamp)
+        finally:
+            self._reload_lock.release()
+
+    def _swap(self, stamp: tuple[int, int] | None) -> None:
+        try:
+            snapshot = load_snapshot(self.path)
+        except (OSError, ValueError, KeyError, re.error) as exc:
+            logger.warning(
+                "Keeping rule catalog v%s: reload failed (%s)", self._snapshot.version, exc
+            )
+            self._stamp = stamp
+            return
+        self._stamp = stamp
+        self._snapshot = snapshot
+        logger.info(
+            "Loaded error-rule catalog v%s (%s rules)", snapshot.version, len(snapshot.rules)
+        )
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> RuleCatalog:
+    cfg = get_settings()
+    path = Path(cfg.error_rules_path) if cfg.error_rules_path else DEFAULT_CATALOG_PATH
+    return RuleCatalog(path, poll_interval=cfg.error_rules_reload_interval)
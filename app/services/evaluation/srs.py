@@ -12,7 +12,7 @@ class CardState:
     due_at: datetime
 
 
-def next_review(state: CardState, quality: int) -> CardState:
+def next_review(state: CardState, quality: int, now: datetime | None = None) -> CardState:
     quality = max(0, min(5, quality))
     ease = state.ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
     ease = max(1.3, ease)
@@ -27,5 +27,5 @@ def next_review(state: CardState, quality: int) -> CardState:
             interval = 6
         else:
             interval = int(round(state.interval * ease)) or 1
-    due_at = datetime.now(tz=UTC) + timedelta(days=interval)
+    due_at = (now or datetime.now(tz=UTC)) + timedelta(days=interval)
     return CardState(reps=reps, interval=interval, ease=ease, due_at=due_at)
@@ -0,0 +1,106 @@
+"""NumPy version of ``srs.next_review`` for scheduling many cards in one call.
+
+Every step mirrors the scalar arithmetic operation for operation (float64, and
+``np.rint`` rounds half to even like ``round``), so both produce identical states.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+_MICROSECONDS_PER_DAY = 86_400 * 1_000_000
+
+# Ease delta per clamped quality 0..5, computed with the scalar formula itself.
+_EASE_DELTA = np.array(
+    [0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02) for quality in range(6)],
+    dtype=np.float64,
+)
+
+
+@dataclass(slots=True)
+class BatchState:
+    reps: NDArray[np.int64]
+    interval: NDArray[np.int64]
+    ease: NDArray[np.float64]
+    due_at: NDArray[np.datetime64]
+
+    def __len__(self) -> int:
+        return len(self.reps)
+
+    def due_datetimes(self) -> list[datetime]:
+        """``due_at`` as aware UTC datetimes, ready for the ORM."""
+        return [value.replace(tzinfo=UTC) for value in self.due_at.astype(datetime)]
+
+
+def next_review_batch(
+    reps: ArrayLike,
+    interval: ArrayLike,
+    ease: ArrayLike,
+    quality: ArrayLike,
+    now: datetime | None = None,
+) -> BatchState:
+    """Apply one grade per card; all arrays must have the same length."""
+    reps = np.asarray(reps, dtype=np.int64)
+    interval = np.asarray(interval, dtype=np.int64)
+    ease = np.asarray(ease, dtype=np.float64)
+    quality = np.clip(np.asarray(quality, dtype=np.int64), 0, 5)
+    if not reps.shape == interval.shape == ease.shape == quality.shape:
+        raise ValueError("reps, interval, ease and quality must have the same shape")
+
+    new_ease = np.maximum(1.3, ease + _EASE_DELTA[quality])
+    passed = quality >= 3
+    new_reps = np.where(passed, reps + 1, 0)
+    grown = np.rint(interval * new_ease).astype(np.int64)
+    grown[grown == 0] = 1
+    new_interval = np.select([~passed | (new_reps == 1), new_reps == 2], [1, 6], default=grown)
+
+    moment = (now or datetime.now(tz=UTC)).astimezone(UTC).replace(tzinfo=None)
+    due_at = np.datetime64(moment, "us") + new_interval * np.timedelta64(
+        _MICROSECONDS_PER_DAY, "us"
+    )
+    return BatchState(reps=new_reps, interval=new_interval, ease=new_ease, due_at=due_at)
+
+
+def review_sequence(
+    states: dict[str, tuple[int, int, float]],
+    grades: list[tuple[str, int]],
+    now: datetime | None = None,
+) -> dict[str, tuple[int, int, float, datetime]]:
+    """Apply ``grades`` in order to ``states`` (card id -> reps, interval, ease).
+
+    A card graded several times (relearning within one study session) gets one batch
+    pass per repetition, so the outcome equals calling ``next_review`` in order.
+    """
+    now = now or datetime.now(tz=UTC)
+    current = {card_id: (*state, now) for card_id, state in states.items()}
+    rounds: list[list[tuple[str, int]]] = []
+    seen: dict[str, int] = {}
+    for card_id, quality in grades:
+        index = seen.get(card_id, 0)
+        seen[card_id] = index + 1
+        if index == len(rounds):
+            rounds.append([])
+        rounds[index].append((card_id, quality))
+
+    for batch in rounds:
+        ids = [card_id for card_id, _ in batch]
+        result = next_review_batch(
+            [current[card_id][0] for card_id in ids],
+            [current[card_id][1] for card_id in ids],
+            [current[card_id][2] for card_id in ids],
+            [quality for _, quality in batch],
+            now,
+        )
+        due_at = result.due_datetimes()
+        for position, card_id in enumerate(ids):
+            current[card_id] = (
+                int(result.reps[position]),
+                int(result.interval[position]),
+                float(result.ease[position]),
+                due_at[position],
+            )
+    return {card_id: current[card_id] for card_id in seen}
@@ -0,0 +1,167 @@
+"""Assembling the message list sent to the LLM for a chat turn.
+
+Every turn used to load the whole session and slice the last messages in Python. Now
+the recent turns come from a per-session ring buffer kept in process memory; a cold
+session is loaded once with a ``LIMIT`` query. The window is then trimmed to a token
+budget (estimated locally, no tokenizer), so a long session costs constant DB I/O and
+a bounded upstream payload.
+
+The buffer is per process and only learns about turns through ``record``, which the
+chat router calls after each commit. With several workers serving the same session,
+keep the window small or set ``HISTORY_CACHE_SESSIONS=0`` to always read the database.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy.orm import Session
+
+from app.repo import dao, models
+from app.services.llm.base import HistoryMessage
+from app.utils.config import Settings, get_settings
+
+# Role/separator tokens every chat message costs on top of its text.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the conversation so far: "
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: about four characters per token for English text."""
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+@lru_cache(maxsize=64)
+def _prompt_tokens(prompt: str) -> int:
+    # System prompts repeat on every turn of a session; estimate each one once.
+    return estimate_tokens(prompt)
+
+
+@dataclass(slots=True, frozen=True)
+class Turn:
+    role: str
+    content: str
+    tokens: int
+
+    @classmethod
+    def of(cls, role: models.MessageRole | str, content: str) -> Turn:
+        role = role.value if isinstance(role, models.MessageRole) else role
+        return cls(role, content, estimate_tokens(content))
+
+    def message(self) -> HistoryMessage:
+        return {"role": self.role, "content": self.content}
+
+
+class HistoryBuffer:
+    """Ring buffer of recent turns per session, least recently used sessions evicted."""
+
+    def __init__(self, window: int, max_sessions: int):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, deque[Turn]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> list[Turn] | None:
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(turns)
+
+    def load(self, session_id: str, turns: list[Turn]) -> None:
+        if self.max_sessions <= 0:
+            return
+        with self._lock:
+            self._sessions[session_id] = deque(turns, maxlen=self.window)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def append(self, session_id: str, turn: Turn) -> None:
+        """Add a committed turn; a session that is not buffered is left cold."""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is not None:
+                turns.append(turn)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+@lru_cache(maxsize=1)
+def get_history_buffer() -> HistoryBuffer:
+    cfg = get_settings()
+    return HistoryBuffer(cfg.history_window, cfg.history_cache_sessions)
+
+
+def fit_to_budget(system: Turn, turns: list[Turn], budget: int) -> list[Turn]:
+    """Drop the oldest turns until everything fits in ``budget`` tokens.
+
+    The system prompt and the newest turn (the user's message) are always kept, even
+    when they alone exceed the budget.
+    """
+    if not turns:
+        return []
+    used = system.tokens + turns[-1].tokens
+    kept = 1
+    for turn in reversed(turns[:-1]):
+        if used + turn.tokens > budget:
+            break
+        used += turn.tokens
+        kept += 1
+    return turns[-kept:]
+
+
+def _previous_turns(
+    db: Session, session_id: str, current: models.Message, buffer: HistoryBuffer
+) -> list[Turn]:
+    turns = buffer.get(session_id)
+    if turns is not None:
+        return turns
+    # ``current`` is flushed but not committed yet, so it is not part of the buffer.
+    rows = dao.list_recent_messages(db, session_id, buffer.window + 1)
+    turns = [Turn.of(row.role, row.text) for row in rows if row.id != current.id]
+    turns = turns[-buffer.window :]
+    buffer.load(session_id, turns)
+    return turns
+
+
+def assemble(
+    db: Session,
+    session: models.Session,
+    system_prompt: str,
+    current: models.Message,
+    config: Settings | None = None,
+    buffer: HistoryBuffer | None = None,
+) -> list[HistoryMessage]:
+    """System prompt, the rolling summary (if any) and the recent turns ending with
+    ``current``, within the budget."""
+    cfg = config or get_settings()
+    buffer = buffer or get_history_buffer()
+    previous = _previous_turns(db, session.id, current, buffer)
+    keep = max(cfg.history_window - 1, 0)
+    window = [*(previous[-keep:] if keep else []), Turn.of(current.role, current.text)]
+    prefix = [Turn("system", system_prompt, _prompt_tokens(system_prompt))]
+    if session.summary:
+        prefix.append(Turn.of("system", f"{SUMMARY_PREFIX}{session.summary}"))
+    fixed = Turn("system", "", sum(turn.tokens for turn in prefix))
+    kept = fit_to_budget(fixed, window, cfg.history_token_budget)
+    return [*(turn.message() for turn in prefix), *(turn.message() for turn in kept)]
+
+
+def record(session_id: str, role: models.MessageRole, text: str) -> None:
+    """Append a committed message to the session's buffer (no-op while it is cold)."""
+    get_history_buffer().append(session_id, Turn.of(role, text))
@@ -0,0 +1,162 @@
+"""In-process worker pool for jobs persisted in the ``jobs`` table (no external broker).
+
+Handlers are registered per job kind with ``@register("kind")`` and receive a DB
+session plus the decoded payload. The handler's writes and the job's SUCCEEDED
+status commit in the same transaction, so a retried job never sees half of a
+previous attempt.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.repo import jobs as job_repo
+from app.utils.config import Settings, get_settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JobHandler = Callable[[Session, dict[str, Any]], dict[str, Any] | None]
+SessionFactory = Callable[[], Session]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def register(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+def retry_delay(attempt: int, base: float = 2.0, cap: float = 300.0) -> float:
+    return min(cap, base * 2 ** (attempt - 1))
+
+
+def run_next(
+    session_factory: SessionFactory, lease_seconds: float = 60.0, retry_base: float = 2.0
+) -> bool:
+    """Claim and run one job; returns ``False`` when nothing was runnable."""
+    with session_factory() as db:
+        job_repo.requeue_expired(db)
+        job = job_repo.claim_next(db, lease_seconds)
+        db.commit()
+        if job is None:
+            return False
+        job_id, kind, attempt = job.id, job.kind, job.attempts
+        payload = json.loads(job.payload_json or "{}")
+
+    handler = _handlers.get(kind)
+    with session_factory() as db:
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for job kind {kind!r}")
+            result = handler(db, payload)
+            if job_repo.mark_succeeded(db, job_id, attempt, result):
+                db.commit()
+                return True
+            logger.warning("Job %s lost its lease; discarding attempt %s", job_id, attempt)
+            db.rollback()
+            return True
+        except Exception as exc:  # noqa: BLE001 - any handler failure is retried
+            db.rollback()
+            logger.warning("Job %s (%s) attempt %s failed: %s", job_id, kind, attempt, exc)
+            job_repo.mark_failed(db, job_id, attempt, repr(exc), retry_delay(attempt, retry_base))
+            db.commit()
+            return True
+
+
+def run_pending(session_factory: SessionFactory, lease_seconds: float = 60.0) -> int:
+    """Drain every runnable job on the calling thread (CLI, tests)."""
+    processed = 0
+    while run_next(session_factory, lease_seconds):
+        processed += 1
+    return processed
+
+
+class JobWorker:
+    """Pool of daemon threads that poll the queue; ``notify()`` wakes them early."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+        retry_base: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = run_next(self.session_factory, self.lease_seconds, self.retry_base)
+            except Exception:  # noqa: BLE001 - keep the worker alive on DB hiccups
+                logger.exception("Job worker iteration failed")
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+_worker: JobWorker | None = None
+
+
+def start_job_worker(
+    session_factory: SessionFactory, config: Settings | None = None
+) -> JobWorker | None:
+    """Start the process-wide worker pool; called from the app lifespan."""
+    global _worker
+    cfg = config or get_settings()
+    if cfg.job_workers <= 0:
+        return None
+    _worker = JobWorker(
+        session_factory,
+        workers=cfg.job_workers,
+        poll_interval=cfg.job_poll_interval,
+        lease_seconds=cfg.job_lease_seconds,
+    )
+    _worker.start()
+    return _worker
+
+
+def stop_job_worker() -> None:
+    global _worker
+    worker, _worker = _worker, None
+    if worker is not None:
+        worker.stop()
+
+
+def notify_job_worker() -> None:
+    """Wake idle workers after a job was committed."""
+    if _worker is not None:
+        _worker.notify()
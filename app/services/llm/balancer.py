@@ -0,0 +1,390 @@
+"""Spread Ollama traffic over several endpoints.
+
+``OLLAMA_BASE_URL`` may list several comma-separated URLs. Each call then picks one:
+
+- ``least_outstanding``: the endpoint with the fewest calls in progress;
+- ``ewma`` (default): lowest ``EWMA latency * (outstanding + 1)``. The latency penalty
+  halves every ``EWMA_HALF_LIFE`` seconds without a new sample, so an endpoint that
+  was slow gets traffic again later instead of being starved forever;
+- ``round_robin``: in turn, ignoring load (the baseline in ``tools/bench_llm_balancer.py``).
+
+With ``OLLAMA_STICKY_SESSIONS=true`` a call made under ``sticky(session_id)`` goes to
+the same endpoint every time (rendezvous hashing over the healthy endpoints), so the
+model's KV cache for that conversation stays warm there; a session only moves when
+its endpoint is ejected.
+
+An endpoint is ejected for ``OLLAMA_EJECT_SECONDS`` after ``OLLAMA_EJECT_FAILURES``
+consecutive failed calls or one failed background health check (``GET /api/tags``
+every ``OLLAMA_HEALTH_INTERVAL`` seconds); a passing health check brings it back
+early. A failed call is retried once on another endpoint when nothing was streamed
+yet. If every endpoint is ejected, all of them are used again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.llm.cache import OFFLINE_PREFIX
+from app.services.llm.pool import get_http_pool
+from app.utils.config import Settings, get_settings
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.services.llm.pool import HTTPClientPool
+
+logger = get_logger(__name__)
+
+EWMA_ALPHA = 0.3
+EWMA_HALF_LIFE = 10.0
+MAX_ATTEMPTS = 2
+
+route_key: ContextVar[str | None] = ContextVar("llm_route_key", default=None)
+
+
+@contextmanager
+def sticky(key: str | None) -> Iterator[None]:
+    """Route LLM calls made in this block (and tasks started from it) by ``key``."""
+    token = route_key.set(key)
+    try:
+        yield
+    finally:
+        route_key.reset(token)
+
+
+def parse_endpoints(value: str) -> list[str]:
+    urls = [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+    return list(dict.fromkeys(urls))
+
+
+@dataclass(eq=False)
+class Endpoint:
+    url: str
+    outstanding: int = 0
+    ewma_ms: float | None = None
+    sampled_at: float = 0.0
+    failures: int = 0  # consecutive
+    ejected_until: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    ejections: int = 0
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.ejected_until <= now,
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma_ms, 3) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+        }
+
+
+class EndpointBalancer:
+    """Endpoint choice, load/latency tracking, ejection and health checks."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        strategy: str = "ewma",
+        sticky_sessions: bool = False,
+        eject_failures: int = 3,
+        eject_seconds: float = 30.0,
+        health_interval: float = 10.0,
+        pool: HTTPClientPool | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not urls:
+            raise ValueError("at least one endpoint is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.strategy = strategy
+        self.sticky_sessions = sticky_sessions
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.pool = pool
+        self.clock = clock
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._health_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, config: Settings | None = None) -> EndpointBalancer:
+        cfg = config or get_settings()
+        return cls(
+            parse_endpoints(cfg.ollama_base_url),
+            strategy=cfg.ollama_balancer,
+            sticky_sessions=cfg.ollama_sticky_sessions,
+            eject_failures=cfg.ollama_eject_failures,
+            eject_seconds=cfg.ollama_eject_seconds,
+            health_interval=cfg.ollama_health_interval,
+        )
+
+    def _score(self, endpoint: Endpoint, now: float) -> float:
+        if endpoint.ewma_ms is None:
+            return 0.0  # unknown endpoints are tried first
+        decay = 0.5 ** ((now - endpoint.sampled_at) / EWMA_HALF_LIFE)
+        return endpoint.ewma_ms * decay * (endpoint.outstanding + 1)
+
+    def pick(self, key: str | None = None, exclude: Sequence[Endpoint] = ()) -> Endpoint | None:
+        """The endpoint for the next call; ``None`` when every candidate is excluded."""
+        now = self.clock()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude]
+            healthy = [e for e in candidates if e.ejected_until <= now]
+            if not healthy:
+                # Retries only go to healthy endpoints; first attempts use them all.
+                healthy = [] if exclude else candidates
+            if not healthy:
+                return None
+            if key is not None and self.sticky_sessions:
+                return max(healthy, key=lambda e: hashlib.sha1(f"{key}|{e.url}".encode()).digest())
+            turn = next(self._turn)
+            # Rotating the order makes ties go round robin instead of to the first URL.
+            start = turn % len(healthy)
+            ordered = healthy[start:] + healthy[:start]
+            if self.strategy == "round_robin":
+                return ordered[0]
+            if self.strategy == "least_outstanding":
+                return min(ordered, key=lambda e: e.outstanding)
+            return min(ordered, key=lambda e: self._score(e, now))
+
+    def _sample(self, endpoint: Endpoint, seconds: float) -> None:
+        value_ms = seconds * 1000.0
+        with self._lock:
+            if endpoint.ewma_ms is None:
+                endpoint.ewma_ms = value_ms
+            else:
+                endpoint.ewma_ms += EWMA_ALPHA * (value_ms - endpoint.ewma_ms)
+            endpoint.sampled_at = self.clock()
+            endpoint.failures = 0
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        # Called with the lock held.
+        if endpoint.ejected_until <= self.clock():
+            endpoint.ejections += 1
+            logger.warning("Ejecting LLM endpoint %s (%s)", endpoint.url, reason)
+        endpoint.ejected_until = self.clock() + self.eject_seconds
+
+    def _fail(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if self.eject_failures > 0 and endpoint.failures >= self.eject_failures:
+                self._eject(endpoint, f"{endpoint.failures} failed calls")
+
+    @contextmanager
+    def track(self, endpoint: Endpoint) -> Iterator[Attempt]:
+        """Count a call as outstanding on ``endpoint`` and record how it went.
+
+        A call that is cancelled still contributes its elapsed time (a lower bound),
+        so an endpoint that hangs gets a worse score.
+        """
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        attempt = Attempt(self, endpoint)
+        try:
+            yield attempt
+        except (asyncio.CancelledError, GeneratorExit):
+            attempt.first_token()
+            raise
+        except BaseException:
+            attempt.fail()
+            raise
+        else:
+            attempt.first_token()
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+
+    def ensure_health_checks(self) -> None:
+        """Start the background health checks on the running loop, once."""
+        if self.health_interval <= 0 or len(self.endpoints) < 2:
+            return
+        task = self._health_task
+        loop = asyncio.get_running_loop()
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        http = (self.pool or get_http_pool()).get(endpoint.url)
+        try:
+            response = await http.get(
+                f"{endpoint.url}/api/tags", timeout=min(self.health_interval or 5.0, 5.0)
+            )
+            response.raise_for_status()
+        except Exception as exc:
+            with self._lock:
+                self._eject(endpoint, f"health check: {exc!r}")
+            return
+        with self._lock:
+            endpoint.ejected_until = 0.0
+            endpoint.failures = 0
+
+    async def aclose(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> dict:
+        now = self.clock()
+        with self._lock:
+            endpoints = [endpoint.snapshot(now) for endpoint in self.endpoints]
+        return {
+            "strategy": self.strategy,
+            "sticky_sessions": self.sticky_sessions,
+            "endpoints": endpoints,
+        }
+
+
+class Attempt:
+    """One call on one endpoint, as seen by ``EndpointBalancer.track``."""
+
+    __slots__ = ("balancer", "endpoint", "started", "done")
+
+    def __init__(self, balancer: EndpointBalancer, endpoint: Endpoint):
+        self.balancer = balancer
+        self.endpoint = endpoint
+        self.started = perf_counter()
+        self.done = False
+
+    def first_token(self) -> None:
+        """Record the latency so far (once); streams call it on their first chunk."""
+        if not self.done:
+            self.done = True
+            self.balancer._sample(self.endpoint, perf_counter() - self.started)
+
+    def fail(self) -> None:
+        if not self.done:
+            self.done = True
+            self.balancer._fail(self.endpoint)
+
+
+class BalancedOllamaClient(LLMClient):
+    """``OllamaClient`` per endpoint, with the endpoint chosen by ``balancer`` per call."""
+
+    def __init__(self, balancer: EndpointBalancer, model: str):
+        from app.services.llm.ollama import OllamaClient  # imports httpx
+
+        self.balancer = balancer
+        self.model = model
+        pool = balancer.pool
+        self.clients = {
+            endpoint.url: OllamaClient(
+                endpoint.url, model, http=pool.get(endpoint.url) if pool else None
+            )
+            for endpoint in balancer.endpoints
+        }
+
+    def reply(self, history: list[HistoryMessage]) -> str:
+        value, tried = "", []
+        for _ in range(MAX_ATTEMPTS):
+            endpoint = self.balancer.pick(route_key.get(), exclude=tried)
+            if endpoint is None:
+                break
+            with self.balancer.track(endpoint) as attempt:
+                value = self.clients[endpoint.url].reply(history)
+                if not value.startswith(OFFLINE_PREFIX):
+                    return value
+                attempt.fail()
+            tried.append(endpoint)
+        return value
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        self.balancer.ensure_health_checks()
+        value, tried = "", []
+        for _ in range(MAX_ATTEMPTS):
+            endpoint = self.balancer.pick(route_key.get(), exclude=tried)
+            if endpoint is None:
+                break
+            with self.balancer.track(endpoint) as attempt:
+                value = await self.clients[endpoint.url].areply(history)
+                if not value.startswith(OFFLINE_PREFIX):
+                    return value
+                attempt.fail()
+            tried.append(endpoint)
+        return value
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        self.balancer.ensure_health_checks()
+        tried: list[Endpoint] = []
+        first = ""
+        for _ in range(MAX_ATTEMPTS):
+            endpoint = self.balancer.pick(route_key.get(), exclude=tried)
+            if endpoint is None:
+                break
+            with self.balancer.track(endpoint) as attempt:
+                stream = self.clients[endpoint.url].stream_reply(history)
+                async with aclosing(stream):
+                    first = await anext(stream, "")
+                    if first.startswith(OFFLINE_PREFIX):
+                        attempt.fail()
+                    else:
+                        attempt.first_token()
+                        if first:
+                            yield first
+                        async for chunk in stream:
+                            yield chunk
+                        return
+            tried.append(endpoint)
+        if first:
+            yield first  # every attempt failed; pass the provider's offline reply on
+
+
+_balancers: dict[str, EndpointBalancer] = {}
+_balancers_lock = threading.Lock()
+
+
+def get_balancer(config: Settings | None = None) -> EndpointBalancer:
+    """The balancer for ``OLLAMA_BASE_URL``; it outlives client rebuilds."""
+    cfg = config or get_settings()
+    balancer = _balancers.get(cfg.ollama_base_url)
+    if balancer is None:
+        with _balancers_lock:
+            balancer = _balancers.get(cfg.ollama_base_url)
+            if balancer is None:
+                balancer = _balancers[cfg.ollama_base_url] = EndpointBalancer.from_settings(cfg)
+    return balancer
+
+
+def balancer_snapshots() -> list[dict]:
+    with _balancers_lock:
+        balancers = list(_balancers.values())
+    return [balancer.snapshot() for balancer in balancers]
+
+
+async def close_balancers() -> None:
+    """Stop the health checks; called from the app lifespan."""
+    with _balancers_lock:
+        balancers = list(_balancers.values())
+    for balancer in balancers:
+        await balancer.aclose()
+
+
+def reset_balancers() -> None:
+    with _balancers_lock:
+        _balancers.clear()
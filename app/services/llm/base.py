@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import re
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import List
 
-
 HistoryMessage = dict[str, str]
 
+_CHUNK_RE = re.compile(r"\S+\s*|\s+")
+
+
+class IncompleteStream(RuntimeError):
+    """A provider stream ended before the provider marked the reply as done."""
+
+
+def split_chunks(text: str) -> list[str]:
+    """Split text into word-sized chunks whose concatenation is ``text``."""
+    return _CHUNK_RE.findall(text)
+
 
 class LLMClient(ABC):
     """LLM interface so providers can be swapped at runtime."""
@@ -13,3 +26,16 @@ class LLMClient(ABC):
     @abstractmethod
     def reply(self, history: List[HistoryMessage]) -> str:  # pragma: no cover - interface
         raise NotImplementedError
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        """Async variant of ``reply``; providers with an async transport override it."""
+        return await asyncio.to_thread(self.reply, history)
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        """Yield the reply in chunks as the provider produces them.
+
+        Providers without native streaming fall back to a single chunk. A stream that
+        fails after its first chunk raises instead of ending early, so callers never
+        mistake a truncated reply for a whole one.
+        """
+        yield await self.areply(history)
@@ -0,0 +1,275 @@
+"""Reply cache for LLM turns: in-memory LRU with TTL plus an optional SQLite tier."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from app.services.llm.base import HistoryMessage, LLMClient, split_chunks
+from app.utils.config import get_settings
+
+# Providers report transport failures as a normal reply prefixed with this marker;
+# those must never be served from cache.
+OFFLINE_PREFIX = "(offline)"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def make_cache_key(namespace: str, history: Sequence[HistoryMessage], window: int) -> str:
+    """Hash of provider/model, system prompt and the last ``window`` turns (normalized)."""
+    system = [msg["content"] for msg in history if msg["role"] == "system"]
+    turns = [msg for msg in history if msg["role"] != "system"][-window:]
+    material = {
+        "ns": namespace,
+        "system": [_normalize(text) for text in system],
+        "turns": [[msg["role"], _normalize(msg["content"])] for msg in turns],
+    }
+    encoded = json.dumps(material, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    persistent_hits: int = 0
+
+
+class CacheTier(ABC):
+    """Storage backend for cached replies."""
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryTier(CacheTier):
+    def __init__(self, max_entries: int, ttl_seconds: float, stats: CacheStats):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier(CacheTier):
+    """Persistent tier so warm replies survive restarts; expired rows are purged lazily."""
+
+    _PURGE_EVERY = 100
+
+    def __init__(self, path: str | Path, ttl_seconds: float, stats: CacheStats):
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_reply_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_reply_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= time.time():
+            self.stats.expirations += 1
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_reply_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM llm_reply_cache WHERE expires_at <= ?", (time.time(),)
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_reply_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_reply_cache").fetchone()[0]
+
+
+class ReplyCache:
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        window: int = 2,
+        persistent_path: str | Path | None = None,
+    ):
+        self.window = window
+        self.stats = CacheStats()
+        self.memory = MemoryTier(max_entries, ttl_seconds, self.stats)
+        self.persistent: CacheTier | None = (
+            SQLiteTier(persistent_path, ttl_seconds, self.stats) if persistent_path else None
+        )
+
+    def key(self, namespace: str, history: Sequence[HistoryMessage]) -> str:
+        return make_cache_key(namespace, history, self.window)
+
+    def get(self, key: str) -> str | None:
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.stats.persistent_hits += 1
+                self.memory.set(key, value)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        if not value or value.startswith(OFFLINE_PREFIX):
+            return
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def snapshot(self) -> dict:
+        data = asdict(self.stats)
+        data["memory_entries"] = len(self.memory)
+        data["persistent_entries"] = len(self.persistent) if self.persistent is not None else None
+        return data
+
+
+class CachedLLMClient(LLMClient):
+    """Serve repeated turns from ``ReplyCache`` and only call ``inner`` on a miss."""
+
+    def __init__(self, inner: LLMClient, cache: ReplyCache, namespace: str):
+        self.inner = inner
+        self.cache = cache
+        self.namespace = namespace
+
+    async def _lookup(self, key: str) -> str | None:
+        if self.cache.persistent is None:
+            return self.cache.get(key)
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _store(self, key: str, value: str) -> None:
+        if self.cache.persistent is None:
+            self.cache.set(key, value)
+        else:
+            await asyncio.to_thread(self.cache.set, key, value)
+
+    def reply(self, history: list[HistoryMessage]) -> str:
+        key = self.cache.key(self.namespace, history)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        value = self.inner.reply(history)
+        self.cache.set(key, value)
+        return value
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        key = self.cache.key(self.namespace, history)
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+        value = await self.inner.areply(history)
+        await self._store(key, value)
+        return value
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        key = self.cache.key(self.namespace, history)
+        cached = await self._lookup(key)
+        if cached is not None:
+            for chunk in split_chunks(cached):
+                yield chunk
+            return
+        parts: list[str] = []
+        async for chunk in self.inner.stream_reply(history):
+            parts.append(chunk)
+            yield chunk
+        # Only reached once the inner stream has finished: providers raise when a stream
+        # is cut short, so a truncated reply never lands in the cache.
+        await self._store(key, "".join(parts))
+
+
+@lru_cache(maxsize=1)
+def get_reply_cache() -> ReplyCache | None:
+    """Process-wide cache built from settings; ``None`` when ``LLM_REPLY_CACHE_SIZE=0``."""
+    cfg = get_settings()
+    if cfg.llm_reply_cache_size <= 0:
+        return None
+    return ReplyCache(
+        max_entries=cfg.llm_reply_cache_size,
+        ttl_seconds=cfg.llm_reply_cache_ttl,
+        window=cfg.llm_reply_cache_window,
+        persistent_path=cfg.llm_reply_cache_path,
+    )
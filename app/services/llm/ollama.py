@@ -1,22 +1,73 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
+
 import httpx
 
-from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.llm.base import HistoryMessage, IncompleteStream, LLMClient
+from app.services.llm.pool import get_http_pool
+
+
+def _build_prompt(history: list[HistoryMessage]) -> str:
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in history)
+
+
+def _offline(exc: Exception) -> str:
+    return f"(offline) Unable to reach Ollama: {exc}. Let's keep practicing!"
 
 
 class OllamaClient(LLMClient):
-    def __init__(self, base_url: str, model: str):
+    def __init__(self, base_url: str, model: str, http: httpx.AsyncClient | None = None):
         self.base_url = base_url.rstrip("/")
         self.model = model
+        self._http = http
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http or get_http_pool().get(self.base_url)
 
     def reply(self, history: list[HistoryMessage]) -> str:
-        prompt = "\n".join(f"{msg['role']}: {msg['content']}" for msg in history)
-        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        payload = {"model": self.model, "prompt": _build_prompt(history), "stream": False}
         try:
             response = httpx.post(f"{self.base_url}/api/generate", json=payload, timeout=15.0)
             response.raise_for_status()
             data = response.json()
             return data.get("response") or data.get("output") or "Let's keep practicing!"
         except Exception as exc:  # pragma: no cover - network dependent
-            return f"(offline) Unable to reach Ollama: {exc}. Let's keep practicing!"
+            return _offline(exc)
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        payload = {"model": self.model, "prompt": _build_prompt(history), "stream": False}
+        try:
+            response = await self.http.post(f"{self.base_url}/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("response") or data.get("output") or "Let's keep practicing!"
+        except Exception as exc:  # pragma: no cover - network dependent
+            return _offline(exc)
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        payload = {"model": self.model, "prompt": _build_prompt(history), "stream": True}
+        emitted = False
+        try:
+            async with self.http.stream(
+                "POST", f"{self.base_url}/api/generate", json=payload
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    chunk = data.get("response")
+                    if chunk:
+                        emitted = True
+                        yield chunk
+                    if data.get("done"):
+                        break
+                else:
+                    raise IncompleteStream("Ollama closed the stream before it was done")
+        except Exception as exc:
+            if emitted:
+                raise
+            yield _offline(exc)
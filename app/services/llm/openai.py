@@ -1,25 +1,50 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
+
 import httpx
 
-from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.llm.base import HistoryMessage, IncompleteStream, LLMClient
+from app.services.llm.pool import get_http_pool
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _offline(exc: Exception) -> str:
+    return f"(offline) Unable to reach OpenAI: {exc}. Let's review your sentence again."
 
 
 class OpenAIClient(LLMClient):
-    def __init__(self, api_key: str, model: str):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: str = DEFAULT_BASE_URL,
+        http: httpx.AsyncClient | None = None,
+    ):
         if not api_key:
             raise ValueError("OPENAI_API_KEY is required for the openai provider")
         self.api_key = api_key
         self.model = model
+        self.base_url = base_url.rstrip("/")
+        self._http = http
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http or get_http_pool().get(self.base_url)
+
+    @property
+    def _headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
 
     def reply(self, history: list[HistoryMessage]) -> str:
         payload = {"model": self.model, "messages": history, "temperature": 0.2}
-        headers = {"Authorization": f"Bearer {self.api_key}"}
         try:
             response = httpx.post(
-                "https://api.openai.com/v1/chat/completions",
+                f"{self.base_url}/chat/completions",
                 json=payload,
-                headers=headers,
+                headers=self._headers,
                 timeout=15.0,
             )
             response.raise_for_status()
@@ -27,4 +52,42 @@ class OpenAIClient(LLMClient):
             message = data["choices"][0]["message"]["content"]
             return message.strip()
         except Exception as exc:  # pragma: no cover - network dependent
-            return f"(offline) Unable to reach OpenAI: {exc}. Let's review your sentence again."
+            return _offline(exc)
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        payload = {"model": self.model, "messages": history, "temperature": 0.2}
+        try:
+            response = await self.http.post(
+                f"{self.base_url}/chat/completions", json=payload, headers=self._headers
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data["choices"][0]["message"]["content"].strip()
+        except Exception as exc:  # pragma: no cover - network dependent
+            return _offline(exc)
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        payload = {"model": self.model, "messages": history, "temperature": 0.2, "stream": True}
+        emitted = False
+        try:
+            async with self.http.stream(
+                "POST", f"{self.base_url}/chat/completions", json=payload, headers=self._headers
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    chunk = delta.get("content")
+                    if chunk:
+                        emitted = True
+                        yield chunk
+                else:
+                    raise IncompleteStream("OpenAI closed the stream before [DONE]")
+        except Exception as exc:
+            if emitted:
+                raise
+            yield _offline(exc)
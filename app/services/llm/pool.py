@@ -0,0 +1,89 @@
+"""Shared, long-lived ``httpx.AsyncClient`` instances for LLM providers.
+
+``httpx`` is only imported once a provider asks for a connection, so workers running
+the offline mock never load it.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from app.utils.config import Settings, get_settings
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = get_logger(__name__)
+
+
+def _http2_available() -> bool:
+    try:  # pragma: no cover - optional dependency
+        import h2  # noqa: F401
+    except ModuleNotFoundError:  # pragma: no cover - optional dependency
+        return False
+    return True
+
+
+class HTTPClientPool:
+    """One pooled ``AsyncClient`` per base URL, so keep-alive connections are reused."""
+
+    def __init__(self, config: Settings | None = None):
+        import httpx
+
+        cfg = config or get_settings()
+        self.limits = httpx.Limits(
+            max_connections=cfg.llm_http_max_connections,
+            max_keepalive_connections=cfg.llm_http_max_keepalive,
+            keepalive_expiry=cfg.llm_http_keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(cfg.llm_timeout_seconds)
+        self.http2 = cfg.llm_http2
+        if self.http2 and not _http2_available():
+            logger.warning("LLM_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1")
+            self.http2 = False
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        key = base_url.rstrip("/")
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            import httpx
+
+            client = httpx.AsyncClient(
+                base_url=key, limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+_pool: HTTPClientPool | None = None
+_pool_config: Settings | None = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    global _pool
+    if _pool is None:
+        _pool = HTTPClientPool(_pool_config)
+    return _pool
+
+
+def configure_http_pool(config: Settings | None = None) -> None:
+    """Set the settings for the process-wide pool; called from the app lifespan.
+
+    The pool itself is built on first use.
+    """
+    global _pool, _pool_config
+    _pool, _pool_config = None, config
+
+
+async def close_http_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
@@ -1,29 +1,111 @@
 from __future__ import annotations
 
-from app.repo.models import LLMProvider, Settings as SettingsModel
+import hashlib
+import threading
+from typing import Protocol
+
+from app.repo.models import LLMProvider
 from app.services.llm.base import LLMClient
-from app.services.llm.ollama import OllamaClient
-from app.services.llm.openai import OpenAIClient
+from app.services.llm.cache import CachedLLMClient, get_reply_cache
+from app.services.llm.resilience import FallbackLLMClient, GuardedLLMClient, get_guard
 from app.services.llm.simple_mock import SimpleMockClient
+from app.services.llm.singleflight import SingleFlightLLMClient, get_single_flight
 from app.utils.config import Settings, get_settings
 
 runtime_settings = get_settings()
 
+ClientKey = tuple[LLMProvider, str, str, str]
 
-def get_llm(settings_row: SettingsModel | None, config: Settings | None = None) -> LLMClient:
-    cfg = config or runtime_settings
-    provider_value = settings_row.llm_provider if settings_row else cfg.default_llm_provider
-    try:
-        provider = LLMProvider(provider_value)
-    except ValueError:
-        provider = LLMProvider.SIMPLE
-    model = settings_row.llm_model if settings_row else cfg.default_llm_model
 
+class ProviderSettings(Protocol):
+    llm_provider: LLMProvider | str
+    llm_model: str
+
+
+_clients: dict[ClientKey, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _credentials_hash(secret: str | None) -> str:
+    if not secret:
+        return ""
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _build_client(provider: LLMProvider, model: str, cfg: Settings) -> LLMClient:
+    # Remote providers (and httpx) are imported only when one is actually configured.
     if provider == LLMProvider.OLLAMA:
+        from app.services.llm.balancer import BalancedOllamaClient, get_balancer, parse_endpoints
+        from app.services.llm.ollama import OllamaClient
+
+        if len(parse_endpoints(cfg.ollama_base_url)) > 1:
+            return BalancedOllamaClient(get_balancer(cfg), model)
         return OllamaClient(cfg.ollama_base_url, model)
     if provider == LLMProvider.OPENAI:
+        from app.services.llm.openai import OpenAIClient
+
         try:
-            return OpenAIClient(cfg.openai_api_key or "", model)
+            return OpenAIClient(cfg.openai_api_key or "", model, cfg.openai_base_url)
         except ValueError:
             return SimpleMockClient()
     return SimpleMockClient()
+
+
+def _client_key(provider: LLMProvider, model: str, cfg: Settings) -> ClientKey:
+    if provider == LLMProvider.OLLAMA:
+        return provider, model, cfg.ollama_base_url, ""
+    if provider == LLMProvider.OPENAI:
+        return provider, model, cfg.openai_base_url, _credentials_hash(cfg.openai_api_key)
+    return provider, "", "", ""
+
+
+def get_llm(
+    settings_row: ProviderSettings | None, config: Settings | None = None, fallback: bool = True
+) -> LLMClient:
+    """Return a warm client for the configured provider, building it on first use.
+
+    With ``fallback=False`` a remote provider is returned without the offline mock in
+    front, so an outage raises ``ProviderUnavailable`` (for jobs that should retry).
+    """
+    cfg = config or runtime_settings
+    provider_value = settings_row.llm_provider if settings_row else cfg.default_llm_provider
+    try:
+        provider = LLMProvider(provider_value)
+    except ValueError:
+        provider = LLMProvider.SIMPLE
+    model = settings_row.llm_model if settings_row else cfg.default_llm_model
+
+    key = _client_key(provider, model, cfg)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                namespace = f"{provider.value}:{model}"
+                client = _build_client(provider, model, cfg)
+                remote = not isinstance(client, SimpleMockClient)
+                if remote:
+                    # One guard per endpoint (``key[2]``), shared by all its models.
+                    client = GuardedLLMClient(client, get_guard(f"{provider.value}:{key[2]}", cfg))
+                # Cache outside the in-flight table: hits never reach it, and only
+                # misses that are already being generated are coalesced.
+                flights = get_single_flight()
+                if flights is not None:
+                    client = SingleFlightLLMClient(client, flights, namespace)
+                reply_cache = get_reply_cache()
+                if reply_cache is not None:
+                    client = CachedLLMClient(client, reply_cache, namespace)
+                if remote:
+                    # Outside the cache, so fallback replies are never stored as the
+                    # provider's answer.
+                    client = FallbackLLMClient(client, SimpleMockClient())
+                _clients[key] = client
+    if not fallback and isinstance(client, FallbackLLMClient):
+        return client.primary
+    return client
+
+
+def clear_client_cache() -> None:
+    """Drop cached clients (called after ``/api/settings`` changes the provider)."""
+    with _clients_lock:
+        _clients.clear()
@@ -0,0 +1,416 @@
+"""Per-provider concurrency cap, circuit breaker and adaptive timeouts.
+
+Every remote provider endpoint gets one ``ProviderGuard`` (shared by all models and
+clients talking to it) and its clients are wrapped in ``GuardedLLMClient``:
+
+- at most ``LLM_MAX_CONCURRENCY`` calls run at once; up to ``LLM_QUEUE_SIZE`` more wait
+  for a slot, each for at most ``LLM_QUEUE_TIMEOUT`` seconds, and the rest are rejected;
+- after ``LLM_BREAKER_FAILURES`` consecutive failures the circuit opens and calls are
+  rejected without touching the network; after ``LLM_BREAKER_RESET_SECONDS`` one probe
+  call is let through and its outcome closes or re-opens the circuit;
+- the timeout starts at ``LLM_TIMEOUT_SECONDS`` and, once enough calls have been
+  observed, follows ``p95 * LLM_TIMEOUT_P95_MULTIPLIER`` (never below
+  ``LLM_TIMEOUT_FLOOR_SECONDS``). Streams get the first-token timeout for their first
+  chunk and the reply timeout for the whole stream.
+
+A guarded call that cannot be served raises ``ProviderUnavailable``; the registry puts
+``FallbackLLMClient`` outside the reply cache so the learner gets the offline mock
+reply and the fallback is never cached under the real provider. A stream that fails
+after its first chunk cannot be replaced any more, so that error reaches the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from time import perf_counter
+
+from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.llm.cache import OFFLINE_PREFIX
+from app.utils.config import Settings, get_settings
+from app.utils.metrics import HistogramRegistry, LatencyHistogram
+
+
+class ProviderUnavailable(RuntimeError):
+    """The provider could not serve the call; ``reason`` says why."""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider}: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class Overloaded(Exception):
+    """No concurrency slot: the wait queue is full or the wait hit its deadline."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.failure_threshold <= 0 or self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failure_threshold <= 0 or self.state == self.OPEN:
+                return
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened += 1
+                self._opened_at = self.clock()
+
+    def release(self) -> None:
+        """Forget a probe whose caller went away without an outcome."""
+        with self._lock:
+            self._probing = False
+
+
+class AdaptiveTimeout:
+    """Timeout from the p95 of recent latencies, within ``[floor, ceiling]``.
+
+    Latencies go into a histogram that is swapped for a fresh one every ``window``
+    samples, so the estimate follows the provider instead of its whole history.
+    """
+
+    def __init__(
+        self,
+        ceiling: float,
+        floor: float,
+        multiplier: float,
+        min_samples: int,
+        window: int = 200,
+    ):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.window = max(window, min_samples)
+        self._current = LatencyHistogram()
+        self._previous: LatencyHistogram | None = None
+
+    def observe(self, seconds: float) -> None:
+        if self._current.count >= self.window:
+            self._previous, self._current = self._current, LatencyHistogram()
+        self._current.observe(seconds)
+
+    def seconds(self) -> float:
+        histogram = self._current
+        if histogram.count < self.min_samples:
+            histogram = self._previous or histogram
+        p95_ms = histogram.quantile(0.95) if histogram.count >= self.min_samples else None
+        if p95_ms is None or self.multiplier <= 0:
+            return self.ceiling
+        return min(self.ceiling, max(self.floor, p95_ms / 1000.0 * self.multiplier))
+
+
+class ConcurrencyLimiter:
+    """``asyncio.Semaphore`` with a bounded wait queue and a deadline per waiter."""
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # asyncio primitives belong to one event loop; tests and the TestClient portal
+        # each run their own, so keep one semaphore per loop.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the block; ``Overloaded`` when there is none in time."""
+        if self.limit <= 0:
+            yield
+            return
+        semaphore = self._semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.queue_size:
+                raise Overloaded("queue_full")
+            self.waiting += 1
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await semaphore.acquire()
+            except TimeoutError:
+                raise Overloaded("queue_timeout") from None
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+
+class ProviderGuard:
+    """Limiter, breaker, timeouts and counters for one provider endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        config: Settings | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        cfg = config or get_settings()
+        self.name = name
+        self.limiter = ConcurrencyLimiter(
+            cfg.llm_max_concurrency, cfg.llm_queue_size, cfg.llm_queue_timeout
+        )
+        self.breaker = CircuitBreaker(
+            cfg.llm_breaker_failures, cfg.llm_breaker_reset_seconds, clock
+        )
+        self.timeouts = {
+            kind: AdaptiveTimeout(
+                ceiling=cfg.llm_timeout_seconds,
+                floor=cfg.llm_timeout_floor_seconds,
+                multiplier=cfg.llm_timeout_p95_multiplier,
+                min_samples=cfg.llm_timeout_min_samples,
+            )
+            for kind in ("reply", "first_token")
+        }
+        self.metrics = HistogramRegistry()
+
+    def _reject(self, reason: str) -> ProviderUnavailable:
+        self.metrics.incr(f"rejected_{reason}")
+        return ProviderUnavailable(self.name, reason)
+
+    def admit(self) -> None:
+        if not self.breaker.allow():
+            raise self._reject("circuit_open")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        started = perf_counter()
+        try:
+            async with self.limiter.slot():
+                self.metrics.observe("queue_wait", perf_counter() - started)
+                yield
+        except Overloaded as exc:
+            self.breaker.release()
+            raise self._reject(exc.reason) from None
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+    def succeeded(self, kind: str, seconds: float) -> None:
+        self.breaker.success()
+        self.timeouts[kind].observe(seconds)
+        self.metrics.observe(kind, seconds)
+
+    def failed(self, kind: str, reason: str, seconds: float | None = None) -> ProviderUnavailable:
+        self.breaker.failure()
+        self.metrics.incr(reason)
+        if seconds is not None:
+            # Timed-out calls count as latency too, so a provider that got slower for
+            # good pushes the timeout up instead of failing forever.
+            self.timeouts[kind].observe(seconds)
+        return ProviderUnavailable(self.name, reason)
+
+    @contextmanager
+    def attempt(self, kind: str, started: float) -> Iterator[None]:
+        """Turn exceptions (other than cancellation) into ``ProviderUnavailable``."""
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except ProviderUnavailable:
+            raise
+        except TimeoutError:
+            raise self.failed(kind, "timeouts", perf_counter() - started) from None
+        except Exception as exc:
+            raise self.failed(kind, "errors") from exc
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_opened": self.breaker.opened,
+            "in_flight": self.limiter.active,
+            "queued": self.limiter.waiting,
+            "timeout_seconds": {kind: t.seconds() for kind, t in self.timeouts.items()},
+            **self.metrics.snapshot(),
+        }
+
+
+class GuardedLLMClient(LLMClient):
+    """Run ``inner`` under ``guard``; raise ``ProviderUnavailable`` instead of degrading.
+
+    Providers report transport failures as an ``(offline)`` reply; those count as
+    failures here too.
+    """
+
+    def __init__(self, inner: LLMClient, guard: ProviderGuard):
+        self.inner = inner
+        self.guard = guard
+
+    def reply(self, history: list[HistoryMessage]) -> str:
+        # Sync callers (background jobs) only go through the breaker; they run in worker
+        # threads with the provider's own timeout.
+        self.guard.admit()
+        started = perf_counter()
+        with self.guard.attempt("reply", started):
+            value = self.inner.reply(history)
+        if value.startswith(OFFLINE_PREFIX):
+            raise self.guard.failed("reply", "errors")
+        self.guard.succeeded("reply", perf_counter() - started)
+        return value
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        self.guard.admit()
+        async with self.guard.slot():
+            started = perf_counter()
+            with self.guard.attempt("reply", started):
+                async with asyncio.timeout(self.guard.timeouts["reply"].seconds()):
+                    value = await self.inner.areply(history)
+            if value.startswith(OFFLINE_PREFIX):
+                raise self.guard.failed("reply", "errors")
+            self.guard.succeeded("reply", perf_counter() - started)
+            return value
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        self.guard.admit()
+        async with self.guard.slot():
+            started = perf_counter()
+            async with aclosing(self.inner.stream_reply(history)) as stream:
+                with self.guard.attempt("first_token", started):
+                    async with asyncio.timeout(self.guard.timeouts["first_token"].seconds()):
+                        first = await anext(stream, "")
+                if first.startswith(OFFLINE_PREFIX):
+                    raise self.guard.failed("first_token", "errors")
+                self.guard.succeeded("first_token", perf_counter() - started)
+                if not first:
+                    return
+                yield first
+                # The timeout wraps each read rather than the loop: a timeout around a
+                # ``yield`` would cancel the consumer. Only time spent waiting on the
+                # provider counts, so a slow reader does not use up the budget.
+                budget = self.guard.timeouts["reply"].seconds()
+                waited = perf_counter() - started
+                while True:
+                    read_started = perf_counter()
+                    with self.guard.attempt("reply", read_started - waited):
+                        async with asyncio.timeout(max(budget - waited, 0.0)):
+                            chunk = await anext(stream, None)
+                    waited += perf_counter() - read_started
+                    if chunk is None:
+                        break
+                    yield chunk
+                self.guard.succeeded("reply", waited)
+
+
+class FallbackLLMClient(LLMClient):
+    """Serve ``fallback`` whenever ``primary`` raises ``ProviderUnavailable``.
+
+    A stream is only replaced before its first chunk; after that the error is re-raised.
+    """
+
+    def __init__(self, primary: LLMClient, fallback: LLMClient):
+        self.primary = primary
+        self.fallback = fallback
+
+    def reply(self, history: list[HistoryMessage]) -> str:
+        try:
+            return self.primary.reply(history)
+        except ProviderUnavailable:
+            return self.fallback.reply(history)
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        try:
+            return await self.primary.areply(history)
+        except ProviderUnavailable:
+            return await self.fallback.areply(history)
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        emitted = False
+        try:
+            async with aclosing(self.primary.stream_reply(history)) as stream:
+                async for chunk in stream:
+                    emitted = True
+                    yield chunk
+        except ProviderUnavailable:
+            if emitted:
+                raise
+            async with aclosing(self.fallback.stream_reply(history)) as stream:
+                async for chunk in stream:
+                    yield chunk
+
+
+_guards: dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name: str, config: Settings | None = None) -> ProviderGuard:
+    """The guard for a provider endpoint; it outlives client rebuilds on settings changes."""
+    guard = _guards.get(name)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.setdefault(name, ProviderGuard(name, config))
+    return guard
+
+
+def guard_snapshots() -> list[dict]:
+    with _guards_lock:
+        guards = list(_guards.values())
+    return [guard.snapshot() for guard in sorted(guards, key=lambda guard: guard.name)]
+
+
+def reset_guards() -> None:
+    with _guards_lock:
+        _guards.clear()
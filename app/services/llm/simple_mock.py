@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from typing import List
 
-from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.llm.base import HistoryMessage, LLMClient, split_chunks
 
 
 class SimpleMockClient(LLMClient):
@@ -13,3 +14,12 @@ class SimpleMockClient(LLMClient):
         if not last_user:
             return "Let's start practicing English!"
         return f"I noticed you said: \"{last_user}\". Here's a clearer version: {last_user.strip().capitalize()}."
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        return self.reply(history)
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        # One chunk per word (with its trailing whitespace) so joining the chunks
+        # reproduces ``reply`` exactly.
+        for chunk in split_chunks(self.reply(history)):
+            yield chunk
@@ -0,0 +1,192 @@
+"""Share one upstream LLM call among concurrent callers sending the same request.
+
+A double submit from the UI or a reconnecting WebSocket used to start a second
+``reply`` for a turn that was already being generated. ``SingleFlight`` keys every
+in-flight call by a fingerprint of the exact request; callers arriving while it runs
+join it instead of starting their own. Streams are shared too: a late joiner replays
+the chunks produced so far and then follows the live ones.
+
+The upstream call runs in its own task, so a caller that is cancelled (or stops
+reading a stream) only detaches itself; the call is cancelled once nobody is left
+waiting for it. Failures are handed to every waiter and never remembered, so the next
+request starts a fresh call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+
+from app.services.llm.base import HistoryMessage, LLMClient
+from app.utils.config import get_settings
+
+
+def request_fingerprint(namespace: str, history: Sequence[HistoryMessage]) -> str:
+    """Hash of provider/model and the full message list, byte for byte."""
+    material = [namespace, [[msg["role"], msg["content"]] for msg in history]]
+    encoded = json.dumps(material, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    leaders: int = 0  # upstream calls started
+    joined: int = 0  # callers served by a call someone else started
+    cancelled: int = 0  # callers that left before the call finished
+    abandoned: int = 0  # upstream calls cancelled because every caller left
+    failures: int = 0  # upstream calls that raised
+
+
+@dataclass(eq=False)
+class _Flight:
+    loop: asyncio.AbstractEventLoop
+    task: asyncio.Task | None = None
+    waiters: int = 0
+    # Streaming flights only: chunks so far, and an event replaced on every new chunk.
+    chunks: list[str] = field(default_factory=list)
+    done: bool = False
+    error: BaseException | None = None
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def notify(self) -> None:
+        wake, self.wake = self.wake, asyncio.Event()
+        wake.set()
+
+
+class SingleFlight:
+    """In-flight calls keyed by fingerprint; at most one upstream call per key."""
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._flights: dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _join(self, key: str) -> _Flight | None:
+        flight = self._flights.get(key)
+        if flight is None or flight.loop is not asyncio.get_running_loop():
+            return None
+        self.stats.joined += 1
+        return flight
+
+    def _start(self, key: str, work: Callable[[_Flight], Awaitable]) -> _Flight:
+        loop = asyncio.get_running_loop()
+        flight = _Flight(loop)
+        flight.task = loop.create_task(work(flight))
+        flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+        self.stats.leaders += 1
+        # A flight started on another event loop (tests, worker threads) is replaced
+        # here; its own callback will not remove the new one.
+        self._flights[key] = flight
+        return flight
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.failures += 1
+
+    def _leave(self, key: str, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters or flight.task.done():
+            return
+        # Nobody wants the result any more. Unlist it first so a caller arriving
+        # while the task unwinds starts a new call instead of joining a cancelled one.
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.task.cancel()
+        self.stats.abandoned += 1
+
+    async def run(self, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Return the result of ``call()``, sharing it with concurrent callers of ``key``."""
+        flight = self._join(key) or self._start(key, lambda _: call())
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.stats.cancelled += 1
+            raise
+        finally:
+            self._leave(key, flight)
+
+    async def stream(self, key: str, call: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Yield the chunks of ``call()``, sharing one upstream stream per ``key``."""
+        flight = self._join(key) or self._start(key, lambda new: self._pump(new, call))
+        flight.waiters += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.chunks):
+                    yield flight.chunks[index]
+                    index += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wake.wait()
+        except (asyncio.CancelledError, GeneratorExit):
+            if not flight.done:
+                self.stats.cancelled += 1
+            raise
+        finally:
+            self._leave(key, flight)
+
+    async def _pump(self, flight: _Flight, call: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for chunk in call():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            flight.done = True
+            flight.notify()
+
+    def snapshot(self) -> dict:
+        data = asdict(self.stats)
+        data["in_flight"] = len(self)
+        return data
+
+
+class SingleFlightLLMClient(LLMClient):
+    """Coalesce concurrent identical ``areply``/``stream_reply`` calls to ``inner``.
+
+    The sync ``reply`` (used by background jobs, which are already deduplicated by
+    their idempotency keys) goes straight to ``inner``.
+    """
+
+    def __init__(self, inner: LLMClient, flights: SingleFlight, namespace: str):
+        self.inner = inner
+        self.flights = flights
+        self.namespace = namespace
+
+    def reply(self, history: list[HistoryMessage]) -> str:
+        return self.inner.reply(history)
+
+    async def areply(self, history: list[HistoryMessage]) -> str:
+        key = "reply:" + request_fingerprint(self.namespace, history)
+        return await self.flights.run(key, lambda: self.inner.areply(history))
+
+    async def stream_reply(self, history: list[HistoryMessage]) -> AsyncIterator[str]:
+        key = "stream:" + request_fingerprint(self.namespace, history)
+        shared = self.flights.stream(key, lambda: self.inner.stream_reply(history))
+        # ``aclosing`` so a caller that stops reading detaches from the flight right away.
+        async with aclosing(shared) as stream:
+            async for chunk in stream:
+                yield chunk
+
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> SingleFlight | None:
+    """Process-wide in-flight table; ``None`` when ``LLM_SINGLE_FLIGHT=false``."""
+    if not get_settings().llm_single_flight:
+        return None
+    return SingleFlight()
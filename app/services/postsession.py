@@ -0,0 +1,34 @@
+"""Post-session work that runs on the job queue once a session is finished."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.repo import dao
+from app.services import jobs
+from app.services.evaluation import quizgen
+
+FINISH_SESSION = "session.finish"
+
+
+def finish_job_key(session_id: str) -> str:
+    return f"finish:{session_id}"
+
+
+@jobs.register(FINISH_SESSION)
+def generate_session_material(db: Session, payload: dict[str, Any]) -> dict[str, Any]:
+    """Create the session's quizzes and the flashcards derived from its errors."""
+    session_id = payload["session_id"]
+    session = dao.get_session(db, session_id, with_related=True)
+    if session is None:
+        raise LookupError(f"session {session_id} not found")
+
+    messages = dao.list_session_messages(db, session_id)
+    errors = dao.list_session_errors(db, session_id)
+    topic_label = session.topic.label if session.topic else session.topic_code
+    quiz_items = quizgen.generate_quiz(topic_label, errors, messages)
+    dao.create_quizzes(db, session, quiz_items)
+    flashcards_created = dao.ensure_flashcards_from_errors(db, errors)
+    return {"quizzes_created": len(quiz_items), "flashcards_created": flashcards_created}
@@ -0,0 +1,135 @@
+"""Flashcard review sessions: a keyset cursor over the due queue plus batched grading.
+
+A ``ReviewStream`` hands out cards one batch at a time, fetches the next batch in the
+background while the learner works through the current one, and buffers pipelined
+grades so each batch is written in a single transaction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from datetime import UTC, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.repo import async_dao, dao, models
+
+ReviewedState = tuple[int, int, float, datetime]
+
+
+def apply_reviews(
+    db: Session, grades: list[tuple[str, int]], now: datetime | None = None
+) -> dict[str, ReviewedState]:
+    """Schedule and store ``grades`` (card id, quality) in order; caller commits.
+
+    Raises ``LookupError`` naming the unknown card ids before writing anything.
+    """
+    from app.services.evaluation import srs_batch  # NumPy loads on the first review
+
+    reviews = Counter(card_id for card_id, _ in grades)
+    cards = dao.get_flashcards(db, reviews)
+    missing = sorted(set(reviews) - set(cards))
+    if missing:
+        raise LookupError(", ".join(missing))
+    states = srs_batch.review_sequence(
+        {card.id: (card.reps, card.interval, float(card.ease)) for card in cards.values()},
+        grades,
+        now=now or datetime.now(tz=UTC),
+    )
+    dao.update_flashcard_states(db, list(cards.values()), states, reviews)
+    return states
+
+
+class DueCursor:
+    """Keyset cursor on (due_at, id) over the cards due when the session started."""
+
+    def __init__(self, db: AsyncSession, batch_size: int, now: datetime | None = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.now = now or datetime.now(tz=UTC)
+        self.after: tuple[datetime, str] | None = None
+        self.exhausted = False
+
+    async def fetch(self) -> list[models.Flashcard]:
+        if self.exhausted:
+            return []
+        cards = await async_dao.list_flashcards_due(
+            self.db, limit=self.batch_size, after=self.after, now=self.now
+        )
+        # Detach the rows, then close the read transaction so a long session does not
+        # pin an old snapshot (a rollback would otherwise expire the loaded cards).
+        self.db.expunge_all()
+        await self.db.rollback()
+        if cards:
+            self.after = (cards[-1].due_at, cards[-1].id)
+        if len(cards) < self.batch_size:
+            self.exhausted = True
+        return cards
+
+
+class ReviewStream:
+    """Server side of one study session; see ``app.ws.review`` for the wire protocol."""
+
+    def __init__(self, db: AsyncSession, read_db: AsyncSession, batch_size: int = 50):
+        self.db = db
+        self.cursor = DueCursor(read_db, batch_size)
+        self.batch_size = batch_size
+        self.outstanding: set[str] = set()
+        self.pending: list[tuple[str, int]] = []
+        self.delivered = 0
+        self.reviewed = 0
+        self._prefetch: asyncio.Task[list[models.Flashcard]] | None = None
+
+    async def next_batch(self) -> list[models.Flashcard]:
+        """Return the prefetched batch (or fetch one) and start prefetching the next."""
+        if self._prefetch is not None:
+            cards = await self._prefetch
+            self._prefetch = None
+        else:
+            cards = await self.cursor.fetch()
+        if not self.cursor.exhausted:
+            self._prefetch = asyncio.create_task(self.cursor.fetch())
+        self.outstanding.update(card.id for card in cards)
+        self.delivered += len(cards)
+        return cards
+
+    def add_review(self, card_id: str, quality: int) -> bool:
+        """Buffer one grade; ``False`` when the card was not handed out by this session."""
+        if card_id not in self.outstanding:
+            return False
+        self.outstanding.discard(card_id)
+        self.pending.append((card_id, max(0, min(5, quality))))
+        return True
+
+    @property
+    def needs_refill(self) -> bool:
+        # Send the next batch once half of the current one is answered, so the learner
+        # never waits on the network between cards.
+        has_more = not self.cursor.exhausted or self._prefetch is not None
+        return has_more and len(self.outstanding) <= self.batch_size // 2
+
+    @property
+    def finished(self) -> bool:
+        return not self.outstanding and self.cursor.exhausted and self._prefetch is None
+
+    async def flush(self) -> int:
+        """Write the buffered grades in one transaction."""
+        if not self.pending:
+            return 0
+        grades, self.pending = self.pending, []
+        await self.db.run_sync(apply_reviews, grades)
+        await self.db.commit()
+        self.reviewed += len(grades)
+        return len(grades)
+
+    async def close(self) -> None:
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            try:
+                await self._prefetch
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001 - result is discarded
+                pass
+            self._prefetch = None
+        await self.flush()
@@ -0,0 +1,122 @@
+"""Rolling conversation summary so long sessions keep their context at a fixed cost.
+
+Every ``SUMMARY_EVERY_TURNS`` learner turns the chat router queues a
+``session.summarize`` job. The job folds the messages said since the previous refresh
+into ``Session.summary`` (one LLM call over the old summary plus the new messages, so
+each refresh costs the same however long the session is). Chat turns then send the
+system prompt, the summary and the recent window instead of the whole history.
+
+``Session.prompt_tokens_sent`` and ``prompt_tokens_full`` accumulate, per turn, the
+estimated size of what was sent and of what sending every message would have cost.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.repo import dao, jobs as job_repo, models
+from app.services import jobs
+from app.services.history import estimate_tokens
+from app.services.llm import registry
+from app.services.llm.base import HistoryMessage
+from app.utils.config import Settings, get_settings
+
+SUMMARIZE_SESSION = "session.summarize"
+
+_INSTRUCTIONS = (
+    "You keep a running summary of an English tutoring conversation. Merge the previous "
+    "summary with the new messages into at most {words} words. Keep what the learner "
+    "shared about themselves, the topics covered and their recurring mistakes. Reply "
+    "with the summary only."
+)
+
+
+def summary_job_key(session_id: str, turn: int) -> str:
+    return f"summary:{session_id}:{turn}"
+
+
+def summary_due(session: models.Session, config: Settings | None = None) -> bool:
+    # Keyed on the turn number rather than on the last refresh, so a refresh still
+    # waiting in the queue is not queued again on every following turn.
+    every = (config or get_settings()).summary_every_turns
+    return every > 0 and session.turn_count > 0 and session.turn_count % every == 0
+
+
+def clip_summary(text: str, max_tokens: int) -> str:
+    """Cut ``text`` at a word boundary so it stays within ``max_tokens`` (estimated)."""
+    text = " ".join(text.split())
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0]
+
+
+def summary_prompt(
+    previous: str | None, messages: list[models.Message], max_tokens: int
+) -> list[HistoryMessage]:
+    speakers = {models.MessageRole.USER: "Learner", models.MessageRole.ASSISTANT: "Tutor"}
+    lines = [f"{speakers.get(message.role, 'Other')}: {message.text}" for message in messages]
+    body = f"Previous summary: {previous or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+    return [
+        {"role": "system", "content": _INSTRUCTIONS.format(words=max_tokens * 3 // 4)},
+        {"role": "user", "content": body},
+    ]
+
+
+def record_prompt(session: models.Session, history: list[HistoryMessage]) -> None:
+    """Count a learner turn: its size in the stored history and the prompt sent for it."""
+    session.turn_count += 1
+    session.history_tokens += estimate_tokens(history[-1]["content"])
+    session.prompt_tokens_sent += sum(estimate_tokens(message["content"]) for message in history)
+    session.prompt_tokens_full += estimate_tokens(history[0]["content"]) + session.history_tokens
+
+
+def record_reply(
+    db: Session, session: models.Session, reply: str, config: Settings | None = None
+) -> bool:
+    """Count the tutor's reply and queue a summary refresh when one is due.
+
+    Returns ``True`` when a job was queued (the caller commits, then wakes the worker).
+    """
+    cfg = config or get_settings()
+    session.history_tokens += estimate_tokens(reply)
+    if not summary_due(session, cfg):
+        return False
+    _, created = job_repo.enqueue(
+        db,
+        SUMMARIZE_SESSION,
+        {"session_id": session.id, "turn": session.turn_count},
+        idempotency_key=summary_job_key(session.id, session.turn_count),
+        max_attempts=cfg.job_max_attempts,
+    )
+    return created
+
+
+@jobs.register(SUMMARIZE_SESSION)
+def refresh_summary(db: Session, payload: dict[str, Any]) -> dict[str, Any]:
+    """Fold the messages since the last refresh into ``Session.summary``."""
+    session_id, turn = payload["session_id"], payload["turn"]
+    session = dao.get_session(db, session_id)
+    if session is None:
+        raise LookupError(f"session {session_id} not found")
+    if session.summary_turn >= turn:
+        return {"summarized_messages": 0, "skipped": True}  # a later refresh already ran
+
+    messages = dao.list_messages_after(db, session_id, session.summary_until)
+    if not messages:
+        session.summary_turn = turn
+        return {"summarized_messages": 0}
+    cfg = get_settings()
+    # No offline fallback: if the provider is down, raise so the job is retried and
+    # summary_until stays where it was instead of advancing past a mock reply.
+    llm = registry.get_llm(dao.get_cached_settings(db), config=cfg, fallback=False)
+    reply = llm.reply(summary_prompt(session.summary, messages, cfg.summary_max_tokens))
+    session.summary = clip_summary(reply, cfg.summary_max_tokens)
+    session.summary_until = messages[-1].ts
+    session.summary_turn = turn
+    return {
+        "summarized_messages": len(messages),
+        "summary_tokens": estimate_tokens(session.summary),
+    }
@@ -0,0 +1 @@
+"""Voice call pipeline: speech-to-text, live error detection and streamed replies."""
@@ -0,0 +1,346 @@
+"""Streaming turn pipeline behind ``/ws/call``.
+
+Stages run as separate tasks joined by bounded queues::
+
+    audio frames -> [audio] -> STT -> [transcripts] -> error detection -> [turns]
+        -> LLM stream -> [outbound] -> sender
+
+Each queue has a drop policy. ``BLOCK`` applies backpressure (the producer waits, and
+for audio that means the socket stops being read); ``DROP_OLDEST`` and ``DROP_NEWEST``
+shed load but only ever discard items marked droppable, such as superseded partial
+transcripts. Finals, error spans and reply tokens are never dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Generic, TypeVar
+
+from app.services.evaluation import errors as error_service
+from app.services.llm.base import HistoryMessage, LLMClient
+from app.services.voice.stt import SpeechToText, Transcript
+from app.utils.config import get_settings
+from app.utils.metrics import HistogramRegistry
+
+T = TypeVar("T")
+Frame = dict[str, Any]
+
+# Process-wide latency histograms for every call; see ``/api/admin/call-metrics``.
+call_metrics = HistogramRegistry()
+
+
+class DropPolicy(str, Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+
+class QueueClosed(Exception):
+    """Raised by ``BoundedQueue.get`` once the queue is closed and drained."""
+
+
+class BoundedQueue(Generic[T]):
+    """Bounded async queue with a drop policy and wait-time accounting."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        policy: DropPolicy = DropPolicy.BLOCK,
+        metrics: HistogramRegistry | None = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.metrics = metrics
+        self.dropped = 0
+        self.blocked = 0
+        self._items: deque[tuple[T, bool, float]] = deque()
+        self._closed = False
+        self._changed = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _count(self, field: str) -> None:
+        setattr(self, field, getattr(self, field) + 1)
+        if self.metrics is not None:
+            self.metrics.incr(f"queue.{self.name}.{field}")
+
+    def _drop_oldest_droppable(self) -> bool:
+        for index, (_, droppable, _) in enumerate(self._items):
+            if droppable:
+                del self._items[index]
+                return True
+        return False
+
+    async def put(self, item: T, droppable: bool = False) -> bool:
+        """Enqueue ``item``; returns ``False`` if the policy dropped it instead."""
+        async with self._changed:
+            if self._closed:
+                raise QueueClosed(self.name)
+            if len(self._items) >= self.maxsize:
+                if self.policy is DropPolicy.DROP_NEWEST and droppable:
+                    self._count("dropped")
+                    return False
+                if self.policy is DropPolicy.DROP_OLDEST and self._drop_oldest_droppable():
+                    self._count("dropped")
+            if len(self._items) >= self.maxsize:
+                self._count("blocked")
+                await self._changed.wait_for(lambda: len(self._items) < self.maxsize)
+            self._items.append((item, droppable, time.perf_counter()))
+            self._changed.notify_all()
+            return True
+
+    async def get(self) -> T:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                raise QueueClosed(self.name)
+            item, _, enqueued = self._items.popleft()
+            self._changed.notify_all()
+        if self.metrics is not None:
+            self.metrics.observe(f"queue.{self.name}.wait", time.perf_counter() - enqueued)
+        return item
+
+    async def close(self) -> None:
+        """Stop accepting items; consumers drain what is left, then get ``QueueClosed``."""
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+
+@dataclass(slots=True)
+class QueueSizes:
+    audio: int = 64
+    transcripts: int = 8
+    turns: int = 2
+    outbound: int = 128
+
+
+class _EndTurn:
+    __slots__ = ("received_at",)
+
+    def __init__(self, received_at: float):
+        self.received_at = received_at
+
+
+@dataclass(slots=True)
+class _Turn:
+    transcript: Transcript
+    ended_at: float
+
+
+def _error_key(error: error_service.DetectedError) -> tuple:
+    return (error.start, error.end, error.category, error.corrected_text)
+
+
+def _detect_delta(
+    detector: error_service.IncrementalDetector, text: str, final: bool = False
+) -> tuple[error_service.ErrorUpdate, error_service.IncrementalDetector]:
+    """Bring ``detector`` up to ``text``, scanning only the new suffix when possible.
+
+    A partial that extends the previous one is fed as a delta; for partials that is
+    judged on the detector's retained tail only, so each one costs O(new text). The
+    final is compared in full. When the text does not extend what was fed (the
+    recognizer revised earlier words, or the final was trimmed) it is scanned from
+    scratch and the update is the difference between the two span sets.
+    """
+    if detector.continues(text, full=final):
+        return detector.feed(text[detector.length :]), detector
+    fresh = error_service.IncrementalDetector(detector.snapshot)
+    fresh.feed(text)
+    before = {_error_key(error): error for error in detector.errors}
+    after = {_error_key(error): error for error in fresh.errors}
+    update = error_service.ErrorUpdate(
+        added=[error for key, error in after.items() if key not in before],
+        removed=[error for key, error in before.items() if key not in after],
+    )
+    return update, fresh
+
+
+def _serialize_error(error: error_service.DetectedError) -> dict[str, Any]:
+    return {
+        "start": error.start,
+        "end": error.end,
+        "category": error.category.value,
+        "user_text": error.user_text,
+        "corrected_text": error.corrected_text,
+        "note": error.note,
+    }
+
+
+class CallPipeline:
+    """One voice call; feed it with ``push_audio``/``end_turn`` and drive it with ``run``."""
+
+    def __init__(
+        self,
+        stt: SpeechToText,
+        llm: LLMClient,
+        system_prompt: str,
+        sizes: QueueSizes | None = None,
+        metrics: HistogramRegistry | None = None,
+        history_window: int | None = None,
+    ):
+        sizes = sizes or QueueSizes()
+        self.stt = stt
+        self.llm = llm
+        # Messages sent after the system prompt, the current one included (HISTORY_WINDOW).
+        self.history_window = (
+            get_settings().history_window if history_window is None else history_window
+        )
+        self.metrics = metrics or HistogramRegistry(parent=call_metrics)
+        self.history: list[HistoryMessage] = [{"role": "system", "content": system_prompt}]
+        # Audio blocks the reader (no silent gaps in speech); partial transcripts and
+        # partial frames are superseded by the next one, so the oldest can be shed.
+        self.audio: BoundedQueue[bytes | _EndTurn] = BoundedQueue(
+            "audio", sizes.audio, DropPolicy.BLOCK, self.metrics
+        )
+        self.transcripts: BoundedQueue[tuple[Transcript, float]] = BoundedQueue(
+            "transcripts", sizes.transcripts, DropPolicy.DROP_OLDEST, self.metrics
+        )
+        self.turns: BoundedQueue[_Turn] = BoundedQueue(
+            "turns", sizes.turns, DropPolicy.BLOCK, self.metrics
+        )
+        # Outbound items carry the end-of-turn timestamp on the frame that closes a turn.
+        self.outbound: BoundedQueue[tuple[Frame, float | None]] = BoundedQueue(
+            "outbound", sizes.outbound, DropPolicy.DROP_OLDEST, self.metrics
+        )
+
+    # -- input side -----------------------------------------------------------------
+
+    async def push_audio(self, frame: bytes) -> None:
+        await self.audio.put(frame)
+
+    async def end_turn(self) -> None:
+        await self.audio.put(_EndTurn(time.perf_counter()))
+
+    async def close_input(self) -> None:
+        await self.audio.close()
+
+    async def _emit(
+        self, frame: Frame, droppable: bool = False, turn_started: float | None = None
+    ) -> None:
+        await self.outbound.put((frame, turn_started), droppable=droppable)
+
+    # -- stages ---------------------------------------------------------------------
+
+    async def _stt_stage(self) -> None:
+        try:
+            while True:
+                item = await self.audio.get()
+                if isinstance(item, _EndTurn):
+                    transcript = await self.stt.end_utterance()
+                    await self.transcripts.put((transcript, item.received_at))
+                    continue
+                started = time.perf_counter()
+                transcript = await self.stt.feed(item)
+                self.metrics.observe("stt", time.perf_counter() - started)
+                if transcript is not None:
+                    await self.transcripts.put((transcript, started), droppable=True)
+        except QueueClosed:
+            pass
+        finally:
+            await self.transcripts.close()
+
+    async def _detect_stage(self) -> None:
+        detector = error_service.IncrementalDetector()
+        try:
+            while True:
+                transcript, ended_at = await self.transcripts.get()
+                started = time.perf_counter()
+                update, detector = _detect_delta(detector, transcript.text, transcript.final)
+                self.metrics.observe("detect", time.perf_counter() - started)
+                event = "final" if transcript.final else "partial"
+                await self._emit(
+                    {"event": event, "utterance": transcript.utterance, "text": transcript.text},
+                    droppable=not transcript.final,
+                )
+                if update.added or update.removed:
+                    frame: Frame = {
+                        "event": "errors",
+                        "utterance": transcript.utterance,
+                        "detected_errors": [_serialize_error(error) for error in update.added],
+                    }
+                    if update.removed:
+                        frame["retracted"] = [_serialize_error(error) for error in update.removed]
+                    await self._emit(frame)
+                if transcript.final:
+                    detector = error_service.IncrementalDetector(detector.snapshot)
+                    if transcript.text:
+                        await self.turns.put(_Turn(transcript, ended_at))
+        except QueueClosed:
+            pass
+        finally:
+            await self.turns.close()
+
+    async def _llm_stage(self) -> None:
+        try:
+            while True:
+                turn = await self.turns.get()
+                utterance = turn.transcript.utterance
+                self.history.append({"role": "user", "content": turn.transcript.text})
+                keep = max(self.history_window - 1, 0)
+                previous = self.history[1:-1][-keep:] if keep else []
+                window = [self.history[0], *previous, self.history[-1]]
+                started = time.perf_counter()
+                parts: list[str] = []
+                async for chunk in self.llm.stream_reply(window):
+                    if not parts:
+                        self.metrics.observe("llm_first_token", time.perf_counter() - started)
+                    parts.append(chunk)
+                    # Blocking put: a slow client throttles how fast the reply is pulled.
+                    await self._emit({"event": "token", "utterance": utterance, "text": chunk})
+                reply = "".join(parts)
+                self.metrics.observe("llm_reply", time.perf_counter() - started)
+                self.history.append({"role": "assistant", "content": reply})
+                await self._emit(
+                    {"event": "reply", "utterance": utterance, "text": reply},
+                    turn_started=turn.ended_at,
+                )
+        except QueueClosed:
+            pass
+        finally:
+            await self.outbound.close()
+
+    async def _send_stage(self, send: Callable[[Frame], Awaitable[None]]) -> None:
+        try:
+            while True:
+                frame, turn_started = await self.outbound.get()
+                started = time.perf_counter()
+                await send(frame)
+                self.metrics.observe("send", time.perf_counter() - started)
+                if turn_started is not None:
+                    self.metrics.observe("turn", time.perf_counter() - turn_started)
+        except QueueClosed:
+            pass
+
+    async def run(self, send: Callable[[Frame], Awaitable[None]]) -> None:
+        """Run every stage until the input is closed and all output has been sent."""
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._stt_stage())
+            group.create_task(self._detect_stage())
+            group.create_task(self._llm_stage())
+            group.create_task(self._send_stage(send))
+
+    def stats(self) -> dict[str, Any]:
+        queues = (self.audio, self.transcripts, self.turns, self.outbound)
+        return {
+            **self.metrics.snapshot(),
+            "queues": {
+                queue.name: {
+                    "maxsize": queue.maxsize,
+                    "policy": queue.policy.value,
+                    "dropped": queue.dropped,
+                    "blocked": queue.blocked,
+                }
+                for queue in queues
+            },
+        }
@@ -0,0 +1,69 @@
+"""Pluggable speech-to-text stage for the voice pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Transcript:
+    utterance: int
+    text: str
+    final: bool = False
+
+
+class SpeechToText(ABC):
+    """Streaming recognizer: audio frames in, growing transcripts out."""
+
+    @abstractmethod
+    async def feed(self, audio: bytes) -> Transcript | None:  # pragma: no cover - interface
+        """Consume one audio frame; return the updated partial transcript, if any."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def end_utterance(self) -> Transcript:  # pragma: no cover - interface
+        """Close the current utterance and return its final transcript."""
+        raise NotImplementedError
+
+
+class StubSpeechToText(SpeechToText):
+    """Deterministic offline recognizer for dev and tests: frames carry UTF-8 text."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self._utterance = 0
+        self._parts: list[str] = []
+
+    async def feed(self, audio: bytes) -> Transcript | None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        chunk = audio.decode("utf-8", errors="replace")
+        if not chunk:
+            return None
+        self._parts.append(chunk)
+        return Transcript(self._utterance, "".join(self._parts))
+
+    async def end_utterance(self) -> Transcript:
+        transcript = Transcript(self._utterance, "".join(self._parts).strip(), final=True)
+        self._utterance += 1
+        self._parts = []
+        return transcript
+
+
+_providers: dict[str, Callable[[], SpeechToText]] = {"stub": StubSpeechToText}
+
+
+def register_stt(name: str, factory: Callable[[], SpeechToText]) -> None:
+    _providers[name] = factory
+
+
+def get_stt(name: str) -> SpeechToText:
+    """Build a fresh recognizer (one per call, since recognizers are stateful)."""
+    try:
+        factory = _providers[name]
+    except KeyError:
+        raise ValueError(f"unknown STT provider {name!r}") from None
+    return factory()
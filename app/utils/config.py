@@ -18,12 +18,64 @@ class Settings(BaseModel):
     backend_host: str = Field(default="0.0.0.0", alias="BACKEND_HOST")
     backend_port: int = Field(default=8000, alias="BACKEND_PORT")
     database_url: str = Field(default="sqlite:///./data.db", alias="DATABASE_URL")
+    async_database_url: str | None = Field(default=None, alias="ASYNC_DATABASE_URL")
+    sqlite_profile: Literal["default", "performance"] = Field(
+        default="performance", alias="SQLITE_PROFILE"
+    )
+    sqlite_busy_timeout_ms: int = Field(default=5000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_size: int = Field(default=256 * 1024 * 1024, alias="SQLITE_MMAP_SIZE")
+    sqlite_cache_size_kib: int = Field(default=64 * 1024, alias="SQLITE_CACHE_SIZE_KIB")
+    db_read_pool_size: int = Field(default=8, alias="DB_READ_POOL_SIZE")
+    db_startup_mode: Literal["auto", "check"] = Field(default="auto", alias="DB_STARTUP_MODE")
     default_llm_provider: Literal["simple_mock", "ollama", "openai"] = Field(
         default="simple_mock", alias="DEFAULT_LLM_PROVIDER"
     )
     default_llm_model: str = Field(default="mock-1", alias="DEFAULT_LLM_MODEL")
+    # Comma-separated for several Ollama instances (see app/services/llm/balancer.py).
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
+    ollama_balancer: Literal["ewma", "least_outstanding", "round_robin"] = Field(
+        default="ewma", alias="OLLAMA_BALANCER"
+    )
+    ollama_sticky_sessions: bool = Field(default=False, alias="OLLAMA_STICKY_SESSIONS")
+    ollama_health_interval: float = Field(default=10.0, alias="OLLAMA_HEALTH_INTERVAL")
+    ollama_eject_failures: int = Field(default=3, alias="OLLAMA_EJECT_FAILURES")
+    ollama_eject_seconds: float = Field(default=30.0, alias="OLLAMA_EJECT_SECONDS")
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
+    openai_base_url: str = Field(default="https://api.openai.com/v1", alias="OPENAI_BASE_URL")
+    llm_timeout_seconds: float = Field(default=15.0, alias="LLM_TIMEOUT_SECONDS")
+    llm_http_max_connections: int = Field(default=100, alias="LLM_HTTP_MAX_CONNECTIONS")
+    llm_http_max_keepalive: int = Field(default=20, alias="LLM_HTTP_MAX_KEEPALIVE")
+    llm_http_keepalive_expiry: float = Field(default=30.0, alias="LLM_HTTP_KEEPALIVE_EXPIRY")
+    llm_http2: bool = Field(default=False, alias="LLM_HTTP2")
+    llm_reply_cache_size: int = Field(default=512, alias="LLM_REPLY_CACHE_SIZE")
+    llm_reply_cache_ttl: float = Field(default=3600.0, alias="LLM_REPLY_CACHE_TTL")
+    llm_reply_cache_window: int = Field(default=2, alias="LLM_REPLY_CACHE_WINDOW")
+    llm_reply_cache_path: str | None = Field(default=None, alias="LLM_REPLY_CACHE_PATH")
+    llm_single_flight: bool = Field(default=True, alias="LLM_SINGLE_FLIGHT")
+    llm_max_concurrency: int = Field(default=8, alias="LLM_MAX_CONCURRENCY")
+    llm_queue_size: int = Field(default=32, alias="LLM_QUEUE_SIZE")
+    llm_queue_timeout: float = Field(default=5.0, alias="LLM_QUEUE_TIMEOUT")
+    llm_breaker_failures: int = Field(default=5, alias="LLM_BREAKER_FAILURES")
+    llm_breaker_reset_seconds: float = Field(default=30.0, alias="LLM_BREAKER_RESET_SECONDS")
+    llm_timeout_floor_seconds: float = Field(default=2.0, alias="LLM_TIMEOUT_FLOOR_SECONDS")
+    llm_timeout_p95_multiplier: float = Field(default=3.0, alias="LLM_TIMEOUT_P95_MULTIPLIER")
+    llm_timeout_min_samples: int = Field(default=20, alias="LLM_TIMEOUT_MIN_SAMPLES")
+    history_window: int = Field(default=6, alias="HISTORY_WINDOW")
+    history_token_budget: int = Field(default=3000, alias="HISTORY_TOKEN_BUDGET")
+    history_cache_sessions: int = Field(default=1024, alias="HISTORY_CACHE_SESSIONS")
+    summary_every_turns: int = Field(default=3, alias="SUMMARY_EVERY_TURNS")
+    summary_max_tokens: int = Field(default=200, alias="SUMMARY_MAX_TOKENS")
+    settings_cache_ttl: float = Field(default=5.0, alias="SETTINGS_CACHE_TTL")
+    error_rules_path: str | None = Field(default=None, alias="ERROR_RULES_PATH")
+    error_rules_reload_interval: float = Field(default=2.0, alias="ERROR_RULES_RELOAD_INTERVAL")
+    stt_provider: str = Field(default="stub", alias="STT_PROVIDER")
+    call_audio_queue_size: int = Field(default=64, alias="CALL_AUDIO_QUEUE_SIZE")
+    call_transcript_queue_size: int = Field(default=8, alias="CALL_TRANSCRIPT_QUEUE_SIZE")
+    call_outbound_queue_size: int = Field(default=128, alias="CALL_OUTBOUND_QUEUE_SIZE")
+    job_workers: int = Field(default=2, alias="JOB_WORKERS")
+    job_poll_interval: float = Field(default=1.0, alias="JOB_POLL_INTERVAL")
+    job_lease_seconds: float = Field(default=60.0, alias="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(default=3, alias="JOB_MAX_ATTEMPTS")
     cors_origins: list[str] = Field(default_factory=lambda: ["http://localhost:8000"])
 
     @field_validator("cors_origins", mode="before")
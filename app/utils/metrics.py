@@ -0,0 +1,132 @@
+"""Small in-process latency histograms (no external metrics backend)."""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+# Upper bounds in milliseconds; anything slower lands in the overflow bucket.
+DEFAULT_BUCKETS_MS: tuple[float, ...] = (
+    1,
+    2,
+    5,
+    10,
+    20,
+    50,
+    100,
+    200,
+    500,
+    1_000,
+    2_000,
+    5_000,
+    10_000,
+    30_000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; quantiles are reported as the bucket's upper bound."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        value_ms = seconds * 1000.0
+        with self._lock:
+            self._counts[bisect_left(self.buckets_ms, value_ms)] += 1
+            self._count += 1
+            self._sum_ms += value_ms
+            self._max_ms = max(self._max_ms, value_ms)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound (ms) of the bucket holding the ``q`` quantile; ``None`` when empty."""
+        with self._lock:
+            if not self._count:
+                return None
+            rank = q * self._count
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank and bucket_count:
+                    if index < len(self.buckets_ms):
+                        return float(self.buckets_ms[index])
+                    return self._max_ms
+            return self._max_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"le_{bound:g}" for bound in self.buckets_ms] + ["inf"]
+            pairs = zip(labels, self._counts, strict=True)
+            buckets = {label: count for label, count in pairs if count}
+            count, sum_ms, max_ms = self._count, self._sum_ms, self._max_ms
+        return {
+            "count": count,
+            "mean_ms": round(sum_ms / count, 3) if count else 0.0,
+            "max_ms": round(max_ms, 3),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class HistogramRegistry:
+    """Named histograms plus counters, created on first use."""
+
+    def __init__(self, parent: HistogramRegistry | None = None):
+        self.parent = parent
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.histogram(name).observe(seconds)
+        if self.parent is not None:
+            self.parent.observe(name, seconds)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+        if self.parent is not None:
+            self.parent.incr(name, amount)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            "histograms": {name: histograms[name].snapshot() for name in sorted(histograms)},
+            "counters": dict(sorted(counters.items())),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
@@ -1 +1 @@
-"""WebSocket stubs for future voice mode."""
+"""WebSocket endpoints for voice calls and flashcard review streams."""
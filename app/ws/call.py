@@ -1,23 +1,135 @@
+"""Voice call WebSocket.
+
+Client → server: binary frames are audio for the configured STT provider (the ``stub``
+provider reads them as UTF-8 text); ``{"event": "end_turn"}`` closes the utterance and
+asks for a reply; ``{"event": "hangup"}`` ends the call once pending output is sent.
+
+Server → client: ``start``, ``partial`` (droppable), ``final``, ``errors`` (spans new or
+changed since the last partial, plus ``retracted`` spans that no longer apply), ``token``
+per reply chunk, ``reply``, and ``end`` with the call's per-stage latency histograms and
+queue counters.
+"""
+
 from __future__ import annotations
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+import json
+from collections.abc import Awaitable
+from contextlib import suppress
+from typing import TypeVar
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repo import async_dao
+from app.repo.db import get_async_db
+from app.services.llm import registry
+from app.services.llm.balancer import sticky
+from app.services.voice.pipeline import CallPipeline, QueueSizes
+from app.services.voice.stt import get_stt
+from app.utils.config import get_settings
+from app.utils.logger import get_logger
 
 router = APIRouter()
+runtime_config = get_settings()
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_DEFAULT_PROMPT = (
+    "You are a patient English tutor on a voice call. Keep replies short and spoken-style, "
+    "and gently correct mistakes."
+)
+
+
+async def _system_prompt(db: AsyncSession, session_id: str | None) -> str:
+    if session_id:
+        session = await async_dao.get_session(db, session_id)
+        if session and session.system_prompt:
+            return session.system_prompt
+    return _DEFAULT_PROMPT
+
+
+class _PipelineExited(Exception):
+    """The pipeline stopped while the call was waiting on the client or on a queue."""
+
+
+async def _unless_exited(runner: asyncio.Task, awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable`` unless ``runner`` finishes first.
+
+    A failed stage stops the pipeline; without this the call would keep waiting for a
+    client message (or for room in the audio queue) that nothing is going to consume.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        await asyncio.wait({task, runner}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    if task.cancelled():
+        raise _PipelineExited
+    return task.result()
 
 
 @router.websocket("/ws/call")
-async def call_stub(websocket: WebSocket):
+async def call(
+    websocket: WebSocket,
+    session_id: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
     await websocket.accept()
-    await websocket.send_json({"event": "start", "message": "voice mode stub"})
+    settings_row = await async_dao.get_cached_settings(db)
+    pipeline = CallPipeline(
+        stt=get_stt(runtime_config.stt_provider),
+        llm=registry.get_llm(settings_row, config=runtime_config),
+        system_prompt=await _system_prompt(db, session_id),
+        sizes=QueueSizes(
+            audio=runtime_config.call_audio_queue_size,
+            transcripts=runtime_config.call_transcript_queue_size,
+            outbound=runtime_config.call_outbound_queue_size,
+        ),
+        history_window=runtime_config.history_window,
+    )
+    await db.close()
+    await websocket.send_json({"event": "start", "stt": runtime_config.stt_provider})
+    with sticky(session_id):  # the pipeline task keeps the routing key
+        runner = asyncio.create_task(pipeline.run(websocket.send_json))
+    connected = True
     try:
         while True:
-            payload = await websocket.receive_text()
-            await websocket.send_json({"event": "partial", "echo": payload})
+            message = await _unless_exited(runner, websocket.receive())
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes") is not None:
+                await _unless_exited(runner, pipeline.push_audio(message["bytes"]))
+                continue
+            try:
+                event = json.loads(message.get("text") or "{}").get("event")
+            except (json.JSONDecodeError, AttributeError):
+                event = None
+            if event == "end_turn":
+                await _unless_exited(runner, pipeline.end_turn())
+            elif event == "hangup":
+                break
     except WebSocketDisconnect:
+        connected = False
+    except _PipelineExited:
         pass
     finally:
-        try:
-            await websocket.send_json({"event": "final", "message": "call ended"})
-        except RuntimeError:
-            pass
-        await websocket.close()
+        await pipeline.close_input()
+    if not connected:
+        runner.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await runner
+        return
+    try:
+        await runner
+    except Exception:
+        logger.exception("Call pipeline failed")
+        await websocket.close(code=1011)
+        return
+    await websocket.send_json({"event": "end", "stats": pipeline.stats()})
+    await websocket.close()
@@ -0,0 +1,105 @@
+"""Flashcard review stream.
+
+Protocol (JSON messages):
+
+- server → ``{"event": "cards", "items": [...], "applied": n}``: the next batch of due
+  cards; ``applied`` counts grades written since the previous batch.
+- client → ``{"event": "review", "card_id": "...", "quality": 0..5}`` for each card, sent
+  without waiting for a reply.
+- client → ``{"event": "finish"}`` to stop early.
+- server → ``{"event": "error", "detail": "..."}`` for a message it cannot apply (binary
+  frame, not JSON, unknown event, bad grade, card not served); the session carries on.
+- server → ``{"event": "done", "reviewed": n, "delivered": n}`` once the queue is drained
+  or the client finished; grades are always persisted before the socket closes.
+"""
+
+from __future__ import annotations
+
+import json
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repo import models
+from app.repo.db import get_async_db, get_async_read_db
+from app.schemas.flashcard import FlashcardReviewItem
+from app.services.review_session import ReviewStream
+
+router = APIRouter()
+
+
+def _card_payload(card: models.Flashcard) -> dict:
+    return {
+        "id": card.id,
+        "front": card.front,
+        "back": card.back,
+        "due_at": card.due_at.isoformat(),
+        "reps": card.reps,
+        "interval": card.interval,
+        "ease": float(card.ease),
+    }
+
+
+async def _send_batch(websocket: WebSocket, stream: ReviewStream, applied: int) -> None:
+    cards = await stream.next_batch()
+    if cards:
+        await websocket.send_json(
+            {"event": "cards", "items": [_card_payload(card) for card in cards], "applied": applied}
+        )
+
+
+@router.websocket("/ws/review")
+async def review_stream(
+    websocket: WebSocket,
+    batch_size: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+):
+    await websocket.accept()
+    stream = ReviewStream(db, read_db, batch_size)
+    connected = True
+    try:
+        await _send_batch(websocket, stream, applied=0)
+        while not stream.finished:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("text") is None:
+                await websocket.send_json({"event": "error", "detail": "expected a text frame"})
+                continue
+            try:
+                message = json.loads(frame["text"])
+            except json.JSONDecodeError:
+                await websocket.send_json({"event": "error", "detail": "message is not JSON"})
+                continue
+            event = message.get("event") if isinstance(message, dict) else None
+            if event == "finish":
+                break
+            if event != "review":
+                await websocket.send_json({"event": "error", "detail": f"unknown event {event!r}"})
+                continue
+            try:
+                review = FlashcardReviewItem.model_validate(message)
+            except ValidationError as exc:
+                detail = "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+                )
+                await websocket.send_json({"event": "error", "detail": detail})
+                continue
+            if not stream.add_review(review.card_id, review.quality):
+                await websocket.send_json(
+                    {"event": "error", "detail": "card was not served in this session"}
+                )
+                continue
+            if stream.needs_refill:
+                await _send_batch(websocket, stream, applied=await stream.flush())
+    except WebSocketDisconnect:
+        connected = False
+    finally:
+        await stream.close()
+    if connected:
+        await websocket.send_json(
+            {"event": "done", "reviewed": stream.reviewed, "delivered": stream.delivered}
+        )
+        await websocket.close()
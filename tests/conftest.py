@@ -1,6 +1,94 @@
 import sys
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import Engine, create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.main import create_app  # noqa: E402
+from app.repo import dao, models  # noqa: E402
+from app.repo.db import Base, get_async_db, get_async_read_db, get_db, get_read_db  # noqa: E402
+
+
+@dataclass
+class AppDB:
+    """A fresh SQLite file, sync and async session factories and an app bound to them."""
+
+    url: str
+    engine: Engine
+    factory: sessionmaker
+    async_engine: AsyncEngine
+    async_factory: async_sessionmaker
+    app: FastAPI
+
+    @property
+    def engines(self) -> tuple[Engine, Engine]:
+        """Both engines, for ``query_counter`` to listen on."""
+        return self.engine, self.async_engine.sync_engine
+
+    def client(self) -> TestClient:
+        return TestClient(self.app)
+
+
+@pytest.fixture
+def make_app(tmp_path) -> Iterator[Callable[..., AppDB]]:
+    """Build an :class:`AppDB`; ``overrides`` picks which DB dependencies point at it.
+
+    ``"async"`` overrides ``get_async_db``/``get_async_read_db`` and ``"sync"`` overrides
+    ``get_db``/``get_read_db``. ``seed`` adds the default user, settings and the
+    "travel" topic.
+    """
+    engines: list[Engine] = []
+
+    def _make(overrides: Iterable[str] = ("async",), seed: bool = True) -> AppDB:
+        url = f"sqlite:///{tmp_path / f'app{len(engines)}.db'}"
+        engine = create_engine(url, future=True)
+        engines.append(engine)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, future=True, expire_on_commit=False)
+        if seed:
+            with factory() as db:
+                dao.ensure_default_user(db)
+                dao.get_settings(db)
+                db.add(models.PracticeTopic(code="travel", label="Travel", description="Trips"))
+                db.commit()
+        async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        async_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        def _db():
+            with factory() as db:
+                yield db
+
+        async def _async_db():
+            async with async_factory() as db:
+                yield db
+
+        app = create_app()
+        for kind in overrides:
+            if kind == "sync":
+                app.dependency_overrides[get_db] = _db
+                app.dependency_overrides[get_read_db] = _db
+            elif kind == "async":
+                app.dependency_overrides[get_async_db] = _async_db
+                app.dependency_overrides[get_async_read_db] = _async_db
+            else:
+                raise ValueError(f"unknown override {kind!r}")
+        return AppDB(url, engine, factory, async_engine, async_factory, app)
+
+    yield _make
+    for engine in engines:
+        engine.dispose()
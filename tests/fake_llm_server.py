@@ -0,0 +1,128 @@
+"""Tiny threaded HTTP server that mimics the Ollama and OpenAI chat endpoints."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer:
+    """Serve canned replies, optionally streamed with a delay between chunks.
+
+    ``latency`` delays the first byte, ``chunk_delay`` spaces out streamed chunks and
+    ``status`` lets tests simulate an unhealthy backend. ``parallel`` caps how many
+    requests are generated at once (like ``OLLAMA_NUM_PARALLEL``); the rest wait.
+    ``drop_after`` cuts a stream off after that many chunks, without the final marker.
+    """
+
+    def __init__(
+        self,
+        chunks: list[str] | None = None,
+        latency: float = 0.0,
+        chunk_delay: float = 0.0,
+        status: int = 200,
+        parallel: int | None = None,
+        drop_after: int | None = None,
+    ):
+        self.chunks = chunks or ["Hello", " there", "!"]
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.status = status
+        self.drop_after = drop_after
+        self._slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> FakeLLMServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, *args) -> None:
+                return
+
+            def do_GET(self) -> None:
+                self._send_json({"models": []})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                if fake._slots is not None:
+                    with fake._slots:
+                        time.sleep(fake.latency)
+                elif fake.latency:
+                    time.sleep(fake.latency)
+                if fake.status != 200:
+                    self._send_json({"error": "unavailable"}, status=fake.status)
+                    return
+                openai = self.path.endswith("/chat/completions")
+                if not body.get("stream"):
+                    text = "".join(fake.chunks)
+                    if openai:
+                        self._send_json({"choices": [{"message": {"content": text}}]})
+                    else:
+                        self._send_json({"response": text, "done": True})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for index, chunk in enumerate(fake.chunks):
+                    if index == fake.drop_after:
+                        self.close_connection = True
+                        return
+                    if index and fake.chunk_delay:
+                        time.sleep(fake.chunk_delay)
+                    if openai:
+                        event = {"choices": [{"delta": {"content": chunk}}]}
+                        self._write_chunk(f"data: {json.dumps(event)}\n\n")
+                    else:
+                        self._write_chunk(json.dumps({"response": chunk, "done": False}) + "\n")
+                if openai:
+                    self._write_chunk("data: [DONE]\n\n")
+                else:
+                    self._write_chunk(json.dumps({"response": "", "done": True}) + "\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def _write_chunk(self, text: str) -> None:
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, payload: dict, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
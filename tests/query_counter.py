@@ -0,0 +1,43 @@
+"""Count SQL statements issued while a block runs, to pin per-endpoint query budgets."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryLog(list):
+    """Statements captured by ``count_queries``; ``len()`` is the query count."""
+
+    def selects(self) -> list[str]:
+        return [statement for statement in self if statement.lstrip().upper().startswith("SELECT")]
+
+    def dump(self) -> str:
+        return "\n".join(f"{index:>3}: {statement}" for index, statement in enumerate(self, 1))
+
+
+@contextmanager
+def count_queries(*engines: Engine) -> Iterator[QueryLog]:
+    """Record every statement sent on ``engines`` (pass ``AsyncEngine.sync_engine``)."""
+    log = QueryLog()
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        log.append(" ".join(statement.split()))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        yield log
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _capture)
+
+
+@contextmanager
+def assert_max_queries(budget: int, *engines: Engine) -> Iterator[QueryLog]:
+    with count_queries(*engines) as log:
+        yield log
+    assert len(log) <= budget, f"{len(log)} queries, budget {budget}:\n{log.dump()}"
@@ -0,0 +1,174 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from alembic.config import Config
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from alembic import command
+from app.repo import aggregates, dao, models
+from app.repo.db import Base
+from app.services.evaluation.errors import detect_errors
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'aggregates.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, future=True, expire_on_commit=False)
+
+
+def _play_session(db, user, topic, texts):
+    session = dao.create_session(db, user, topic, "prompt")
+    session.started_at = datetime.now(tz=UTC) - timedelta(minutes=30)
+    for text in texts:
+        message = dao.append_message(db, session, models.MessageRole.USER, text)
+        dao.save_error_spans(db, message, detect_errors(text))
+    return session
+
+
+def test_write_paths_keep_aggregates_equal_to_a_full_rebuild(tmp_path):
+    factory = _session_factory(tmp_path)
+    db = factory()
+    user = dao.ensure_default_user(db)
+    topic = models.PracticeTopic(code="travel", label="Travel", description="Trips")
+    db.add(topic)
+    first = _play_session(db, user, topic, ["I am agree", "The peoples were kind"])
+    second = _play_session(db, user, topic, ["I am agree again", "More better"])
+    dao.mark_session_finished(db, first)
+    dao.mark_session_finished(db, first)  # finishing twice must not double count
+    dao.record_metric_snapshot(db, user, first, 10, 2, 80.0, models.CEFRLevel.B1)
+    card = dao.create_manual_flashcard(db, "front", "back")
+    dao.update_flashcard_state(db, card, 1, 1, 2.5, datetime.now(tz=UTC))
+    db.commit()
+
+    stored = aggregates.get_aggregates(db, user.id)
+    assert stored.conversations == 1
+    assert stored.words_learned == 3
+    assert stored.cards_reviewed == 1
+    assert stored.latest_cefr == models.CEFRLevel.B1
+    assert abs(stored.study_seconds - 1800) < 60
+
+    dao.mark_session_finished(db, second)
+    db.commit()
+    summary = dao.get_dashboard_summary(db)
+    assert summary["conversations"] == 2
+    assert summary["words_learned"] == 3
+    assert summary["fluency_level"] == "Intermediate"
+    assert abs(summary["study_time_hours"] - 1.0) < 0.05
+
+    changes = aggregates.rebuild_aggregates(db)
+    before, after = changes[user.id]
+    assert before.conversations == after.conversations
+    assert before.words_learned == after.words_learned
+    assert before.cards_reviewed == after.cards_reviewed
+    assert before.latest_cefr == after.latest_cefr
+    assert abs(before.study_seconds - after.study_seconds) < 1e-6
+    db.close()
+
+
+def test_rolled_back_events_leave_aggregates_untouched(tmp_path):
+    factory = _session_factory(tmp_path)
+    db = factory()
+    user = dao.ensure_default_user(db)
+    topic = models.PracticeTopic(code="travel", label="Travel", description="Trips")
+    db.add(topic)
+    session = _play_session(db, user, topic, ["I am agree"])
+    db.commit()
+    dao.mark_session_finished(db, session)
+    db.rollback()
+    assert aggregates.get_aggregates(db, user.id).conversations == 0
+    db.close()
+
+
+def test_dashboard_summary_does_not_touch_history_tables(tmp_path):
+    factory = _session_factory(tmp_path)
+    db = factory()
+    dao.ensure_default_user(db)
+    db.commit()
+    engine = db.get_bind()
+    statements: list[str] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        dao.get_dashboard_summary(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    joined = " ".join(statements)
+    for table in ("sessions", "error_spans", "metric_snapshots", "messages"):
+        assert f"FROM {table}" not in joined
+    db.close()
+
+
+def test_dashboard_uses_the_newest_cefr_and_counts_words_once(tmp_path):
+    factory = _session_factory(tmp_path)
+    db = factory()
+    learner = dao.ensure_default_user(db)
+    other = models.User(nickname="other")
+    topic = models.PracticeTopic(code="travel", label="Travel", description="Trips")
+    db.add_all([other, topic])
+    first = _play_session(db, learner, topic, ["I am agree"])
+    dao.record_metric_snapshot(db, learner, first, 10, 2, 80.0, models.CEFRLevel.A2)
+    second = _play_session(db, other, topic, ["I am agree"])
+    dao.record_metric_snapshot(db, other, second, 10, 0, 100.0, models.CEFRLevel.C1)
+    # Touches the learner's row after the other user's CEFR was measured.
+    card = dao.create_manual_flashcard(db, "front", "back")
+    dao.update_flashcard_state(db, card, 1, 1, 2.5, datetime.now(tz=UTC))
+    db.commit()
+
+    summary = dao.get_dashboard_summary(db)
+    assert summary["fluency_level"] == "Advanced"
+    assert summary["words_learned"] == 1  # the same text for both users
+    db.close()
+
+
+SESSION_COUNTERS = tuple(
+    f"{name} INTEGER NOT NULL DEFAULT 0"
+    for name in (
+        "summary_turn",
+        "turn_count",
+        "history_tokens",
+        "prompt_tokens_sent",
+        "prompt_tokens_full",
+    )
+)
+
+
+def test_migration_backfills_existing_history(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}", future=True)
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "0003_hot_path_indexes")
+        Base.metadata.create_all(bind=connection)
+        # Session columns added by later migrations, so the current models can write.
+        for column in ("summary TEXT", "summary_until DATETIME", *SESSION_COUNTERS):
+            connection.exec_driver_sql(f"ALTER TABLE sessions ADD COLUMN {column}")
+    factory = sessionmaker(bind=engine, future=True, expire_on_commit=False)
+    db = factory()
+    user = dao.ensure_default_user(db)
+    topic = models.PracticeTopic(code="travel", label="Travel", description="Trips")
+    db.add(topic)
+    _play_session(db, user, topic, ["I am agree", "The peoples were kind"])
+    db.commit()
+    db.execute(models.UserLearnedWord.__table__.delete())
+    db.execute(models.UserAggregate.__table__.delete())
+    db.commit()
+    db.close()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE user_learned_words")
+        connection.exec_driver_sql("DROP TABLE user_aggregates")
+        config.attributes["connection"] = connection
+        command.upgrade(config, "0004_user_aggregates")
+
+    db = factory()
+    table = models.UserAggregate
+    row = db.execute(select(table.user_id, table.words_learned, table.conversations)).one()
+    assert tuple(row) == (user.id, 2, 0)
+    db.close()
+    engine.dispose()
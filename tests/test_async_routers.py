@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import anyio
+import httpx
+
+from app.repo import async_dao, models
+from app.services.jobs import run_pending
+from app.services.llm import registry
+from app.services.llm.simple_mock import SimpleMockClient
+
+
+def test_async_dao_wraps_sync_queries(make_app):
+    factory = make_app().async_factory
+
+    async def scenario():
+        async with factory() as db:
+            user = await async_dao.ensure_default_user(db)
+            topic = await async_dao.get_practice_topic_by_code(db, "travel")
+            session = await async_dao.create_session(db, user, topic, "prompt")
+            await async_dao.append_message(db, session, models.MessageRole.USER, "hi")
+            await db.commit()
+            messages = await async_dao.list_session_messages(db, session.id)
+            return [message.text for message in messages]
+
+    assert asyncio.run(scenario()) == ["hi"]
+
+
+def test_practice_flow_through_async_routers(make_app):
+    env = make_app()
+    app, sync_factory = env.app, env.factory
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post("/api/sessions", json={"topic_code": "travel"})
+            session_id = created.json()["session_id"]
+            chat = await client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree"})
+            assert chat.status_code == 200
+            finished = await client.post(f"/api/sessions/{session_id}/finish")
+            job_id = finished.json()["job_id"]
+            assert finished.json()["job_status"] == "queued"
+            assert await asyncio.to_thread(run_pending, sync_factory) == 1
+            job = (await client.get(f"/api/jobs/{job_id}")).json()
+            assert job["status"] == "succeeded"
+            assert job["result"]["flashcards_created"] == 1
+            quizzes = (await client.get(f"/api/quiz/by-session/{session_id}")).json()["items"]
+            assert quizzes
+            for quiz in quizzes:
+                answer = await client.post(
+                    f"/api/quiz/{quiz['id']}/answer", json={"choice": "x", "latency_ms": 5}
+                )
+                assert answer.status_code == 200
+            assert answer.json()["report_ready"] is True
+            manual = await client.post("/api/flashcards/manual", json={"front": "a", "back": "b"})
+            assert manual.status_code == 201
+            due = (await client.get("/api/flashcards/due")).json()
+            review = await client.post(
+                f"/api/flashcards/{due[0]['id']}/review", json={"quality": 4}
+            )
+            assert review.status_code == 200
+            missing = await client.post("/api/sessions/unknown/finish")
+            assert missing.status_code == 404
+
+    asyncio.run(scenario())
+
+
+def test_async_routes_do_not_need_the_threadpool(make_app):
+    app = make_app().app
+
+    async def scenario() -> float:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 1
+        # Park the only worker thread; sync routes would now queue behind it.
+        blocker = asyncio.ensure_future(anyio.to_thread.run_sync(time.sleep, 1.0))
+        await asyncio.sleep(0.05)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.perf_counter()
+            created = await client.post("/api/sessions", json={"topic_code": "travel"})
+            session_id = created.json()["session_id"]
+            responses = await asyncio.gather(
+                *(client.get(f"/api/quiz/by-session/{session_id}") for _ in range(20)),
+                *(client.get("/api/flashcards/due") for _ in range(20)),
+            )
+            elapsed = time.perf_counter() - started
+        assert all(response.status_code == 200 for response in responses)
+        await blocker
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.9
+
+
+class SlowClient(SimpleMockClient):
+    async def areply(self, history):
+        await asyncio.sleep(0.3)
+        return self.reply(history)
+
+
+def test_concurrent_turns_do_not_hold_the_writer_during_the_llm_call(make_app, monkeypatch):
+    env = make_app()
+    app = env.app
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: SlowClient())
+
+    async def scenario() -> float:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            session_ids = [
+                (await client.post("/api/sessions", json={"topic_code": "travel"})).json()[
+                    "session_id"
+                ]
+                for _ in range(4)
+            ]
+            started = time.perf_counter()
+            responses = await asyncio.gather(
+                *(
+                    client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree"})
+                    for session_id in session_ids
+                )
+            )
+            elapsed = time.perf_counter() - started
+            assert [response.status_code for response in responses] == [200] * 4
+        return elapsed
+
+    # Four 0.3 s LLM calls overlap instead of queueing on the SQLite write lock.
+    assert asyncio.run(scenario()) < 0.9
+    with env.factory() as db:
+        roles = [message.role for message in db.query(models.Message)]
+    assert sorted(roles) == sorted([models.MessageRole.USER, models.MessageRole.ASSISTANT] * 4)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy import select
+
+from app.repo import dao, models
+from app.services.llm import registry
+from app.services.llm.ollama import OllamaClient
+from app.services.llm.openai import OpenAIClient
+from app.services.llm.resilience import ProviderUnavailable
+from app.services.llm.simple_mock import SimpleMockClient
+
+from fake_llm_server import FakeLLMServer
+
+HISTORY = [{"role": "user", "content": "I am agree with you"}]
+
+
+async def _measure(make_client) -> tuple[float, float, str]:
+    async with httpx.AsyncClient() as http:
+        client = make_client(http)
+        started = time.perf_counter()
+        first = None
+        parts = []
+        async for chunk in client.stream_reply(HISTORY):
+            if first is None:
+                first = time.perf_counter() - started
+            parts.append(chunk)
+        return first, time.perf_counter() - started, "".join(parts)
+
+
+def test_mock_stream_is_chunked_and_matches_reply():
+    client = SimpleMockClient()
+
+    async def collect():
+        return [chunk async for chunk in client.stream_reply(HISTORY)]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(chunks) == client.reply(HISTORY)
+
+
+def test_ollama_stream_time_to_first_token():
+    chunks = ["You ", "could ", "say ", "'I agree'."]
+    with FakeLLMServer(chunks=chunks, chunk_delay=0.15) as server:
+        ttft, total, text = asyncio.run(
+            _measure(lambda http: OllamaClient(server.url, "llama3", http=http))
+        )
+    assert text == "".join(chunks)
+    assert total >= 0.4
+    assert ttft < 0.2
+
+
+def test_openai_stream_time_to_first_token():
+    chunks = ["Try ", "'I agree'", "."]
+    with FakeLLMServer(chunks=chunks, chunk_delay=0.15) as server:
+        ttft, total, text = asyncio.run(
+            _measure(lambda http: OpenAIClient("sk-test", "gpt-4o", base_url=server.url, http=http))
+        )
+    assert text == "".join(chunks)
+    assert total >= 0.3
+    assert ttft < 0.2
+
+
+def _app_with_session(make_app):
+    env = make_app()
+    with env.factory() as db:
+        user = dao.ensure_default_user(db)
+        topic = dao.get_practice_topic_by_code(db, "travel")
+        session = dao.create_session(db, user, topic, "prompt")
+        db.commit()
+        return env.client(), env.factory, session.id
+
+
+def _assistant_messages(factory) -> list[str]:
+    db = factory()
+    try:
+        return list(
+            db.scalars(
+                select(models.Message.text).where(
+                    models.Message.role == models.MessageRole.ASSISTANT
+                )
+            )
+        )
+    finally:
+        db.close()
+
+
+def test_send_message_async_path_returns_and_stores_reply(make_app):
+    client, factory, session_id = _app_with_session(make_app)
+    response = client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["detected_errors"][0]["corrected_text"] == "I agree"
+    assert _assistant_messages(factory) == [body["reply"]]
+    missing = client.post("/api/chat/unknown/message", json={"text": "hi"})
+    assert missing.status_code == 404
+
+
+def test_stream_endpoint_emits_errors_tokens_and_stores_reply(make_app):
+    client, factory, session_id = _app_with_session(make_app)
+    response = client.post(f"/api/chat/{session_id}/message/stream", json={"text": "I am agree"})
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[0]["event"] == "errors"
+    assert events[0]["detected_errors"][0]["corrected_text"] == "I agree"
+    tokens = [event["text"] for event in events if event["event"] == "token"]
+    assert len(tokens) > 1
+    assert events[-1] == {"event": "done", "reply": "".join(tokens)}
+    assert _assistant_messages(factory) == ["".join(tokens)]
+
+
+class BrokenStreamClient(SimpleMockClient):
+    async def stream_reply(self, history):
+        yield "Half a "
+        raise ProviderUnavailable("ollama:test", "timeouts")
+
+
+def test_stream_endpoint_reports_an_interrupted_reply_and_stores_nothing(make_app, monkeypatch):
+    client, factory, session_id = _app_with_session(make_app)
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: BrokenStreamClient())
+    response = client.post(f"/api/chat/{session_id}/message/stream", json={"text": "Hi there"})
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [event["event"] for event in events] == ["errors", "token", "error"]
+    assert events[-1]["detail"] == "reply interrupted (timeouts)"
+    assert _assistant_messages(factory) == []
+
+
+class SlowCountingClient(SimpleMockClient):
+    def __init__(self):
+        self.calls = 0
+
+    async def areply(self, history):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return "Where did you go?"
+
+    async def stream_reply(self, history):
+        self.calls += 1
+        for chunk in ("Where ", "did ", "you ", "go?"):
+            await asyncio.sleep(0.02)
+            yield chunk
+
+
+def _user_messages(factory) -> list[str]:
+    with factory() as db:
+        role = models.MessageRole.USER
+        return list(db.scalars(select(models.Message.text).where(models.Message.role == role)))
+
+
+def test_double_submitted_turn_is_stored_and_answered_once(make_app, monkeypatch):
+    env = make_app()
+    _, factory, session_id = _app_with_session(lambda: env)
+    llm = SlowCountingClient()
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: llm)
+
+    async def twice(path: str, text: str) -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=env.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/chat/{session_id}/{path}"
+            return await asyncio.gather(*(client.post(url, json={"text": text}) for _ in "ab"))
+
+    first, second = asyncio.run(twice("message", "I am agree"))
+    assert first.json() == second.json()
+    assert first.json()["reply"] == "Where did you go?"
+    streamed = asyncio.run(twice("message/stream", "I went  to Rome"))
+    assert streamed[0].text == streamed[1].text
+    assert llm.calls == 2
+    assert _user_messages(factory) == ["I am agree", "I went  to Rome"]
+    assert _assistant_messages(factory) == ["Where did you go?"] * 2
@@ -1,4 +1,14 @@
-from app.services.evaluation.errors import detect_errors
+import json
+import random
+
+from app.repo.models import ErrorCategory
+from app.services.evaluation.errors import (
+    IncrementalDetector,
+    _find_pattern_errors,
+    detect_errors,
+)
+from app.services.evaluation.matcher import MatchCursor, PatternMatcher
+from app.services.evaluation.rules import Rule, RuleCatalog, compile_rules
 
 
 def test_detects_common_patterns():
@@ -12,3 +22,137 @@ def test_detects_common_patterns():
 def test_detects_fluency_flag():
     errors = detect_errors("Hi. Ok. Bye. Yo.")
     assert any(error.category.value == "fluency" for error in errors)
+
+
+def test_detects_age_and_repeated_patterns():
+    text = "I have 12 years. Peoples say peoples are nice."
+    errors = detect_errors(text)
+    spans = [(error.start, error.end, error.corrected_text) for error in errors]
+    assert (17, 24, "people") in spans
+    assert (29, 36, "people") in spans
+    assert (0, 15, "I am 12 years old") in spans
+
+
+def test_rule_engine_matches_legacy_find_loop():
+    patterns = [
+        Rule("aa", "A", ErrorCategory.VOCAB, "double a"),
+        Rule("a", "A", ErrorCategory.VOCAB, "single a"),
+        Rule("ab", "AB", ErrorCategory.GRAMMAR, "pair"),
+    ]
+    text = "AAab aaa xab"
+    expected = []
+    lowered = text.lower()
+    for rule in patterns:
+        start = 0
+        while (idx := lowered.find(rule.pattern, start)) != -1:
+            expected.append((idx, idx + len(rule.pattern), rule.correction))
+            start = idx + len(rule.pattern)
+    errors = _find_pattern_errors(text, compile_rules(patterns))
+    found = [(err.start, err.end, err.corrected_text) for err in errors]
+    assert found == expected
+
+
+def test_pattern_matcher_reports_overlapping_matches():
+    matcher = PatternMatcher(["he", "she", "hers", "his"])
+    assert sorted(matcher.finditer("ushers")) == [(1, 1), (2, 0), (2, 2)]
+
+
+def test_match_cursor_finds_matches_across_chunk_boundaries():
+    matcher = PatternMatcher(["he", "she", "hers", "his"])
+    cursor = MatchCursor(matcher)
+    found = cursor.feed("us") + cursor.feed("h") + cursor.feed("ers")
+    assert sorted(found) == sorted(matcher.finditer("ushers"))
+
+
+_TRANSCRIPT = (
+    "I am agree with you. I have 12 years and the peoples are nice. Hi. Ok. "
+    "It is more better when I have 30 years, peoples say. I am agree!"
+)
+
+
+def _keys(errors):
+    return [(e.start, e.end, e.category, e.user_text, e.corrected_text) for e in errors]
+
+
+def test_incremental_detector_matches_batch_on_every_prefix():
+    rng = random.Random(7)
+    for _ in range(25):
+        detector = IncrementalDetector()
+        active = {}
+        position = 0
+        while position < len(_TRANSCRIPT):
+            step = rng.randint(1, 9)
+            update = detector.feed(_TRANSCRIPT[position : position + step])
+            position += step
+            for error in update.removed:
+                del active[_keys([error])[0]]
+            for error in update.added:
+                active[_keys([error])[0]] = error
+            expected = _keys(detect_errors(_TRANSCRIPT[:position]))
+            assert _keys(detector.errors) == expected
+            assert sorted(active, key=repr) == sorted(expected, key=repr)
+
+
+def test_incremental_detector_retracts_fluency_when_sentence_grows():
+    detector = IncrementalDetector()
+    detector.feed("Hi. Ok")
+    assert [e.category for e in detector.errors] == [ErrorCategory.FLUENCY]
+    update = detector.feed(" then we went home")
+    assert [e.category for e in update.removed] == [ErrorCategory.FLUENCY]
+    assert detector.errors == detect_errors("Hi. Ok then we went home") == []
+
+
+def test_incremental_detector_keeps_bounded_state_on_long_input():
+    detector = IncrementalDetector()
+    sentence = "We talked about the weather and I have 9 years of practice now. "
+    for _ in range(2000):
+        detector.feed(sentence)
+    assert len(detector._tail) <= detector._keep
+    pending = detector._regex_pending.values()
+    assert all(len(positions) <= detector.regex_horizon for positions in pending)
+    assert _keys(detector.errors) == _keys(detect_errors(sentence * 2000))
+
+
+def test_incremental_detector_continuation_checks_the_tail_unless_full():
+    detector = IncrementalDetector()
+    opening = "I am agree. " + "We walked along the river for a long time. " * 20
+    detector.feed(opening)
+    assert detector.length == len(opening)
+    assert detector.continues(opening + "Then")
+    assert not detector.continues(opening[:-5] + "Xxxxx Then")  # revised within the tail
+    assert not detector.continues(opening[:-1])  # trimmed
+    revised = "I agree.    " + opening[12:] + "Then"  # same length, outside the tail
+    assert detector.continues(revised)
+    assert not detector.continues(revised, full=True)
+
+
+def _write_catalog(path, version: int, pattern: str) -> None:
+    rule = {"pattern": pattern, "correction": "fixed", "category": "vocab", "note": "n"}
+    path.write_text(json.dumps({"version": version, "rules": [rule]}), encoding="utf-8")
+
+
+def test_rule_catalog_compiles_snapshot_and_reloads(tmp_path):
+    catalog_path = tmp_path / "rules.json"
+    _write_catalog(catalog_path, 1, "childs")
+    catalog = RuleCatalog(catalog_path, poll_interval=0)
+    first = catalog.snapshot()
+    assert first.version == 1
+    assert RuleCatalog(catalog_path).snapshot().digest == first.digest
+
+    _write_catalog(catalog_path, 2, "informations")
+    second = catalog.reload()
+    assert second.version == 2
+    assert [err.user_text for err in _find_pattern_errors("Informations and childs", second)] == [
+        "Informations"
+    ]
+    assert [err.user_text for err in _find_pattern_errors("Informations and childs", first)] == [
+        "childs"
+    ]
+
+
+def test_rule_catalog_keeps_snapshot_when_reload_fails(tmp_path):
+    catalog_path = tmp_path / "rules.json"
+    _write_catalog(catalog_path, 1, "childs")
+    catalog = RuleCatalog(catalog_path)
+    catalog_path.write_text("{not json", encoding="utf-8")
+    assert catalog.reload().version == 1
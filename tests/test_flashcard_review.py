@@ -0,0 +1,64 @@
+from sqlalchemy import select
+
+from app.repo import aggregates, dao, models
+from app.services.evaluation import srs
+
+from query_counter import assert_max_queries
+
+
+def _cards(factory, count: int) -> list[str]:
+    with factory() as db:
+        ids = [dao.create_manual_flashcard(db, f"front {i}", f"back {i}").id for i in range(count)]
+        db.commit()
+    return ids
+
+
+def _states(factory, ids) -> dict[str, tuple]:
+    with factory() as db:
+        cards = dao.get_flashcards(db, ids)
+        return {i: (cards[i].reps, cards[i].interval, float(cards[i].ease)) for i in ids}
+
+
+def test_bulk_review_matches_one_review_per_request(make_app):
+    env = make_app(seed=False)
+    client, factory, engines = env.client(), env.factory, env.engines
+    single_ids = _cards(factory, 3)
+    bulk_ids = _cards(factory, 3)
+    grades = [(0, 5), (1, 2), (0, 4), (2, 3), (0, 5), (1, 4)]
+
+    for index, quality in grades:
+        client.post(f"/api/flashcards/{single_ids[index]}/review", json={"quality": quality})
+    with assert_max_queries(4, *engines):
+        response = client.post(
+            "/api/flashcards/review",
+            json={"reviews": [{"card_id": bulk_ids[i], "quality": q} for i, q in grades]},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["reviewed"] == len(grades)
+    assert list(_states(factory, single_ids).values()) == list(_states(factory, bulk_ids).values())
+    state = srs.CardState(reps=0, interval=0, ease=2.5, due_at=None)
+    for quality in (5, 4, 5):
+        state = srs.next_review(state, quality)
+    assert _states(factory, bulk_ids)[bulk_ids[0]] == (state.reps, state.interval, state.ease)
+    with factory() as db:
+        user = dao.ensure_default_user(db)
+        assert aggregates.get_aggregates(db, user.id).cards_reviewed == 2 * len(grades)
+
+
+def test_bulk_review_is_all_or_nothing(make_app):
+    env = make_app(seed=False)
+    client, factory = env.client(), env.factory
+    ids = _cards(factory, 2)
+    before = _states(factory, ids)
+
+    response = client.post(
+        "/api/flashcards/review",
+        json={"reviews": [{"card_id": ids[0], "quality": 5}, {"card_id": "missing", "quality": 5}]},
+    )
+    assert response.status_code == 404
+    assert "missing" in response.json()["detail"]
+    assert _states(factory, ids) == before
+    with factory() as db:
+        assert db.scalar(select(models.UserAggregate)) is None
+    assert client.post("/api/flashcards/review", json={"reviews": []}).status_code == 422
@@ -0,0 +1,95 @@
+from app.routers import chat as chat_router
+from app.services import history
+from app.services.llm import registry
+from app.services.llm.simple_mock import SimpleMockClient
+from app.utils.config import Settings
+
+from query_counter import count_queries
+
+
+class RecordingClient(SimpleMockClient):
+    def __init__(self):
+        self.histories: list[list[dict]] = []
+
+    def reply(self, history):
+        self.histories.append([dict(message) for message in history])
+        return super().reply(history)
+
+
+def _client(make_app, monkeypatch, llm):
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: llm)
+    env = make_app()
+    return env.client(), env.engines
+
+
+def test_estimate_tokens_and_budget_keep_the_newest_turns():
+    assert history.estimate_tokens("") == history.MESSAGE_OVERHEAD_TOKENS
+    assert history.estimate_tokens("x" * 40) == 10 + history.MESSAGE_OVERHEAD_TOKENS
+    system = history.Turn.of("system", "s" * 36)  # 13 tokens
+    turns = [history.Turn.of("user", str(i) * 36) for i in range(5)]
+    assert history.fit_to_budget(system, turns, budget=13 * 3) == turns[-2:]
+    # The current message survives even when it alone blows the budget.
+    assert history.fit_to_budget(system, turns, budget=1) == turns[-1:]
+
+
+def test_buffer_evicts_least_recent_sessions_and_ignores_cold_appends():
+    buffer = history.HistoryBuffer(window=2, max_sessions=2)
+    buffer.append("cold", history.Turn.of("user", "hi"))
+    assert buffer.get("cold") is None
+    buffer.load("a", [history.Turn.of("user", "1")])
+    buffer.load("b", [])
+    buffer.get("a")
+    buffer.load("c", [])
+    assert buffer.get("b") is None and len(buffer) == 2
+    for text in ("2", "3"):
+        buffer.append("a", history.Turn.of("assistant", text))
+    assert [turn.content for turn in buffer.get("a")] == ["2", "3"]
+
+
+def test_long_session_reads_history_once_and_sends_a_bounded_window(make_app, monkeypatch):
+    llm = RecordingClient()
+    client, engines = _client(make_app, monkeypatch, llm)
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    logs = []
+    for turn in range(12):
+        with count_queries(*engines) as log:
+            client.post(f"/api/chat/{session_id}/message", json={"text": f"turn {turn}"})
+        logs.append([sql for sql in log.selects() if "FROM messages" in sql])
+
+    assert len(logs[0]) == 1 and "LIMIT" in logs[0][0]
+    assert all(not reads for reads in logs[1:])  # later turns come from the ring buffer
+    last = llm.histories[-1]
+    assert last[0]["role"] == "system"
+    assert len(last) == 1 + 6
+    assert [m["content"] for m in last[2::2]] == ["turn 9", "turn 10", "turn 11"]
+
+
+def test_cold_session_window_matches_the_database(make_app, monkeypatch):
+    llm = RecordingClient()
+    client, _ = _client(make_app, monkeypatch, llm)
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    for turn in range(4):
+        client.post(f"/api/chat/{session_id}/message", json={"text": f"turn {turn}"})
+    warm = llm.histories[-1]
+    history.get_history_buffer().discard(session_id)
+    client.post(f"/api/chat/{session_id}/message", json={"text": "turn 4"})
+    history.get_history_buffer().discard(session_id)
+    client.post(f"/api/chat/{session_id}/message", json={"text": "turn 5"})
+    cold = llm.histories[-1]
+    assert len(warm) == len(cold) == 7
+    assert cold[-1]["content"] == "turn 5" and cold[-3]["content"] == "turn 4"
+
+
+def test_token_budget_caps_the_payload(make_app, monkeypatch):
+    llm = RecordingClient()
+    client, _ = _client(make_app, monkeypatch, llm)
+    monkeypatch.setattr(
+        chat_router, "runtime_config", Settings(HISTORY_TOKEN_BUDGET="400", HISTORY_WINDOW="20")
+    )
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    for turn in range(10):
+        client.post(f"/api/chat/{session_id}/message", json={"text": f"{turn} " + "word " * 40})
+    sizes = [sum(history.estimate_tokens(m["content"]) for m in h) for h in llm.histories]
+    system_tokens = history.estimate_tokens(llm.histories[-1][0]["content"])
+    assert max(sizes) <= max(400, system_tokens + 60)
+    assert llm.histories[-1][-1]["content"].startswith("9 ")
@@ -0,0 +1,52 @@
+"""``import app.main`` must stay cheap: heavy or optional modules load on first use."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative microseconds for ``import app.main`` in a fresh interpreter. About 0.7 s
+# here; the slack absorbs slow CI machines (override with IMPORT_TIME_BUDGET_MS).
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2500))
+
+LAZY_MODULES = (
+    "numpy",
+    "httpx",
+    "alembic",
+    "app.services.llm.ollama",
+    "app.services.llm.openai",
+    "app.services.evaluation.srs_batch",
+)
+
+
+def _importtime() -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        env={**os.environ, "JOB_WORKERS": "0"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def test_import_app_main_stays_within_budget():
+    cumulative = _importtime()
+    loaded = sorted(
+        name
+        for name in cumulative
+        if any(name == lazy or name.startswith(f"{lazy}.") for lazy in LAZY_MODULES)
+    )
+    assert loaded == [], f"imported eagerly by app.main: {loaded}"
+    elapsed_ms = cumulative["app.main"] / 1000
+    assert elapsed_ms <= IMPORT_TIME_BUDGET_MS, f"import app.main took {elapsed_ms:.0f} ms"
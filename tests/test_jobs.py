@@ -0,0 +1,140 @@
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.repo import jobs as job_repo, models
+from app.services import jobs
+
+from query_counter import count_queries
+
+
+def _enqueue(factory, kind, payload=None, key=None, max_attempts=3) -> str:
+    with factory() as db:
+        job, _ = job_repo.enqueue(db, kind, payload, idempotency_key=key, max_attempts=max_attempts)
+        db.commit()
+        return job.id
+
+
+def _job(factory, job_id) -> models.Job:
+    with factory() as db:
+        return job_repo.get_job(db, job_id)
+
+
+@jobs.register("test.write_then_fail")
+def _write_then_fail(db, payload):
+    db.add(models.User(nickname=payload["nickname"]))
+    db.flush()
+    raise RuntimeError("boom")
+
+
+@jobs.register("test.echo")
+def _echo(db, payload):
+    return {"echo": payload["value"]}
+
+
+def test_enqueue_is_idempotent_per_key(make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    with factory() as db:
+        first, created = job_repo.enqueue(db, "test.echo", {"value": 1}, idempotency_key="k")
+        again, created_again = job_repo.enqueue(db, "test.echo", {"value": 2}, idempotency_key="k")
+        db.commit()
+        assert (created, created_again) == (True, False)
+        assert again.id == first.id
+        assert db.scalar(select(func.count()).select_from(models.Job)) == 1
+
+
+def test_failed_attempts_roll_back_and_retry_until_exhausted(make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    job_id = _enqueue(factory, "test.write_then_fail", {"nickname": "ghost"}, max_attempts=2)
+
+    assert jobs.run_next(factory, retry_base=0.0)
+    job = _job(factory, job_id)
+    assert (job.status, job.attempts) == (models.JobStatus.QUEUED, 1)
+    assert "boom" in job.last_error
+
+    assert jobs.run_next(factory, retry_base=0.0)
+    assert not jobs.run_next(factory, retry_base=0.0)
+    job = _job(factory, job_id)
+    assert (job.status, job.attempts) == (models.JobStatus.FAILED, 2)
+    with factory() as db:
+        assert db.scalar(select(models.User).where(models.User.nickname == "ghost")) is None
+
+
+def test_retry_waits_for_backoff(make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    job_id = _enqueue(factory, "test.write_then_fail", {"nickname": "ghost"})
+    assert jobs.run_next(factory, retry_base=30.0)
+    assert not jobs.run_next(factory)
+    job = _job(factory, job_id)
+    delay = job.run_after.replace(tzinfo=UTC) - datetime.now(tz=UTC)
+    assert timedelta(seconds=25) < delay <= timedelta(seconds=30)
+    assert jobs.retry_delay(3, base=2.0) == 8.0
+
+
+def test_expired_lease_is_requeued_and_fences_the_stale_worker(make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    job_id = _enqueue(factory, "test.echo", {"value": "fresh"})
+    with factory() as db:
+        stale = job_repo.claim_next(db, lease_seconds=-1)
+        db.commit()
+    assert stale.attempts == 1
+
+    assert jobs.run_next(factory)  # requeues the expired lease, then runs attempt 2
+    with factory() as db:
+        assert not job_repo.mark_succeeded(db, job_id, 1, {"echo": "stale"})
+        db.commit()
+    job = _job(factory, job_id)
+    assert (job.status, job.attempts) == (models.JobStatus.SUCCEEDED, 2)
+    assert job.result_json == '{"echo": "fresh"}'
+
+
+def test_idle_poll_does_not_write(make_app):
+    env = make_app(overrides=(), seed=False)
+    _enqueue(env.factory, "test.echo", {"value": "x"})
+    with env.factory() as db:
+        job_repo.claim_next(db, lease_seconds=60)  # running, lease still valid
+        db.commit()
+    with count_queries(env.engine) as log:
+        assert not jobs.run_next(env.factory)
+    assert log == log.selects(), log.dump()
+
+
+def test_unknown_kind_fails_instead_of_blocking_the_queue(make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    job_id = _enqueue(factory, "test.missing", max_attempts=1)
+    assert jobs.run_pending(factory) == 1
+    job = _job(factory, job_id)
+    assert job.status == models.JobStatus.FAILED
+    assert "no handler" in job.last_error
+
+
+def test_finish_returns_a_job_that_the_worker_pool_completes(make_app):
+    env = make_app()
+    factory, client = env.factory, env.client()
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree"})
+
+    # A long poll interval proves the worker is woken by notify(), not by its timer.
+    worker = jobs.JobWorker(factory, workers=2, poll_interval=30.0)
+    worker.start()
+    jobs._worker = worker
+    try:
+        started = time.perf_counter()
+        finished = client.post(f"/api/sessions/{session_id}/finish").json()
+        assert finished["job_status"] == "queued"
+        job = client.get(f"/api/jobs/{finished['job_id']}", params={"wait": 5}).json()
+        assert time.perf_counter() - started < 5
+    finally:
+        jobs._worker = None
+        worker.stop()
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["flashcards_created"] == 1
+    assert job["result"]["quizzes_created"] > 0
+    repeated = client.post(f"/api/sessions/{session_id}/finish").json()
+    assert repeated["job_id"] == finished["job_id"]
+    assert repeated["job_status"] == "succeeded"
+    assert repeated["flashcards_created"] == 1
+    assert client.get(f"/api/quiz/by-session/{session_id}").json()["items"]
+    assert client.get("/api/jobs/unknown").status_code == 404
@@ -0,0 +1,155 @@
+import asyncio
+import socket
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.repo.models import LLMProvider
+from app.services.llm import registry
+from app.services.llm.balancer import (
+    BalancedOllamaClient,
+    EndpointBalancer,
+    parse_endpoints,
+    reset_balancers,
+    sticky,
+)
+from app.services.llm.pool import HTTPClientPool
+from app.utils.config import Settings
+
+from fake_llm_server import FakeLLMServer
+
+
+def _history(text: str = "I has a cat") -> list[dict[str, str]]:
+    return [{"role": "user", "content": text}]
+
+
+def _run(urls, calls, **options):
+    """Send ``calls(client)`` through a balancer over ``urls``; return it and the result."""
+
+    async def main():
+        pool = HTTPClientPool(Settings())
+        balancer = EndpointBalancer(urls, pool=pool, health_interval=0, **options)
+        try:
+            return balancer, await calls(BalancedOllamaClient(balancer, "llama3"))
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(main())
+
+
+def test_parse_endpoints_splits_and_deduplicates():
+    assert parse_endpoints("http://a:1/, http://b:2 ,,http://a:1") == ["http://a:1", "http://b:2"]
+
+
+def test_least_outstanding_spreads_concurrent_calls():
+    async def calls(client):
+        return await asyncio.gather(*(client.areply(_history(str(i))) for i in range(6)))
+
+    with (
+        FakeLLMServer(chunks=["A."], latency=0.1) as a,
+        FakeLLMServer(chunks=["B."], latency=0.1) as b,
+    ):
+        _, replies = _run([a.url, b.url], calls, strategy="least_outstanding")
+        assert (a.requests, b.requests) == (3, 3)
+    assert Counter(replies) == {"A.": 3, "B.": 3}
+
+
+def test_ewma_sends_most_traffic_to_the_faster_endpoint():
+    async def calls(client):
+        replies = []
+        for _ in range(4):
+            replies += await asyncio.gather(*(client.areply(_history()) for _ in range(3)))
+        return replies
+
+    with (
+        FakeLLMServer(chunks=["fast"], parallel=3) as fast,
+        FakeLLMServer(chunks=["slow"], latency=0.2, parallel=3) as slow,
+    ):
+        balancer, replies = _run([fast.url, slow.url], calls, strategy="ewma")
+    assert Counter(replies)["fast"] >= 9
+    ewma = {e.url: e.ewma_ms for e in balancer.endpoints}
+    assert ewma[fast.url] < ewma[slow.url]
+
+
+def test_failing_endpoint_is_retried_elsewhere_and_ejected():
+    async def calls(client):
+        return [await client.areply(_history()) for _ in range(6)]
+
+    with FakeLLMServer(chunks=["ok"]) as good, FakeLLMServer(status=503) as bad:
+        balancer, replies = _run(
+            [bad.url, good.url], calls, strategy="round_robin", eject_failures=2
+        )
+        assert bad.requests == 2  # ejected after two failures
+    assert replies == ["ok"] * 6
+    snapshot = {entry["url"]: entry for entry in balancer.snapshot()["endpoints"]}
+    assert snapshot[bad.url]["healthy"] is False
+    assert snapshot[bad.url]["ejections"] == 1
+    assert snapshot[good.url]["errors"] == 0
+
+
+def test_health_check_ejects_a_dead_endpoint_and_readmits_it():
+    async def main(live_url, dead_url):
+        pool = HTTPClientPool(Settings())
+        balancer = EndpointBalancer([dead_url, live_url], pool=pool, strategy="round_robin")
+        try:
+            await balancer.check_health()
+            picks = {balancer.pick().url for _ in range(4)}
+            balancer.endpoints[0].url = live_url  # the endpoint "comes back"
+            await balancer.check_health()
+            return picks, [e.snapshot(balancer.clock())["healthy"] for e in balancer.endpoints]
+        finally:
+            await pool.aclose()
+
+    with socket.socket() as sock:  # a port nothing listens on
+        sock.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    with FakeLLMServer() as live:
+        picks, healthy = asyncio.run(main(live.url, dead_url))
+    assert picks == {live.url}
+    assert healthy == [True, True]
+
+
+def test_sticky_sessions_keep_each_session_on_one_endpoint():
+    async def calls(client):
+        routes = {}
+        for session in ("s1", "s2", "s3", "s4", "s5", "s6"):
+            with sticky(session):
+                routes[session] = {await client.areply(_history(session)) for _ in range(3)}
+        return routes
+
+    with FakeLLMServer(chunks=["A"]) as a, FakeLLMServer(chunks=["B"]) as b:
+        balancer, routes = _run([a.url, b.url], calls, sticky_sessions=True)
+        reply_of = {a.url: "A", b.url: "B"}
+    # The hash decides which endpoint a session lands on (with random ports both can
+    # pick the same one); each session must only ever hit the endpoint it hashes to.
+    assert routes == {session: {reply_of[balancer.pick(session).url]} for session in routes}
+
+
+def test_stream_skips_an_endpoint_that_fails_before_the_first_chunk():
+    async def calls(client):
+        return [chunk async for chunk in client.stream_reply(_history())]
+
+    with FakeLLMServer(status=503) as bad, FakeLLMServer(chunks=["You ", "have"]) as good:
+        _, chunks = _run([bad.url, good.url], calls, strategy="round_robin")
+    assert chunks == ["You ", "have"]
+
+
+def test_registry_balances_when_several_urls_are_configured():
+    reset_balancers()
+    registry.clear_client_cache()
+
+    class Row:
+        llm_provider = LLMProvider.OLLAMA
+        llm_model = "llama3"
+
+    try:
+        cfg = Settings(OLLAMA_BASE_URL="http://127.0.0.1:9, http://127.0.0.1:10")
+        client = registry.get_llm(Row(), config=cfg)
+        assert isinstance(client.primary.inner.inner.inner, BalancedOllamaClient)
+        with TestClient(create_app()) as api:
+            stats = api.get("/api/admin/llm-endpoints").json()
+        assert [e["url"] for e in stats[0]["endpoints"]] == parse_endpoints(cfg.ollama_base_url)
+    finally:
+        registry.clear_client_cache()
+        reset_balancers()
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services.llm.ollama import OllamaClient
+from app.services.llm.openai import OpenAIClient
+from app.services.llm.pool import HTTPClientPool
+from app.utils.config import Settings
+
+from fake_llm_server import FakeLLMServer
+
+HISTORY = [{"role": "user", "content": "peoples are nice"}]
+
+
+def test_pool_applies_settings_and_reuses_clients_per_base_url():
+    pool = HTTPClientPool(
+        Settings(LLM_HTTP_MAX_CONNECTIONS="7", LLM_HTTP_MAX_KEEPALIVE="3", LLM_HTTP2="false")
+    )
+    assert pool.limits.max_connections == 7
+    assert pool.limits.max_keepalive_connections == 3
+    assert pool.get("http://a:1/") is pool.get("http://a:1")
+    assert pool.get("http://a:1") is not pool.get("http://b:1")
+    asyncio.run(pool.aclose())
+
+
+def test_async_providers_reuse_pooled_connections():
+    async def run(url: str) -> list[str]:
+        pool = HTTPClientPool(Settings())
+        ollama = OllamaClient(url, "llama3", http=pool.get(url))
+        openai = OpenAIClient("sk-test", "gpt-4o", base_url=url, http=pool.get(url))
+        try:
+            return [
+                await ollama.areply(HISTORY),
+                await ollama.areply(HISTORY),
+                await openai.areply(HISTORY),
+            ]
+        finally:
+            await pool.aclose()
+
+    with FakeLLMServer(chunks=["Say ", "people."]) as server:
+        replies = asyncio.run(run(server.url))
+        assert replies == ["Say people."] * 3
+        assert server.requests == 3
+        assert server.connections == 1
@@ -0,0 +1,230 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.repo.models import LLMProvider
+from app.services.llm import registry
+from app.services.llm.ollama import OllamaClient
+from app.services.llm.pool import HTTPClientPool
+from app.services.llm.resilience import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    FallbackLLMClient,
+    GuardedLLMClient,
+    ProviderGuard,
+    ProviderUnavailable,
+    reset_guards,
+)
+from app.services.llm.simple_mock import SimpleMockClient
+from app.utils.config import Settings
+
+from fake_llm_server import FakeLLMServer
+
+FALLBACK = SimpleMockClient()
+
+
+def _history(text: str = "I has a cat") -> list[dict[str, str]]:
+    return [{"role": "user", "content": text}]
+
+
+def _settings(**overrides: str) -> Settings:
+    values = {"LLM_TIMEOUT_SECONDS": "5", "LLM_BREAKER_FAILURES": "2"}
+    values.update(overrides)
+    return Settings(**values)
+
+
+async def _guarded(url: str, guard: ProviderGuard, pool: HTTPClientPool):
+    inner = OllamaClient(url, "llama3", http=pool.get(url))
+    return FallbackLLMClient(GuardedLLMClient(inner, guard), FALLBACK)
+
+
+def test_breaker_opens_after_failures_and_closes_after_a_good_probe():
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: clock[0])
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock[0] = 10
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()  # only one at a time
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+    clock[0] = 20
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_adaptive_timeout_follows_p95_within_floor_and_ceiling():
+    timeout = AdaptiveTimeout(ceiling=15, floor=0.5, multiplier=3, min_samples=5, window=10)
+    assert timeout.seconds() == pytest.approx(15)  # not enough samples yet
+    for _ in range(5):
+        timeout.observe(0.4)
+    assert timeout.seconds() == pytest.approx(1.5)  # p95 bucket 500 ms * 3
+    for _ in range(5):
+        timeout.observe(0.01)
+    assert timeout.seconds() == pytest.approx(1.5)
+    for _ in range(10):
+        timeout.observe(0.01)  # the old window is rotated out
+    assert timeout.seconds() == pytest.approx(0.5)
+
+
+def test_slow_provider_times_out_then_circuit_fails_fast_to_mock():
+    clock = [0.0]
+    guard = ProviderGuard(
+        "ollama:test", _settings(LLM_TIMEOUT_SECONDS="0.2"), clock=lambda: clock[0]
+    )
+
+    async def run(url: str) -> list[str]:
+        pool = HTTPClientPool(Settings())
+        client = await _guarded(url, guard, pool)
+        try:
+            return [await client.areply(_history()) for _ in range(3)]
+        finally:
+            await pool.aclose()
+
+    with FakeLLMServer(chunks=["I have a cat."], latency=0.5) as server:
+        started = time.perf_counter()
+        replies = asyncio.run(run(server.url))
+        elapsed = time.perf_counter() - started
+        assert server.requests == 2  # the third call never reached the server
+    assert replies == [FALLBACK.reply(_history())] * 3
+    assert elapsed < 1.0
+    counters = guard.snapshot()["counters"]
+    assert counters == {"timeouts": 2, "rejected_circuit_open": 1}
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    clock[0] = 60
+    with FakeLLMServer(chunks=["I have a cat."]) as server:
+        assert asyncio.run(run(server.url))[0] == "I have a cat."
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_concurrency_cap_queues_with_a_deadline_and_rejects_overflow():
+    guard = ProviderGuard(
+        "ollama:test",
+        _settings(LLM_MAX_CONCURRENCY="1", LLM_QUEUE_SIZE="1", LLM_QUEUE_TIMEOUT="0.1"),
+    )
+
+    async def run(url: str) -> list[str]:
+        pool = HTTPClientPool(Settings())
+        client = await _guarded(url, guard, pool)
+        try:
+            return await asyncio.gather(
+                *(client.areply(_history(f"turn {index}")) for index in range(3))
+            )
+        finally:
+            await pool.aclose()
+
+    with FakeLLMServer(chunks=["Nice."], latency=0.3) as server:
+        replies = asyncio.run(run(server.url))
+        assert server.requests == 1
+    assert replies[0] == "Nice."
+    assert replies[1:] == [FALLBACK.reply(_history(f"turn {index}")) for index in (1, 2)]
+    snapshot = guard.snapshot()
+    assert snapshot["counters"] == {"rejected_queue_full": 1, "rejected_queue_timeout": 1}
+    assert (snapshot["in_flight"], snapshot["queued"]) == (0, 0)
+    assert guard.breaker.failures == 0  # load shedding is not a provider failure
+
+
+def test_timeout_adapts_to_observed_latency():
+    guard = ProviderGuard(
+        "ollama:test",
+        _settings(LLM_TIMEOUT_FLOOR_SECONDS="0.2", LLM_TIMEOUT_MIN_SAMPLES="5"),
+    )
+
+    async def run(url: str) -> float:
+        pool = HTTPClientPool(Settings())
+        client = await _guarded(url, guard, pool)
+        started = time.perf_counter()
+        try:
+            await client.areply(_history())
+        finally:
+            await pool.aclose()
+        return time.perf_counter() - started
+
+    # Fixed samples rather than real round trips, so the learned value is deterministic.
+    for _ in range(5):
+        guard.timeouts["reply"].observe(0.01)
+    assert guard.timeouts["reply"].seconds() == pytest.approx(0.2)  # 3 x p95 is below the floor
+    with FakeLLMServer(chunks=["Slow."], latency=1.0) as server:
+        # Waits for the learned 0.2 s, not the 5 s ceiling.
+        assert asyncio.run(run(server.url)) < 0.8
+    assert guard.snapshot()["counters"] == {"timeouts": 1}
+
+
+def test_failed_stream_falls_back_before_the_first_chunk():
+    guard = ProviderGuard("ollama:test", _settings())
+
+    async def run(url: str) -> list[str]:
+        pool = HTTPClientPool(Settings())
+        client = await _guarded(url, guard, pool)
+        try:
+            return [chunk async for chunk in client.stream_reply(_history())]
+        finally:
+            await pool.aclose()
+
+    with FakeLLMServer(status=503) as server:
+        chunks = asyncio.run(run(server.url))
+    assert "".join(chunks) == FALLBACK.reply(_history())
+    assert guard.snapshot()["counters"] == {"errors": 1}
+
+    with FakeLLMServer(chunks=["You ", "have ", "a cat."]) as server:
+        assert asyncio.run(run(server.url)) == ["You ", "have ", "a cat."]
+    assert guard.snapshot()["histograms"]["first_token"]["count"] == 1
+
+
+def test_stream_that_breaks_after_the_first_chunk_raises_instead_of_truncating():
+    guard = ProviderGuard("ollama:test", _settings(LLM_TIMEOUT_SECONDS="0.3"))
+
+    async def run(url: str) -> tuple[list[str], ProviderUnavailable]:
+        pool = HTTPClientPool(Settings())
+        client = await _guarded(url, guard, pool)
+        chunks = []
+        try:
+            with pytest.raises(ProviderUnavailable) as caught:
+                async for chunk in client.stream_reply(_history()):
+                    chunks.append(chunk)
+            return chunks, caught.value
+        finally:
+            await pool.aclose()
+
+    with FakeLLMServer(chunks=["You ", "have ", "a cat."], drop_after=1) as server:
+        chunks, error = asyncio.run(run(server.url))
+    assert (chunks, error.reason) == (["You "], "errors")
+
+    with FakeLLMServer(chunks=["You ", "have ", "a cat."], chunk_delay=1.0) as server:
+        started = time.perf_counter()
+        chunks, error = asyncio.run(run(server.url))
+        assert time.perf_counter() - started < 0.8  # the reply timeout, not the server
+    assert (chunks, error.reason) == (["You "], "timeouts")
+    assert guard.snapshot()["counters"] == {"errors": 1, "timeouts": 1}
+
+
+def test_registry_wraps_remote_providers_and_reports_their_health():
+    reset_guards()
+    registry.clear_client_cache()
+
+    class Row:
+        llm_provider = LLMProvider.OLLAMA
+        llm_model = "llama3"
+
+    try:
+        client = registry.get_llm(Row(), config=Settings(OLLAMA_BASE_URL="http://127.0.0.1:9"))
+        assert isinstance(client, FallbackLLMClient)
+        bare = registry.get_llm(
+            Row(), config=Settings(OLLAMA_BASE_URL="http://127.0.0.1:9"), fallback=False
+        )
+        assert bare is client.primary
+        assert not isinstance(registry.get_llm(None), FallbackLLMClient)
+        with TestClient(create_app()) as api:
+            health = api.get("/api/admin/llm-providers").json()
+        assert [entry["name"] for entry in health] == ["ollama:http://127.0.0.1:9"]
+        assert health[0]["state"] == "closed"
+    finally:
+        registry.clear_client_cache()
+        reset_guards()
@@ -0,0 +1,81 @@
+"""Fixed SQL budgets per endpoint; a failure prints the statements that were issued."""
+
+from app.services.jobs import run_pending
+
+from query_counter import assert_max_queries
+
+BUDGETS = {
+    "create_session": 4,
+    "chat_message": 9,  # user turn and reply commit separately; each updates the session
+    "finish_session": 6,
+    "finish_session_job": 13,  # includes the final empty poll of run_pending
+    "quiz_by_session": 2,
+    "answer_quiz": 5,
+    "answer_last_quiz": 10,
+    "report": 1,
+    "flashcards_due": 1,
+    "review_flashcard": 4,
+    "dashboard": 3,
+}
+
+
+def _session_with_errors(client, turns: int) -> str:
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    for turn in range(turns):
+        text = f"I am agree that peoples are more better {turn}"
+        client.post(f"/api/chat/{session_id}/message", json={"text": text})
+    return session_id
+
+
+def test_finish_session_query_count_does_not_grow_with_errors(make_app):
+    env = make_app(overrides=("sync", "async"))
+    client, factory, engines = env.client(), env.factory, env.engines
+    counts = []
+    for turns in (1, 5):
+        session_id = _session_with_errors(client, turns)
+        run_pending(factory)  # rolling-summary refreshes queued by the chat turns
+        with assert_max_queries(BUDGETS["finish_session"], *engines) as log:
+            response = client.post(f"/api/sessions/{session_id}/finish")
+        with assert_max_queries(BUDGETS["finish_session_job"], *engines) as job_log:
+            assert run_pending(factory) == 1
+        job = client.get(f"/api/jobs/{response.json()['job_id']}").json()
+        assert job["result"]["flashcards_created"] == turns * 3
+        counts.append((len(log), len(job_log)))
+    assert counts[0] == counts[1]
+
+
+def test_endpoint_query_budgets(make_app):
+    env = make_app(overrides=("sync", "async"))
+    client, factory, engines = env.client(), env.factory, env.engines
+
+    with assert_max_queries(BUDGETS["create_session"], *engines):
+        session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()[
+            "session_id"
+        ]
+    # The first turn also creates the user's aggregate row and warms the settings cache.
+    client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree"})
+    with assert_max_queries(BUDGETS["chat_message"], *engines):
+        client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree, peoples"})
+    client.post(f"/api/sessions/{session_id}/finish")
+    run_pending(factory)
+
+    with assert_max_queries(BUDGETS["quiz_by_session"], *engines):
+        quizzes = client.get(f"/api/quiz/by-session/{session_id}").json()["items"]
+    assert len(quizzes) > 1
+    for quiz in quizzes[:-1]:
+        with assert_max_queries(BUDGETS["answer_quiz"], *engines):
+            client.post(f"/api/quiz/{quiz['id']}/answer", json={"choice": "x", "latency_ms": 1})
+    with assert_max_queries(BUDGETS["answer_last_quiz"], *engines):
+        last = client.post(
+            f"/api/quiz/{quizzes[-1]['id']}/answer", json={"choice": "x", "latency_ms": 1}
+        )
+    assert last.json()["report_ready"] is True
+
+    with assert_max_queries(BUDGETS["report"], *engines):
+        assert client.get(f"/api/reports/{session_id}").status_code == 200
+    with assert_max_queries(BUDGETS["flashcards_due"], *engines):
+        due = client.get("/api/flashcards/due").json()
+    with assert_max_queries(BUDGETS["review_flashcard"], *engines):
+        client.post(f"/api/flashcards/{due[0]['id']}/review", json={"quality": 4})
+    with assert_max_queries(BUDGETS["dashboard"], *engines):
+        client.get("/api/dashboard/summary")
@@ -0,0 +1,117 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.services.llm.base import LLMClient
+from app.services.llm.cache import CachedLLMClient, ReplyCache, make_cache_key
+from app.services.llm.ollama import OllamaClient
+from app.services.llm.openai import OpenAIClient
+
+from fake_llm_server import FakeLLMServer
+
+
+class CountingClient(LLMClient):
+    def __init__(self, reply: str = "Hello! Where did you travel?"):
+        self.calls = 0
+        self._reply = reply
+
+    def reply(self, history):
+        self.calls += 1
+        return self._reply
+
+
+def _history(text: str, system: str = "Travel tutor") -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "assistant", "content": "Hi there"},
+        {"role": "user", "content": text},
+    ]
+
+
+def test_cache_key_normalizes_whitespace_and_case_and_uses_window():
+    base = make_cache_key("ollama:llama3", _history("Hello  there"), window=2)
+    assert make_cache_key("ollama:llama3", _history(" hello there "), window=2) == base
+    assert make_cache_key("ollama:mistral", _history("Hello there"), window=2) != base
+    assert make_cache_key("ollama:llama3", _history("Hello there", "Food tutor"), 2) != base
+    older = [{"role": "user", "content": "earlier turn"}] + _history("Hello there")
+    assert make_cache_key("ollama:llama3", older, window=2) == base
+
+
+def test_cached_client_hits_after_first_call_and_skips_offline_replies():
+    inner = CountingClient()
+    cache = ReplyCache(max_entries=4, ttl_seconds=60)
+    client = CachedLLMClient(inner, cache, "ollama:llama3")
+    assert asyncio.run(client.areply(_history("hi"))) == inner._reply
+    assert asyncio.run(client.areply(_history("HI"))) == inner._reply
+    assert inner.calls == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    offline = CachedLLMClient(CountingClient("(offline) Unable to reach Ollama"), cache, "x")
+    offline.reply(_history("hi"))
+    offline.reply(_history("hi"))
+    assert offline.inner.calls == 2
+
+
+def test_memory_tier_evicts_lru_and_expires(monkeypatch):
+    cache = ReplyCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.stats.evictions == 1
+
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.llm.cache.time.monotonic", lambda: clock[0])
+    cache.set("d", "4")
+    clock[0] += 11
+    assert cache.get("d") is None
+    assert cache.stats.expirations == 1
+
+
+def test_sqlite_tier_survives_a_new_cache_instance(tmp_path):
+    path = tmp_path / "replies.db"
+    first = ReplyCache(max_entries=8, ttl_seconds=60, persistent_path=path)
+    client = CachedLLMClient(CountingClient(), first, "openai:gpt-4o")
+    asyncio.run(client.areply(_history("good morning")))
+
+    second = ReplyCache(max_entries=8, ttl_seconds=60, persistent_path=path)
+    inner = CountingClient()
+    warm = CachedLLMClient(inner, second, "openai:gpt-4o")
+    assert asyncio.run(warm.areply(_history("Good morning"))) == inner._reply
+    assert inner.calls == 0
+    assert second.snapshot()["persistent_hits"] == 1
+    assert second.snapshot()["persistent_entries"] == 1
+
+
+def test_admin_endpoint_reports_cache_counters():
+    client = TestClient(create_app())
+    body = client.get("/api/admin/llm-cache").json()
+    assert body["enabled"] is True
+    assert {"hits", "misses", "evictions", "memory_entries"} <= body.keys()
+    assert client.delete("/api/admin/llm-cache").json()["memory_entries"] == 0
+
+
+def test_stream_cut_short_is_raised_and_not_cached():
+    async def consume(client):
+        chunks = []
+        with pytest.raises(httpx.HTTPError):
+            async for chunk in client.stream_reply(_history("hi")):
+                chunks.append(chunk)
+        return chunks
+
+    async def run(url: str, make) -> list[str]:
+        async with httpx.AsyncClient() as http:
+            return await consume(CachedLLMClient(make(url, http), cache, "fake"))
+
+    cache = ReplyCache(max_entries=4, ttl_seconds=60)
+    with FakeLLMServer(drop_after=1) as server:
+        ollama = asyncio.run(run(server.url, lambda url, http: OllamaClient(url, "m", http=http)))
+        openai = asyncio.run(
+            run(server.url, lambda url, http: OpenAIClient("sk", "m", base_url=url, http=http))
+        )
+    assert ollama == openai == ["Hello"]
+    assert len(cache.memory) == 0
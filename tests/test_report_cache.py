@@ -0,0 +1,65 @@
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.repo import dao, models
+from app.services.evaluation import report as report_service
+from app.services.jobs import run_pending
+
+
+def _finished_session(client, engine) -> str:
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    client.post(f"/api/chat/{session_id}/message", json={"text": "I am agree with peoples"})
+    client.post(f"/api/sessions/{session_id}/finish")
+    run_pending(sessionmaker(bind=engine, future=True))
+    return session_id
+
+
+def _answer_all(client, session_id):
+    for quiz in client.get(f"/api/quiz/by-session/{session_id}").json()["items"]:
+        client.post(f"/api/quiz/{quiz['id']}/answer", json={"choice": "x", "latency_ms": 1})
+
+
+def test_report_is_materialized_and_served_with_etag(make_app, monkeypatch):
+    env = make_app(overrides=("sync", "async"))
+    client, engine = env.client(), env.engine
+    session_id = _finished_session(client, engine)
+    assert client.get(f"/api/reports/{session_id}").status_code == 400
+    _answer_all(client, session_id)
+
+    statements: list[str] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    response = client.get(f"/api/reports/{session_id}")
+    event.remove(engine, "before_cursor_execute", _capture)
+    assert response.status_code == 200
+    assert response.json()["quiz_summary"]["total"] >= 1
+    etag = response.headers["etag"]
+    assert not any("FROM messages" in statement for statement in statements)
+
+    cached = client.get(f"/api/reports/{session_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    monkeypatch.setattr(report_service, "BUILDER_VERSION", report_service.BUILDER_VERSION + 1)
+    rebuilt = client.get(f"/api/reports/{session_id}", headers={"If-None-Match": etag})
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers["etag"] != etag
+    assert rebuilt.json() == response.json()
+
+
+def test_missing_report_is_built_on_first_read(make_app):
+    env = make_app(overrides=("sync", "async"))
+    client, engine = env.client(), env.engine
+    session_id = _finished_session(client, engine)
+    _answer_all(client, session_id)
+    with engine.begin() as connection:
+        connection.execute(models.SessionReport.__table__.delete())
+    response = client.get(f"/api/reports/{session_id}")
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    with sessionmaker(bind=engine)() as db:
+        assert dao.get_session_report(db, session_id) is not None
+    assert client.get("/api/reports/unknown").status_code == 404
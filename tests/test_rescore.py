@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.repo import dao, models, rescore
+from app.services.evaluation.errors import detect_errors, detect_errors_batch
+
+
+def _seed(factory, texts):
+    db = factory()
+    user = dao.ensure_default_user(db)
+    topic = models.PracticeTopic(code="travel", label="Travel", description="Trips")
+    db.add(topic)
+    session = dao.create_session(db, user, topic, "prompt")
+    for text in texts:
+        dao.append_message(db, session, models.MessageRole.USER, text)
+        dao.append_message(db, session, models.MessageRole.ASSISTANT, "peoples reply")
+    db.commit()
+    db.close()
+
+
+def test_detect_errors_batch_matches_single_calls():
+    texts = ["I am agree", "Hi. Ok. Bye.", "nothing here", "I have 30 years"]
+    batch = detect_errors_batch(texts)
+    assert batch == [detect_errors(text) for text in texts]
+
+
+def test_rescore_rebuilds_spans_and_clears_the_checkpoint(tmp_path, make_app):
+    factory = make_app(overrides=(), seed=False).factory
+    _seed(factory, ["I am agree", "The peoples were kind", "All good here", "More better now"])
+    checkpoint = tmp_path / "checkpoint.json"
+
+    stats = rescore.rescore_messages(factory, chunk_size=2, checkpoint_path=checkpoint)
+    assert stats.messages == 4
+    assert stats.spans_inserted == 3
+    assert not checkpoint.exists()  # a finished run starts over next time
+    db = factory()
+    spans = list(db.scalars(select(models.ErrorSpan)))
+    assert {span.user_text for span in spans} == {"I am agree", "peoples", "More better"}
+    assert all(span.message.role == models.MessageRole.USER for span in spans)
+    db.close()
+
+    again = rescore.rescore_messages(factory, chunk_size=3, checkpoint_path=checkpoint)
+    assert again.resumed_from is None
+    assert (again.messages, again.spans_inserted, again.spans_deleted) == (4, 0, 0)
+
+
+def test_interrupted_rescore_resumes_and_sees_messages_written_meanwhile(
+    tmp_path, make_app, monkeypatch
+):
+    factory = make_app(overrides=(), seed=False).factory
+    _seed(factory, ["I am agree", "The peoples were kind", "All good here", "More better now"])
+    checkpoint = tmp_path / "checkpoint.json"
+    apply_chunk = rescore.apply_chunk
+    calls = []
+
+    def crash_on_second_chunk(db, results):
+        calls.append(len(results))
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return apply_chunk(db, results)
+
+    monkeypatch.setattr(rescore, "apply_chunk", crash_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        rescore.rescore_messages(factory, chunk_size=2, checkpoint_path=checkpoint)
+    monkeypatch.setattr(rescore, "apply_chunk", apply_chunk)
+    saved = json.loads(checkpoint.read_text())
+
+    # Written after the interruption, with an id that sorts before every cursor id.
+    db = factory()
+    session = db.scalars(select(models.Session)).one()
+    late = models.Message(
+        id="0" * 36, session=session, role=models.MessageRole.USER, text="I am agree"
+    )
+    db.add(late)
+    db.commit()
+    db.close()
+
+    resumed = rescore.rescore_messages(factory, chunk_size=2, checkpoint_path=checkpoint)
+    assert resumed.resumed_from == saved["last_message_id"]
+    assert resumed.messages == 3
+    assert not checkpoint.exists()
+    db = factory()
+    assert db.scalars(select(models.ErrorSpan).where(models.ErrorSpan.message_id == late.id)).one()
+    db.close()
@@ -0,0 +1,104 @@
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app.repo import aggregates, dao, models
+
+from query_counter import count_queries
+
+
+def _client(make_app, due: int, later: int = 0):
+    env = make_app(seed=False)
+    now = datetime.now(tz=UTC)
+    # Many cards share a due_at so the (due_at, id) keyset has ties to break.
+    rows = [
+        {"front": f"f{i}", "back": f"b{i}", "due_at": now - timedelta(minutes=i % 7)}
+        for i in range(due)
+    ]
+    rows += [{"front": "later", "back": "x", "due_at": now + timedelta(days=3)}] * later
+    with env.engine.begin() as connection:
+        connection.execute(insert(models.Flashcard), rows)
+    return env.client(), env.factory, env.engines
+
+
+def _study(client, batch_size: int, stop_after: int | None = None):
+    served: list[str] = []
+    server_messages = 0
+    with client.websocket_connect(f"/ws/review?batch_size={batch_size}") as websocket:
+        while True:
+            message = websocket.receive_json()
+            server_messages += 1
+            if message["event"] == "done":
+                return served, server_messages, message
+            assert message["event"] == "cards"
+            for card in message["items"]:
+                if stop_after is not None and len(served) == stop_after:
+                    websocket.send_json({"event": "finish"})
+                    break
+                served.append(card["id"])
+                websocket.send_json({"event": "review", "card_id": card["id"], "quality": 4})
+
+
+def test_500_card_session_takes_a_handful_of_server_messages(make_app):
+    client, factory, engines = _client(make_app, due=500, later=20)
+    with count_queries(*engines) as log:
+        served, server_messages, done = _study(client, batch_size=50)
+
+    assert len(served) == len(set(served)) == 500
+    assert done["reviewed"] == done["delivered"] == 500
+    assert server_messages == 11  # ten batches of 50 plus "done"
+    assert len(log.selects()) <= 40
+    with factory() as db:
+        assert dao.list_flashcards_due(db, limit=1000) == []
+        reviewed = db.scalars(select(models.Flashcard).where(models.Flashcard.id.in_(served)))
+        assert {card.reps for card in reviewed} == {1}
+        user = dao.ensure_default_user(db)
+        assert aggregates.get_aggregates(db, user.id).cards_reviewed == 500
+
+
+def test_cursor_pages_follow_due_order_without_gaps(make_app):
+    client, factory, _ = _client(make_app, due=37)
+    with factory() as db:
+        expected = [card.id for card in dao.list_flashcards_due(db, limit=100)]
+    served, _, _ = _study(client, batch_size=8)
+    assert served == expected
+
+
+def test_finish_early_persists_answered_cards_only(make_app):
+    client, factory, _ = _client(make_app, due=30)
+    served, _, done = _study(client, batch_size=10, stop_after=12)
+    assert done["reviewed"] == 12
+    with factory() as db:
+        assert len(dao.list_flashcards_due(db, limit=100)) == 18
+
+
+def test_reviews_for_cards_not_served_are_rejected(make_app):
+    client, _, _ = _client(make_app, due=3)
+    with client.websocket_connect("/ws/review?batch_size=2") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"event": "review", "card_id": "other", "quality": 5})
+        assert websocket.receive_json()["event"] == "error"
+        websocket.send_json({"event": "finish"})
+        assert websocket.receive_json() == {"event": "done", "reviewed": 0, "delivered": 2}
+
+
+def test_malformed_reviews_get_an_error_and_the_session_continues(make_app):
+    client, factory, _ = _client(make_app, due=1)
+    with client.websocket_connect("/ws/review") as websocket:
+        card_id = websocket.receive_json()["items"][0]["id"]
+        for bad in (
+            {"event": "review", "card_id": card_id, "quality": 9},
+            {"event": "review", "card_id": card_id, "quality": "good"},
+            {"event": "review", "card_id": card_id},
+            ["review"],
+        ):
+            websocket.send_json(bad)
+            assert websocket.receive_json()["event"] == "error"
+        websocket.send_text("not json")
+        assert websocket.receive_json()["detail"] == "message is not JSON"
+        websocket.send_bytes(b'{"event": "finish"}')
+        assert websocket.receive_json()["detail"] == "expected a text frame"
+        websocket.send_json({"event": "review", "card_id": card_id, "quality": 3})
+        assert websocket.receive_json() == {"event": "done", "reviewed": 1, "delivered": 1}
+    with factory() as db:
+        assert db.get(models.Flashcard, card_id).reps == 1
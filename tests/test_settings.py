@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.repo import dao, models
 from app.repo.db import Base
+from app.services.llm import registry
 
 
 def test_update_settings_persists_choice():
@@ -17,3 +20,38 @@ def test_update_settings_persists_choice():
         assert settings.llm_model == "gpt-4o-mini"
     finally:
         session.close()
+
+
+def test_cached_settings_reuse_row_until_update_commits():
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, future=True)
+    session = Session()
+    try:
+        dao.invalidate_settings_cache()
+        first = dao.get_cached_settings(session)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert dao.get_cached_settings(session) is first
+        assert statements == []
+
+        dao.update_settings(session, models.LLMProvider.OLLAMA, "llama3")
+        assert dao.get_cached_settings(session) is first
+        session.commit()
+        updated = dao.get_cached_settings(session)
+        assert (updated.llm_provider, updated.llm_model) == (models.LLMProvider.OLLAMA, "llama3")
+        assert updated.version > first.version
+    finally:
+        session.close()
+        dao.invalidate_settings_cache()
+
+
+def test_registry_reuses_clients_per_provider_and_model():
+    registry.clear_client_cache()
+    ollama = SimpleNamespace(llm_provider=models.LLMProvider.OLLAMA, llm_model="llama3")
+    client = registry.get_llm(ollama)
+    assert registry.get_llm(ollama) is client
+    other = SimpleNamespace(llm_provider=models.LLMProvider.OLLAMA, llm_model="mistral")
+    assert registry.get_llm(other) is not client
+    registry.clear_client_cache()
+    assert registry.get_llm(ollama) is not client
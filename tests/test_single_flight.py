@@ -0,0 +1,162 @@
+import asyncio
+from contextlib import aclosing
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.services.llm.base import LLMClient
+from app.services.llm.singleflight import SingleFlight, SingleFlightLLMClient
+
+HISTORY = [
+    {"role": "system", "content": "Travel tutor"},
+    {"role": "user", "content": "I goed to Lisbon"},
+]
+
+
+class GatedClient(LLMClient):
+    """Blocks every call until ``release`` is set, counting upstream calls."""
+
+    def __init__(self, chunks=("You ", "went ", "to Lisbon.")):
+        self.chunks = list(chunks)
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self.gates = [asyncio.Event() for _ in self.chunks]  # one per streamed chunk
+
+    def reply(self, history):
+        return "".join(self.chunks)
+
+    async def areply(self, history):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.chunks[0] == "boom":
+            raise RuntimeError("upstream failed")
+        return "".join(self.chunks)
+
+    async def stream_reply(self, history):
+        self.calls += 1
+        for chunk, gate in zip(self.chunks, self.gates, strict=True):
+            await gate.wait()
+            yield chunk
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _client(inner):
+    return SingleFlightLLMClient(inner, SingleFlight(), "ollama:llama3")
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    async def run():
+        inner = GatedClient()
+        client = _client(inner)
+        tasks = [asyncio.create_task(client.areply(list(HISTORY))) for _ in range(20)]
+        different = [*HISTORY[:1], {"role": "user", "content": "hi"}]
+        other = asyncio.create_task(client.areply(different))
+        await asyncio.sleep(0)
+        inner.release.set()
+        replies = await asyncio.gather(*tasks, other)
+        return inner, client.flights, replies
+
+    inner, flights, replies = asyncio.run(run())
+    assert inner.calls == 2
+    assert replies[:20] == ["You went to Lisbon."] * 20
+    assert flights.snapshot() == {
+        "leaders": 2,
+        "joined": 19,
+        "cancelled": 0,
+        "abandoned": 0,
+        "failures": 0,
+        "in_flight": 0,
+    }
+
+
+def test_cancelling_a_waiter_keeps_the_call_until_the_last_one_leaves():
+    async def run():
+        inner = GatedClient()
+        client = _client(inner)
+        first = asyncio.create_task(client.areply(HISTORY))
+        second = asyncio.create_task(client.areply(HISTORY))
+        await settle()
+        first.cancel()
+        await settle()
+        assert inner.cancelled == 0
+        inner.release.set()
+        assert await second == "You went to Lisbon."
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        inner.release.clear()
+        lonely = asyncio.create_task(client.areply(HISTORY))
+        await settle()
+        lonely.cancel()
+        await settle()
+        assert inner.cancelled == 1
+        assert len(client.flights) == 0
+        return client.flights.stats
+
+    stats = asyncio.run(run())
+    assert (stats.leaders, stats.joined, stats.cancelled, stats.abandoned) == (2, 1, 2, 1)
+
+
+def test_failures_reach_every_waiter_and_are_not_remembered():
+    async def run():
+        inner = GatedClient(chunks=["boom"])
+        client = _client(inner)
+        tasks = [asyncio.create_task(client.areply(HISTORY)) for _ in range(3)]
+        await asyncio.sleep(0)
+        inner.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        inner.chunks = ["Fine."]
+        return inner, client.flights.stats, results, await client.areply(HISTORY)
+
+    inner, stats, results, retry = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "Fine."
+    assert inner.calls == 2
+    assert stats.failures == 1
+
+
+def test_stream_is_shared_and_late_joiners_replay_earlier_chunks():
+    async def collect(client, stop_after=None):
+        chunks = []
+        async with aclosing(client.stream_reply(HISTORY)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if len(chunks) == stop_after:
+                    break
+        return chunks
+
+    async def run():
+        inner = GatedClient()
+        client = _client(inner)
+        early = asyncio.create_task(collect(client))
+        quitter = asyncio.create_task(collect(client, stop_after=1))
+        inner.gates[0].set()
+        await settle()
+        late = asyncio.create_task(collect(client))
+        await settle()
+        for gate in inner.gates:
+            gate.set()
+        return inner, client.flights.stats, await asyncio.gather(early, quitter, late)
+
+    inner, stats, (early, quitter, late) = asyncio.run(run())
+    assert inner.calls == 1
+    assert early == late == ["You ", "went ", "to Lisbon."]
+    assert quitter == ["You "]
+    assert (stats.leaders, stats.joined, stats.cancelled, stats.abandoned) == (1, 2, 1, 0)
+
+
+def test_admin_endpoint_reports_single_flight_counters():
+    with TestClient(create_app()) as client:
+        body = client.get("/api/admin/llm-single-flight").json()
+    assert body["enabled"] is True
+    assert {"leaders", "joined", "cancelled", "abandoned", "in_flight"} <= body.keys()
@@ -0,0 +1,133 @@
+"""SQLite tuning profile: pragmas, the read-only pool and a small contention load test."""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.repo.db import _build_engine
+from app.utils.config import Settings
+
+
+def _config(tmp_path, profile: str, busy_timeout_ms: int = 5000) -> Settings:
+    return Settings(
+        database_url=f"sqlite:///{tmp_path / f'{profile}.db'}",
+        sqlite_profile=profile,
+        sqlite_busy_timeout_ms=busy_timeout_ms,
+    )
+
+
+def test_performance_profile_applies_pragmas(tmp_path):
+    engine = _build_engine(_config(tmp_path, "performance"))
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("cache_size") == -64 * 1024
+        assert pragma("mmap_size") > 0
+    engine.dispose()
+
+
+def test_read_engine_rejects_writes(tmp_path):
+    cfg = _config(tmp_path, "performance")
+    writer = _build_engine(cfg)
+    reader = _build_engine(cfg, read_only=True)
+    with writer.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM t").scalar() == 0
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("INSERT INTO t (id) VALUES (1)")
+    writer.dispose()
+    reader.dispose()
+
+
+@pytest.mark.parametrize("profile, reader_blocked", [("default", True), ("performance", False)])
+def test_readers_are_not_blocked_by_a_writer_in_wal(tmp_path, profile, reader_blocked):
+    cfg = _config(tmp_path, profile, busy_timeout_ms=0)
+    writer = _build_engine(cfg)
+    reader = _build_engine(cfg, read_only=True)
+    with writer.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    raw = writer.raw_connection()
+    try:
+        raw.execute("BEGIN EXCLUSIVE")
+        raw.execute("INSERT INTO t (id) VALUES (1)")
+        with reader.connect() as connection:
+            if reader_blocked:
+                with pytest.raises(OperationalError, match="locked"):
+                    connection.exec_driver_sql("SELECT count(*) FROM t").scalar()
+            else:
+                assert connection.exec_driver_sql("SELECT count(*) FROM t").scalar() == 0
+        raw.rollback()
+    finally:
+        raw.close()
+        writer.dispose()
+        reader.dispose()
+
+
+@dataclass
+class LoadResult:
+    reads: int = 0
+    read_busy: int = 0
+    writes: int = 0
+    write_busy: int = 0
+
+
+def _run_load(cfg: Settings, seconds: float, writers: int = 2, readers: int = 4) -> LoadResult:
+    """Batch inserts against concurrent counts; ``busy_timeout=0`` turns waits into errors."""
+    write_engine = _build_engine(cfg)
+    read_engine = _build_engine(cfg, read_only=True)
+    with write_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    result = LoadResult()
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    rows = [{"v": "x" * 200}] * 200
+
+    def _write() -> None:
+        while time.monotonic() < deadline:
+            try:
+                with write_engine.begin() as connection:
+                    connection.execute(text("INSERT INTO t (v) VALUES (:v)"), rows)
+                    time.sleep(0.002)
+                field = "writes"
+            except OperationalError:
+                field = "write_busy"
+            with lock:
+                setattr(result, field, getattr(result, field) + 1)
+
+    def _read() -> None:
+        while time.monotonic() < deadline:
+            try:
+                with read_engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT count(*) FROM t").scalar()
+                field = "reads"
+            except OperationalError:
+                field = "read_busy"
+            with lock:
+                setattr(result, field, getattr(result, field) + 1)
+
+    threads = [threading.Thread(target=_write) for _ in range(writers)]
+    threads += [threading.Thread(target=_read) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+    return result
+
+
+def test_load_wal_profile_removes_reader_lock_contention(tmp_path):
+    baseline = _run_load(_config(tmp_path, "default", busy_timeout_ms=0), seconds=0.75)
+    tuned = _run_load(_config(tmp_path, "performance", busy_timeout_ms=0), seconds=0.75)
+    print(f"\ndefault:     {baseline}\nperformance: {tuned}")
+    assert tuned.read_busy == 0
+    assert tuned.read_busy <= baseline.read_busy
+    assert tuned.writes > 0 and tuned.reads > 0
@@ -1,6 +1,8 @@
+import random
 from datetime import UTC, datetime
 
 from app.services.evaluation import srs
+from app.services.evaluation.srs_batch import next_review_batch, review_sequence
 
 
 def test_srs_progression_improves_reps():
@@ -12,3 +14,47 @@ def test_srs_progression_improves_reps():
     later_state = srs.next_review(next_state, quality=5)
     assert later_state.reps == 2
     assert later_state.interval >= 6
+
+
+def _random_states(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    reps = [rng.randint(0, 12) for _ in range(count)]
+    interval = [rng.randint(0, 2000) for _ in range(count)]
+    ease = [rng.uniform(1.3, 3.2) for _ in range(count)]
+    quality = [rng.randint(-1, 6) for _ in range(count)]
+    return reps, interval, ease, quality
+
+
+def test_batch_matches_scalar_exactly():
+    now = datetime.now(tz=UTC)
+    reps, interval, ease, quality = _random_states(20_000)
+    # Exact .5 products exercise round-half-to-even (5 * 2.5 = 12.5 -> 12).
+    reps += [3, 3, 0]
+    interval += [5, 3, 0]
+    ease += [2.4, 2.4, 1.3]
+    quality += [4, 4, 0]
+    batch = next_review_batch(reps, interval, ease, quality, now=now)
+    due_at = batch.due_datetimes()
+    for index in range(len(reps)):
+        expected = srs.next_review(
+            srs.CardState(reps[index], interval[index], ease[index], now), quality[index], now=now
+        )
+        assert int(batch.reps[index]) == expected.reps
+        assert int(batch.interval[index]) == expected.interval
+        assert float(batch.ease[index]) == expected.ease
+        assert due_at[index] == expected.due_at
+
+
+def test_review_sequence_replays_repeated_grades_in_order():
+    now = datetime.now(tz=UTC)
+    states = {"a": (2, 6, 2.5), "b": (0, 0, 2.5)}
+    grades = [("a", 5), ("b", 1), ("a", 2), ("b", 4), ("a", 4)]
+    result = review_sequence(states, grades, now=now)
+
+    expected = {card_id: srs.CardState(*state, due_at=now) for card_id, state in states.items()}
+    for card_id, quality in grades:
+        expected[card_id] = srs.next_review(expected[card_id], quality, now=now)
+    assert result == {
+        card_id: (state.reps, state.interval, state.ease, state.due_at)
+        for card_id, state in expected.items()
+    }
@@ -0,0 +1,50 @@
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.cli import main as cli_main
+from app.repo import db as db_module, models
+from app.repo.bootstrap import SchemaOutOfDate, migrate, prepare_database
+
+from query_counter import count_queries
+
+
+def test_schema_revision_matches_alembic_head():
+    config = Config()
+    config.set_main_option("script_location", str(db_module.ROOT / "alembic"))
+    assert ScriptDirectory.from_config(config).get_current_head() == db_module.SCHEMA_REVISION
+
+
+def test_startup_migrates_once_then_only_checks_the_revision(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    assert db_module.current_revision(engine) is None
+
+    assert prepare_database("auto", engine) is True
+    assert db_module.current_revision(engine) == db_module.SCHEMA_REVISION
+    with Session(engine) as session:
+        assert session.scalars(select(models.PracticeTopic)).first() is not None
+
+    with count_queries(engine) as log:
+        assert prepare_database("auto", engine) is False
+    assert log == ["SELECT version_num FROM alembic_version"]
+    engine.dispose()
+
+
+def test_check_mode_refuses_to_start_on_an_outdated_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with pytest.raises(SchemaOutOfDate, match="english-ia migrate"):
+        prepare_database("check", engine)
+    migrate(engine)
+    assert prepare_database("check", engine) is False
+    engine.dispose()
+
+
+def test_migrate_command(monkeypatch, tmp_path, capsys):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(db_module, "engine", engine)
+    assert cli_main(["migrate"]) == 0
+    assert db_module.SCHEMA_REVISION in capsys.readouterr().out
+    assert db_module.current_revision(engine) == db_module.SCHEMA_REVISION
+    engine.dispose()
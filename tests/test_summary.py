@@ -0,0 +1,137 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+
+from app.repo import dao, models
+from app.routers import chat as chat_router
+from app.services import history, summary
+from app.services.jobs import run_pending
+from app.services.llm import registry
+from app.services.llm.base import LLMClient
+from app.services.llm.resilience import reset_guards
+from app.services.llm.simple_mock import SimpleMockClient
+
+
+class RecordingClient(SimpleMockClient):
+    def __init__(self):
+        self.chat_prompts: list[list[dict]] = []
+        self.summary_prompts: list[list[dict]] = []
+
+    def reply(self, history):
+        is_summary = history[0]["content"].startswith("You keep a running summary")
+        (self.summary_prompts if is_summary else self.chat_prompts).append(list(history))
+        return super().reply(history)
+
+
+def _client(make_app, monkeypatch):
+    llm = RecordingClient()
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: llm)
+    env = make_app()
+    return env.client(), env.factory, llm
+
+
+def _chat(client, factory, session_id: str, turns: range) -> None:
+    for turn in turns:
+        text = f"Turn {turn}: yesterday I visited the old harbor and " + "we talked a lot " * 10
+        client.post(f"/api/chat/{session_id}/message", json={"text": text})
+        run_pending(factory)
+
+
+def test_summary_refreshes_every_k_turns_and_is_sent_with_the_window(make_app, monkeypatch):
+    client, factory, llm = _client(make_app, monkeypatch)
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+
+    _chat(client, factory, session_id, range(2))
+    assert llm.summary_prompts == []
+    _chat(client, factory, session_id, range(2, 3))
+    assert len(llm.summary_prompts) == 1
+    with factory() as db:
+        session = dao.get_session(db, session_id)
+        assert session.summary and session.summary_turn == 3
+        first_summary = session.summary
+
+    _chat(client, factory, session_id, range(3, 4))
+    prompt = llm.chat_prompts[-1]
+    assert prompt[1] == {"role": "system", "content": history.SUMMARY_PREFIX + first_summary}
+    assert prompt[-1]["content"].startswith("Turn 3:")
+
+    _chat(client, factory, session_id, range(4, 9))
+    # Each refresh only reads what was said since the previous one.
+    bodies = [prompt[1]["content"].split("New messages:\n")[1] for prompt in llm.summary_prompts]
+    assert [len(body.splitlines()) for body in bodies] == [6, 6, 6]
+    with factory() as db:
+        session = dao.get_session(db, session_id)
+        assert len(session.summary) <= summary.get_settings().summary_max_tokens * 4
+
+
+def test_context_endpoint_reports_prompt_savings(make_app, monkeypatch):
+    client, factory, llm = _client(make_app, monkeypatch)
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    _chat(client, factory, session_id, range(15))
+
+    context = client.get(f"/api/sessions/{session_id}/context").json()
+    sent = sum(
+        history.estimate_tokens(message["content"])
+        for prompt in llm.chat_prompts
+        for message in prompt
+    )
+    assert context["turns"] == 15
+    assert context["summary_turn"] == 15
+    assert context["prompt_tokens_sent"] == sent
+    assert context["prompt_tokens_full"] > sent
+    assert context["tokens_saved"] == context["prompt_tokens_full"] - sent
+    assert context["savings_pct"] > 20
+    assert client.get("/api/sessions/missing/context").status_code == 404
+
+
+def test_summaries_can_be_disabled(make_app, monkeypatch):
+    client, factory, llm = _client(make_app, monkeypatch)
+    config = chat_router.runtime_config.model_copy(update={"summary_every_turns": 0})
+    monkeypatch.setattr(chat_router, "runtime_config", config)
+    session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()["session_id"]
+    _chat(client, factory, session_id, range(6))
+    assert llm.summary_prompts == []
+    assert all(len(prompt) <= 1 + config.history_window for prompt in llm.chat_prompts)
+
+
+class OfflineProvider(LLMClient):
+    def reply(self, history):
+        return "(offline) Unable to reach Ollama: connection refused. Let's keep practicing!"
+
+
+def test_summary_job_retries_while_the_provider_is_down(make_app, monkeypatch):
+    env = make_app()
+    client, factory = env.client(), env.factory
+    registry.clear_client_cache()
+    reset_guards()
+    monkeypatch.setattr(registry, "_build_client", lambda *args: OfflineProvider())
+    try:
+        session_id = client.post("/api/sessions", json={"topic_code": "travel"}).json()[
+            "session_id"
+        ]
+        _chat(client, factory, session_id, range(3))  # chat falls back; the refresh fails
+        with factory() as db:
+            session = dao.get_session(db, session_id)
+            assert (session.summary, session.summary_until, session.summary_turn) == (
+                None,
+                None,
+                0,
+            )
+            job = db.scalars(
+                select(models.Job).where(models.Job.kind == summary.SUMMARIZE_SESSION)
+            ).one()
+            assert (job.status, job.attempts) == (models.JobStatus.QUEUED, 1)
+            assert "ProviderUnavailable" in job.last_error
+            job.run_after = datetime.now(tz=UTC)
+            db.commit()
+
+        monkeypatch.setattr(registry, "_build_client", lambda *args: SimpleMockClient())
+        registry.clear_client_cache()  # the provider is back
+        assert run_pending(factory) == 1
+        with factory() as db:
+            session = dao.get_session(db, session_id)
+            assert session.summary and not session.summary.startswith("(offline)")
+            assert session.summary_until is not None and session.summary_turn == 3
+    finally:
+        registry.clear_client_cache()
+        reset_guards()
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.services.evaluation.errors import IncrementalDetector, detect_errors
+from app.services.llm import registry
+from app.services.llm.simple_mock import SimpleMockClient
+from app.services.voice.pipeline import (
+    BoundedQueue,
+    CallPipeline,
+    DropPolicy,
+    QueueSizes,
+    _detect_delta,
+)
+from app.services.voice.stt import StubSpeechToText
+from app.utils.metrics import HistogramRegistry, LatencyHistogram
+
+
+def test_call_streams_transcripts_errors_and_reply(make_app):
+    client = make_app().client()
+    frames = []
+    with client.websocket_connect("/ws/call") as websocket:
+        assert websocket.receive_json()["event"] == "start"
+        for chunk in ("I am ", "agree with ", "you. The peoples ", "are kind"):
+            websocket.send_bytes(chunk.encode())
+        websocket.send_json({"event": "end_turn"})
+        websocket.send_json({"event": "hangup"})
+        while True:
+            frame = websocket.receive_json()
+            frames.append(frame)
+            if frame["event"] == "end":
+                break
+
+    events = [frame["event"] for frame in frames]
+    assert events.index("final") < events.index("token") < events.index("reply")
+    final = next(frame for frame in frames if frame["event"] == "final")
+    assert final["text"] == "I am agree with you. The peoples are kind"
+    spans = [
+        error["user_text"].lower()
+        for frame in frames
+        if frame["event"] == "errors"
+        for error in frame["detected_errors"]
+    ]
+    assert len(spans) == len(set(spans))  # each span is reported once per utterance
+    assert {"i am agree", "peoples"} <= set(spans)
+    reply = next(frame for frame in frames if frame["event"] == "reply")
+    tokens = "".join(frame["text"] for frame in frames if frame["event"] == "token")
+    assert (
+        tokens
+        == reply["text"]
+        == SimpleMockClient().reply([{"role": "user", "content": final["text"]}])
+    )
+    stats = frames[-1]["stats"]
+    for stage in ("stt", "detect", "llm_first_token", "llm_reply", "send", "turn"):
+        assert stats["histograms"][stage]["count"] >= 1
+    assert stats["queues"]["audio"]["policy"] == "block"
+
+    metrics = client.get("/api/admin/call-metrics").json()
+    assert metrics["histograms"]["turn"]["count"] >= 1
+
+
+def test_drop_oldest_only_sheds_droppable_items():
+    async def scenario():
+        queue = BoundedQueue("q", 2, DropPolicy.DROP_OLDEST)
+        await queue.put("partial-1", droppable=True)
+        await queue.put("final-1")
+        await queue.put("partial-2", droppable=True)  # evicts partial-1
+        await queue.put("final-2")  # evicts partial-2
+        assert queue.dropped == 2
+        blocked = asyncio.ensure_future(queue.put("final-3"))  # nothing droppable left
+        await asyncio.sleep(0.01)
+        assert not blocked.done() and queue.blocked == 1
+        assert await queue.get() == "final-1"
+        await blocked
+        await queue.close()
+        return [await queue.get(), await queue.get()]
+
+    assert asyncio.run(scenario()) == ["final-2", "final-3"]
+
+
+def test_drop_newest_rejects_droppable_items_when_full():
+    async def scenario():
+        queue = BoundedQueue("q", 1, DropPolicy.DROP_NEWEST)
+        assert await queue.put("a", droppable=True)
+        assert not await queue.put("b", droppable=True)
+        return queue.dropped
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_slow_client_sheds_partials_but_keeps_the_reply():
+    async def scenario():
+        pipeline = CallPipeline(
+            StubSpeechToText(),
+            SimpleMockClient(),
+            "prompt",
+            sizes=QueueSizes(audio=4, transcripts=2, turns=1, outbound=4),
+            metrics=HistogramRegistry(),
+        )
+        sent = []
+
+        async def slow_send(frame):
+            await asyncio.sleep(0.002)
+            sent.append(frame)
+
+        runner = asyncio.create_task(pipeline.run(slow_send))
+        for index in range(200):
+            await pipeline.push_audio(f"word{index} ".encode())
+        await pipeline.end_turn()
+        await pipeline.close_input()
+        await runner
+        return pipeline, sent
+
+    pipeline, sent = asyncio.run(scenario())
+    stats = pipeline.stats()
+    partials = [frame for frame in sent if frame["event"] == "partial"]
+    assert len(partials) < 200
+    assert stats["queues"]["outbound"]["dropped"] + stats["queues"]["transcripts"]["dropped"] > 0
+    assert stats["queues"]["audio"]["blocked"] > 0  # audio producer was held back
+    final = next(frame for frame in sent if frame["event"] == "final")
+    assert final["text"].endswith("word199")
+    reply = next(frame for frame in sent if frame["event"] == "reply")
+    tokens = "".join(frame["text"] for frame in sent if frame["event"] == "token")
+    assert tokens == reply["text"]
+
+
+def test_partials_feed_deltas_and_the_final_catches_early_revisions():
+    filler = " We walked along the river for a long time." * 20
+    detector = IncrementalDetector()
+    update, detector = _detect_delta(detector, "I am agree." + filler)
+    assert {error.user_text for error in update.added} == {"I am agree"}
+
+    # The recognizer rewrote the opening words long after they left the tail.
+    revised = "I agree.   " + filler + " Bye now"
+    update, same = _detect_delta(detector, revised)
+    assert same is detector and update.removed == []
+    update, detector = _detect_delta(detector, revised, final=True)
+    assert {error.user_text for error in update.removed} == {"I am agree"}
+    assert detector.errors == detect_errors(revised)
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for ms in [1] * 90 + [40] * 9 + [700]:
+        histogram.observe(ms / 1000)
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(0.95) == 50
+    assert histogram.quantile(0.999) == 1000
+    assert histogram.snapshot()["count"] == 100
+
+
+class BrokenLLM(SimpleMockClient):
+    async def stream_reply(self, history):
+        raise RuntimeError("model crashed")
+        yield  # pragma: no cover - makes this an async generator
+
+
+def test_call_is_closed_with_an_error_code_when_the_pipeline_fails(make_app, monkeypatch):
+    monkeypatch.setattr(registry, "get_llm", lambda *args, **kwargs: BrokenLLM())
+    client = make_app().client()
+    events = []
+    with client.websocket_connect("/ws/call") as websocket:
+        websocket.send_bytes(b"I am agree")
+        websocket.send_json({"event": "end_turn"})
+        # No hangup: the server must notice the failure on its own.
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                events.append(websocket.receive_json()["event"])
+    assert closed.value.code == 1011
+    assert "final" in events and "end" not in events
+
+
+def test_llm_sees_the_configured_history_window():
+    class RecordingLLM(SimpleMockClient):
+        def __init__(self):
+            self.windows = []
+
+        async def stream_reply(self, history):
+            self.windows.append([message["content"] for message in history])
+            yield "ok"
+
+    async def scenario(llm):
+        pipeline = CallPipeline(StubSpeechToText(), llm, "prompt", history_window=2)
+        runner = asyncio.create_task(pipeline.run(_discard))
+        for text in ("one", "two", "three"):
+            await pipeline.push_audio(text.encode())
+            await pipeline.end_turn()
+        await pipeline.close_input()
+        await runner
+
+    llm = RecordingLLM()
+    asyncio.run(scenario(llm))
+    assert llm.windows == [["prompt", "one"], ["prompt", "ok", "two"], ["prompt", "ok", "three"]]
+
+
+async def _discard(frame):
+    return None
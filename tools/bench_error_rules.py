@@ -0,0 +1,98 @@
+"""Compare the compiled rule engine against the legacy per-pattern ``str.find`` loop.
+
+Usage: ``python tools/bench_error_rules.py [--repeat N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.repo.models import ErrorCategory  # noqa: E402
+from app.services.evaluation.errors import _find_pattern_errors  # noqa: E402
+from app.services.evaluation.rules import Rule, compile_rules, get_catalog  # noqa: E402
+
+RULE_COUNTS = (10, 1_000, 10_000)
+SAMPLE_TEXT = (
+    "I am agree that peoples here are friendly and the food is more better than at home. "
+    "I have 25 years and I travel a lot. Yesterday we visited the museum near the station, "
+    "then we walked to the harbor because the weather was nice. "
+) * 8
+
+
+def _legacy_find(text: str, rules: list[Rule]) -> list[tuple[int, int, str]]:
+    lowered = text.lower()
+    found: list[tuple[int, int, str]] = []
+    for rule in rules:
+        start = 0
+        while True:
+            idx = lowered.find(rule.pattern, start)
+            if idx == -1:
+                break
+            end = idx + len(rule.pattern)
+            found.append((idx, end, rule.correction))
+            start = end
+    return found
+
+
+def _synthetic_rules(count: int, seed: int = 7) -> list[Rule]:
+    rng = random.Random(seed)
+    rules = [rule for rule in get_catalog().snapshot().rules if rule.regex is None]
+    while len(rules) < count:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        pattern = " ".join(words)
+        rules.append(Rule(pattern, pattern.upper(), ErrorCategory.VOCAB, "synthetic rule"))
+    return rules[:count]
+
+
+def _timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"text length: {len(SAMPLE_TEXT)} chars")
+    print(f"{'rules':>8} {'build ms':>10} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for count in RULE_COUNTS:
+        rules = _synthetic_rules(count)
+        started = time.perf_counter()
+        snapshot = compile_rules(rules)
+        build = time.perf_counter() - started
+
+        legacy_spans = [(start, end) for start, end, _ in _legacy_find(SAMPLE_TEXT, rules)]
+        engine_spans = [(err.start, err.end) for err in _find_pattern_errors(SAMPLE_TEXT, snapshot)]
+        if legacy_spans != engine_spans:
+            print(f"mismatch at {count} rules", file=sys.stderr)
+            return 1
+
+        legacy = _timeit(partial(_legacy_find, SAMPLE_TEXT, rules), args.repeat)
+        compiled = _timeit(partial(_find_pattern_errors, SAMPLE_TEXT, snapshot), args.repeat)
+        print(
+            f"{count:>8} {build * 1000:>10.2f} {legacy * 1000:>10.3f} "
+            f"{compiled * 1000:>10.3f} {legacy / compiled:>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
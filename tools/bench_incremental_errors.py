@@ -0,0 +1,65 @@
+"""Compare rescanning every partial transcript against ``IncrementalDetector``.
+
+Usage: ``python tools/bench_incremental_errors.py [--chunk N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.evaluation.errors import IncrementalDetector, detect_errors  # noqa: E402
+
+SENTENCE = (
+    "I am agree that peoples here are friendly and the food is more better than at home. "
+    "I have 25 years and I travel a lot. Ok. Yes. "
+)
+LENGTHS = (1_000, 5_000, 20_000)
+
+
+def _rescan(text: str, chunk: int) -> list:
+    errors: list = []
+    for end in range(chunk, len(text) + chunk, chunk):
+        errors = detect_errors(text[:end])
+    return errors
+
+
+def _incremental(text: str, chunk: int) -> list:
+    detector = IncrementalDetector()
+    for start in range(0, len(text), chunk):
+        detector.feed(text[start : start + chunk])
+    return detector.errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk", type=int, default=16, help="characters per partial")
+    args = parser.parse_args()
+
+    print(f"{'chars':>8} {'rescan ms':>10} {'incremental ms':>15} {'speedup':>8}")
+    for length in LENGTHS:
+        text = (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+        started = time.perf_counter()
+        expected = _rescan(text, args.chunk)
+        rescan = time.perf_counter() - started
+        started = time.perf_counter()
+        found = _incremental(text, args.chunk)
+        incremental = time.perf_counter() - started
+        if found != expected:
+            print(f"mismatch at {length} chars", file=sys.stderr)
+            return 1
+        print(
+            f"{length:>8} {rescan * 1000:>10.1f} {incremental * 1000:>15.1f} "
+            f"{rescan / incremental:>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""Simulate chat traffic over several fake Ollama instances with different speeds.
+
+Each backend generates at most ``--parallel`` replies at once (like
+``OLLAMA_NUM_PARALLEL``); one of them is much slower than the others. The same load
+is sent with every balancing strategy, plus the old single-URL setup, and the latency
+percentiles seen by the callers are printed.
+
+Usage: ``python tools/bench_llm_balancer.py [--requests N] [--concurrency N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "tests"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from app.services.llm.balancer import BalancedOllamaClient, EndpointBalancer  # noqa: E402
+from app.services.llm.pool import HTTPClientPool  # noqa: E402
+from app.utils.config import Settings  # noqa: E402
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+
+STRATEGIES = ("single", "round_robin", "least_outstanding", "ewma")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _drive(urls: list[str], strategy: str, requests: int, concurrency: int) -> dict:
+    pool = HTTPClientPool(Settings())
+    if strategy == "single":
+        balancer = EndpointBalancer(urls[:1], pool=pool, health_interval=0)
+    else:
+        balancer = EndpointBalancer(urls, strategy=strategy, pool=pool, health_interval=0)
+    client = BalancedOllamaClient(balancer, "llama3")
+    latencies: list[float] = []
+    served: Counter[str] = Counter()
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for index in remaining:
+            started = time.perf_counter()
+            reply = await client.areply([{"role": "user", "content": f"turn {index}"}])
+            latencies.append(time.perf_counter() - started)
+            served[reply] += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await pool.aclose()
+    return {
+        "wall": time.perf_counter() - started,
+        "p50": statistics.median(latencies),
+        "p95": _percentile(latencies, 0.95),
+        "p99": _percentile(latencies, 0.99),
+        "served": served,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=240)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--fast", type=float, default=0.05, help="fast backends' latency (s)")
+    parser.add_argument("--slow", type=float, default=0.30, help="slow backend's latency (s)")
+    args = parser.parse_args()
+
+    specs = [("fast-1", args.fast), ("fast-2", args.fast), ("slow", args.slow)]
+    servers = [
+        FakeLLMServer(chunks=[name], latency=latency, parallel=args.parallel)
+        for name, latency in specs
+    ]
+    for server in servers:
+        server.__enter__()
+    try:
+        urls = [server.url for server in servers]
+        print(
+            f"{args.requests} requests, {args.concurrency} concurrent callers, backends "
+            + ", ".join(f"{name}={latency * 1000:.0f}ms" for name, latency in specs)
+            + f" (x{args.parallel} parallel)"
+        )
+        header = f"{'strategy':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'wall s':>7}  served"
+        print(header)
+        for strategy in STRATEGIES:
+            result = asyncio.run(_drive(urls, strategy, args.requests, args.concurrency))
+            served = " ".join(f"{name}={result['served'][name]}" for name, _ in specs)
+            print(
+                f"{strategy:<18} {result['p50'] * 1000:>8.1f} {result['p95'] * 1000:>8.1f} "
+                f"{result['p99'] * 1000:>8.1f} {result['wall']:>7.2f}  {served}"
+            )
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""Compare the scalar SM-2 ``next_review`` loop against the NumPy batch scheduler.
+
+Usage: ``python tools/bench_srs_batch.py [--cards N] [--repeat N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.evaluation import srs  # noqa: E402
+from app.services.evaluation.srs_batch import next_review_batch  # noqa: E402
+
+
+def _deck(count: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    reps = rng.integers(0, 12, count)
+    interval = rng.integers(0, 400, count)
+    ease = rng.uniform(1.3, 3.0, count)
+    quality = rng.integers(0, 6, count)
+    return reps, interval, ease, quality
+
+
+def _scalar(reps, interval, ease, quality, now) -> list[srs.CardState]:
+    return [
+        srs.next_review(srs.CardState(r, i, e, now), q, now=now)
+        for r, i, e, q in zip(
+            reps.tolist(), interval.tolist(), ease.tolist(), quality.tolist(), strict=True
+        )
+    ]
+
+
+def _timeit(func, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    now = datetime.now(tz=UTC)
+    reps, interval, ease, quality = _deck(args.cards)
+    scalar_s, expected = _timeit(lambda: _scalar(reps, interval, ease, quality, now), 1)
+    batch_s, batch = _timeit(
+        lambda: next_review_batch(reps, interval, ease, quality, now=now), args.repeat
+    )
+
+    due_at = batch.due_datetimes()
+    for index, state in enumerate(expected):
+        actual = (
+            int(batch.reps[index]),
+            int(batch.interval[index]),
+            float(batch.ease[index]),
+            due_at[index],
+        )
+        if actual != (state.reps, state.interval, state.ease, state.due_at):
+            print(f"mismatch at card {index}: {actual} != {state}", file=sys.stderr)
+            return 1
+
+    print(f"cards: {args.cards:,}")
+    print(f"{'scalar loop':>14} {scalar_s * 1000:>10.1f} ms")
+    print(f"{'numpy batch':>14} {batch_s * 1000:>10.1f} ms  ({scalar_s / batch_s:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
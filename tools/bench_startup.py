@@ -0,0 +1,78 @@
+"""Measure worker boot time: the old always-migrate lifespan against the revision check.
+
+Each scenario runs in a fresh interpreter (so Alembic and the app are imported cold)
+against a temporary SQLite file, and reports the import time and the database step.
+
+Usage: ``python tools/bench_startup.py [--repeat N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.repo import bootstrap, db
+from app.repo.seed import seed_defaults
+if {legacy!r}:
+    db.upgrade_db()
+    db.init_db()
+    with db.session_scope() as session:
+        seed_defaults(session)
+else:
+    bootstrap.prepare_database("auto")
+done = time.perf_counter()
+print(json.dumps({{"import": imported - started, "database": done - imported}}))
+"""
+
+SCENARIOS = (
+    ("always migrate (old)", True),
+    ("revision check, up to date", False),
+)
+
+
+def _run(database: Path, legacy: bool) -> dict[str, float]:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "JOB_WORKERS": "0"}
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(legacy=legacy)],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        cold = _run(database, legacy=False)
+        print(f"first boot (migrates an empty database): {cold['database'] * 1000:.1f} ms")
+        print(f"{'scenario':<28} {'import ms':>10} {'database ms':>12} {'total ms':>10}")
+        for label, legacy in SCENARIOS:
+            runs = [_run(database, legacy) for _ in range(args.repeat)]
+            imported = statistics.median(run["import"] for run in runs) * 1000
+            step = statistics.median(run["database"] for run in runs) * 1000
+            print(f"{label:<28} {imported:>10.1f} {step:>12.1f} {imported + step:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())